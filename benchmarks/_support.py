@@ -0,0 +1,134 @@
+"""
+ベンチマークスクリプトで共通に使う補助関数。
+各スクリプトはリポジトリのルートから python benchmarks/bench_<topic>.py のように実行する。
+"""
+import os
+import sys
+import copy
+import atexit
+import shutil
+import logging
+import warnings
+import tempfile
+import statistics
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import yaml
+
+from src.config.config_manager import ConfigManager
+
+# 計測結果が読みやすいよう、アプリケーションのログは警告以上のみ表示する
+logging.basicConfig(level=logging.ERROR, format="%(levelname)s %(name)s: %(message)s")
+# スタブのモデルを使うため、google.generativeai のサポート終了の警告は表示しない
+warnings.filterwarnings("ignore", message=r"(?s).*google\.generativeai", category=FutureWarning)
+
+_temp_dirs = []
+
+def temp_dir():
+    """スクリプトの終了時に削除される一時フォルダを作成して返す。"""
+    path = tempfile.mkdtemp(prefix="translation_tool_bench_")
+    _temp_dirs.append(path)
+    return path
+
+@atexit.register
+def _cleanup():
+    for path in _temp_dirs:
+        shutil.rmtree(path, ignore_errors=True)
+
+def make_config(overrides=None):
+    """
+    既定の設定に overrides ({"gemini_settings.stream": False, ...} の形式) を上書きした ConfigManager を返す。
+    設定ファイルは一時フォルダに作成する。
+    """
+    nested = {}
+    for key_path, value in (overrides or {}).items():
+        current = nested
+        keys = key_path.split(".")
+        for key in keys[:-1]:
+            current = current.setdefault(key, {})
+        current[keys[-1]] = value
+    path = os.path.join(temp_dir(), "setting.yaml")
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(nested, f, allow_unicode=True)
+    # ConfigManager は既定の設定の入れ子の辞書に上書きを書き込むため、同じプロセスで異なる設定を作れるよう既定値を元に戻す
+    defaults = copy.deepcopy(ConfigManager.DEFAULT_SETTINGS)
+    config_manager = ConfigManager(path)
+    ConfigManager.DEFAULT_SETTINGS = defaults
+    return config_manager
+
+def summarize(timings_ms):
+    """計測値 (ms) のリストを「中央値 / 最小 / 最大」の文字列にする。"""
+    return f"中央値 {statistics.median(timings_ms):.1f} ms (最小 {min(timings_ms):.1f}, 最大 {max(timings_ms):.1f})"
+
+def synthetic_screen(width, height, seed=0):
+    """
+    ゲーム画面に似せた合成画像 (グラデーションの背景、半透明のパネル、文字) を PIL のRGB画像で返す。
+    乱数のノイズ画像と違い、実際のスクリーンショットに近い圧縮率になる。
+    """
+    import random
+    from PIL import Image, ImageDraw
+    rng = random.Random(seed)
+    image = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    draw = ImageDraw.Draw(image)
+    for _ in range(max(4, width * height // 400000)):
+        left = rng.randrange(0, max(1, width - 400))
+        top = rng.randrange(0, max(1, height - 120))
+        panel_width = rng.randint(200, 600)
+        panel_height = rng.randint(60, 200)
+        draw.rectangle((left, top, left + panel_width, top + panel_height), fill=(20, 24, 32), outline=(200, 180, 90))
+        for line in range(panel_height // 20):
+            words = " ".join(rng.choice(("Quest", "Gold", "Shield", "Sword", "Level", "THREAT", "Imperial", "Courier"))
+                             for _ in range(rng.randint(2, 6)))
+            draw.text((left + 8, top + 6 + line * 18), words, fill=(230, 230, 230))
+    return image
+
+class StubChunk:
+    """ストリーミング応答のチャンク (text 属性のみ持つ)。"""
+    def __init__(self, text):
+        self.text = text
+
+class StubModel:
+    """
+    Gemini の GenerativeModel の代わりに使うスタブ。通信の代わりに latency 秒待ってから、
+    「翻訳結果:」「解説:」の形式の応答を返す。ストリーミングでは応答を chunk_count 個に分けて返す。
+    respond を指定すると、プロンプトのリストから応答テキストを作る関数として使う。
+    呼び出し回数と受け取ったプロンプトの文字数・画像の枚数を記録する。
+    """
+    def __init__(self, latency=0.3, chunk_count=4, respond=None):
+        self.latency = latency
+        self.chunk_count = chunk_count
+        self.respond = respond
+        self.calls = 0
+        self.prompt_chars = 0
+        self.images = 0
+
+    def _response_text(self, prompt_parts):
+        self.calls += 1
+        self.prompt_chars += sum(len(part) for part in prompt_parts if isinstance(part, str))
+        self.images += sum(1 for part in prompt_parts if isinstance(part, dict))
+        if self.respond is not None:
+            return self.respond(prompt_parts)
+        return "翻訳結果: こんにちは、冒険者よ。\n解説:\n- adventurer: 冒険者"
+
+    def _chunks(self, text):
+        size = max(1, -(-len(text) // self.chunk_count))
+        return [StubChunk(text[start:start + size]) for start in range(0, len(text), size)]
+
+    async def generate_content_async(self, prompt_parts, stream=False):
+        import asyncio
+        text = self._response_text(prompt_parts)
+        chunks = self._chunks(text)
+        if not stream:
+            await asyncio.sleep(self.latency)
+            return StubChunk(text)
+
+        async def iterate():
+            # 最初のチャンクまでに待ち時間の半分、残りを各チャンクに分けて待つ
+            await asyncio.sleep(self.latency / 2)
+            for chunk in chunks:
+                await asyncio.sleep(self.latency / 2 / len(chunks))
+                yield chunk
+        return iterate()
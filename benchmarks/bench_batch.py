@@ -0,0 +1,87 @@
+"""
+バッチモードのベンチマーク。同じ N 件のキャプチャを、1件ずつのリクエスト (GeminiWorker) と
+1回のバッチリクエスト (GeminiBatchWorker) で処理し、処理時間・リクエスト数・入力トークン数を比較する。
+通信の代わりに一定時間待つスタブのモデルを使う。
+
+    python benchmarks/bench_batch.py --captures 4 --latency 0.3 --prompt-chars 2000 --concurrency 1
+"""
+import re
+import sys
+import time
+import asyncio
+import argparse
+
+import _support
+from _support import StubModel
+
+from src.threads.gemini_worker import GeminiWorker, GeminiBatchWorker
+from src.threads.request_scheduler import RequestScheduler, IMAGE_TOKENS
+from src.utils.response_parser import BATCH_SECTION_HEADER, BATCH_SECTION_PATTERN
+
+def respond(prompt_parts):
+    """バッチの場合は見出しの数だけ回答を並べ、そうでなければ1件分の回答を返す。"""
+    indexes = [int(match.group(1)) for part in prompt_parts if isinstance(part, str)
+               for match in [BATCH_SECTION_PATTERN.fullmatch(part.strip())] if match]
+    if not indexes:
+        return "翻訳結果: こんにちは、冒険者よ。\n解説:\n- adventurer: 冒険者"
+    return "\n".join(
+        f"{BATCH_SECTION_HEADER.format(index=index)}\n翻訳結果: 画像{index}の訳文\n解説:\n- 画像{index}の解説"
+        for index in indexes
+    )
+
+def make_workers(config_manager, model, scheduler, count):
+    workers = [
+        GeminiWorker(number, f"image-{number}".encode(), "", "translation", config_manager, lambda name: model,
+                     scheduler=scheduler)
+        for number in range(1, count + 1)
+    ]
+    results = {}
+    for worker in workers:
+        worker.signals.finished.connect(lambda job_id, original, translation, explanation: results.setdefault(job_id, translation))
+        worker.signals.error.connect(lambda job_id, message: results.setdefault(job_id, f"エラー: {message}"))
+    return workers, results
+
+def measure(label, config_manager, count, latency, concurrency, batch):
+    model = StubModel(latency=latency, respond=respond)
+    async def run():
+        scheduler = RequestScheduler(config_manager, max_concurrent=concurrency)
+        workers, results = make_workers(config_manager, model, scheduler, count)
+        started = time.perf_counter()
+        if batch:
+            await GeminiBatchWorker(workers, config_manager, lambda name: model, scheduler=scheduler).run()
+        else:
+            await asyncio.gather(*(worker.run() for worker in workers))
+        return time.perf_counter() - started, results
+    wall, results = asyncio.run(run())
+    tokens = IMAGE_TOKENS * model.images + (model.prompt_chars + 3) // 4
+    failed = sum(1 for text in results.values() if text.startswith("エラー"))
+    print(
+        f"{label}: {wall * 1000:.0f} ms, リクエスト {model.calls} 回, プロンプト {model.prompt_chars} 文字, "
+        f"画像 {model.images} 枚, 入力トークン約 {tokens}, 結果 {len(results) - failed}/{count} 件"
+    )
+    return wall, tokens
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--captures", type=int, default=4, help="まとめるキャプチャの数")
+    parser.add_argument("--latency", type=float, default=0.3, help="スタブのモデルの応答時間 (秒)")
+    parser.add_argument("--prompt-chars", type=int, default=2000, help="翻訳プロンプトの文字数")
+    parser.add_argument("--concurrency", type=int, default=1, help="APIの同時実行数")
+    args = parser.parse_args()
+
+    config_manager = _support.make_config({
+        "gemini_settings.stream": True,
+        "gemini_settings.translation_prompt": ("ゲーム画面の英語を日本語に翻訳してください。" * args.prompt_chars)[:args.prompt_chars],
+        "rate_limit_settings.requests_per_minute": 1000000,
+        "rate_limit_settings.tokens_per_minute": 1000000000,
+    })
+    print(f"キャプチャ {args.captures} 件, スタブの応答時間 {args.latency * 1000:.0f} ms, "
+          f"プロンプト {args.prompt_chars} 文字, 同時実行数 {args.concurrency}")
+    single_wall, single_tokens = measure("1件ずつ", config_manager, args.captures, args.latency, args.concurrency, batch=False)
+    batch_wall, batch_tokens = measure("バッチ", config_manager, args.captures, args.latency, args.concurrency, batch=True)
+    print(f"バッチによる短縮: {(single_wall - batch_wall) * 1000:.0f} ms, 入力トークン {single_tokens - batch_tokens} 削減 "
+          f"({(1 - batch_tokens / single_tokens) * 100:.0f}%)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+キャプチャからOCR・API送信用画像までの変換経路のベンチマーク (4K の合成フレーム)。
+
+従来の経路: mss の .rgb (BGRA -> RGB のバイト列) -> Image.frombytes -> PNGエンコード (ファイル保存用)
+            -> PNGエンコード (API送信用) -> OCR用に PNG をデコード
+現在の経路: CaptureFrame (mss のバッファを共有) -> Image.frombuffer で1回だけRGBに変換
+            -> prepare_upload_image で1回だけエンコード -> 変換後の画像をそのままOCRに渡す
+
+    python benchmarks/bench_capture_frame.py --width 3840 --height 2160 --rounds 5
+"""
+import sys
+import time
+import argparse
+from io import BytesIO
+
+import _support
+from _support import summarize, synthetic_screen
+
+from PIL import Image
+from mss.screenshot import ScreenShot
+
+from src.utils.capture_frame import CaptureFrame
+from src.utils.image_preparation import prepare_upload_image
+
+def grab_like_mss(bgra, width, height):
+    """mss の grab() と同じ ScreenShot を、合成したBGRAのバッファから作る。"""
+    return ScreenShot(bytearray(bgra), {"left": 0, "top": 0, "width": width, "height": height})
+
+def legacy_path(sct_img):
+    """従来の経路を実行し、手順ごとの (名前, ms, 出力のバイト数, 種類) のリストを返す。種類は "copy" または "codec"。"""
+    steps = []
+    last = time.perf_counter()
+    def mark(name, nbytes, kind):
+        nonlocal last
+        now = time.perf_counter()
+        steps.append((name, (now - last) * 1000, nbytes, kind))
+        last = now
+
+    rgb = sct_img.rgb
+    mark("sct_img.rgb (BGRA -> RGB のコピー)", len(rgb), "copy")
+    image = Image.frombytes("RGB", sct_img.size, rgb)
+    mark("Image.frombytes (コピー)", image.width * image.height * 4, "copy")
+    file_buffer = BytesIO()
+    image.save(file_buffer, "PNG")
+    mark("PNGエンコード (ファイル保存用)", file_buffer.tell(), "codec")
+    upload_buffer = BytesIO()
+    image.save(upload_buffer, "PNG")
+    mark("PNGエンコード (API送信用)", upload_buffer.tell(), "codec")
+    ocr_image = Image.open(BytesIO(upload_buffer.getvalue()))
+    ocr_image.load()
+    mark("PNGデコード (OCR用)", ocr_image.width * ocr_image.height * 4, "codec")
+    return steps
+
+def current_path(sct_img, config_manager):
+    """現在の経路を実行し、手順ごとの (名前, ms, 出力のバイト数, 種類) のリストを返す。種類は "copy" または "codec"。"""
+    steps = []
+    last = time.perf_counter()
+    def mark(name, nbytes, kind):
+        nonlocal last
+        now = time.perf_counter()
+        steps.append((name, (now - last) * 1000, nbytes, kind))
+        last = now
+
+    frame = CaptureFrame.from_mss(sct_img)
+    mark("CaptureFrame (バッファを共有)", 0, None)
+    image = frame.to_image()
+    image.load()
+    mark("Image.frombuffer (BGRA -> RGB の変換)", image.width * image.height * 4, "copy")
+    prepared = prepare_upload_image(image, config_manager)
+    mark("PNGエンコード (保存・API送信で共有)", len(prepared.data), "codec")
+    return steps
+
+def run(label, function, rounds):
+    totals = []
+    per_step = {}
+    for _ in range(rounds):
+        steps = function()
+        totals.append(sum(ms for _, ms, _, _ in steps))
+        for name, ms, nbytes, kind in steps:
+            per_step.setdefault(name, ([], nbytes, kind))[0].append(ms)
+    print(f"\n{label}: 合計 {summarize(totals)}")
+    for name, (timings, nbytes, _) in per_step.items():
+        print(f"  {name}: {summarize(timings)}, 出力 {nbytes / 1024 / 1024:.1f} MiB")
+    copies = sum(1 for _, _, kind in per_step.values() if kind == "copy")
+    codec_passes = sum(1 for _, _, kind in per_step.values() if kind == "codec")
+    print(f"  画像全体のコピー {copies} 回, エンコード・デコード {codec_passes} 回")
+    return min(totals), copies, codec_passes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    screen = synthetic_screen(args.width, args.height)
+    bgra = screen.tobytes("raw", "BGRX")
+    config_manager = _support.make_config({"upload_settings.format": "png"})
+    print(f"{args.width}x{args.height} の合成フレーム ({len(bgra) / 1024 / 1024:.1f} MiB, BGRA)")
+
+    legacy_ms, legacy_copies, legacy_codec = run(
+        "従来の経路", lambda: legacy_path(grab_like_mss(bgra, args.width, args.height)), args.rounds
+    )
+    current_ms, current_copies, current_codec = run(
+        "現在の経路", lambda: current_path(grab_like_mss(bgra, args.width, args.height), config_manager), args.rounds
+    )
+    print(
+        f"\n削減: {legacy_ms - current_ms:.1f} ms (最小値の比較), 画像全体のコピー {legacy_copies} 回 -> {current_copies} 回, "
+        f"エンコード・デコード {legacy_codec} 回 -> {current_codec} 回"
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+監視モードの変化の検出 (FrameChangeDetector) のベンチマーク。
+合成したフレームを使い、範囲の大きさごとに、静止した画面と毎回内容が変わる画面での1秒あたりの判定回数を計測する。
+画面の取得 (mss) の時間は含まない。
+
+    python benchmarks/bench_frame_diff.py --sizes 1200x240 1920x400 3840x2160 --seconds 1
+"""
+import sys
+import time
+import argparse
+
+import _support
+from _support import synthetic_screen
+
+from src.config.config_manager import ConfigManager
+from src.utils.capture_frame import CaptureFrame
+from src.utils.frame_diff import FrameChangeDetector
+
+def make_frame(width, height, seed):
+    return CaptureFrame(synthetic_screen(width, height, seed=seed).tobytes("raw", "BGRX"), width, height)
+
+def make_detector():
+    settings = ConfigManager.DEFAULT_SETTINGS["watch_settings"]
+    return FrameChangeDetector(
+        block_size=settings["block_size"], pixel_threshold=settings["pixel_threshold"],
+        min_changed_blocks=settings["min_changed_blocks"], settle_frames=settings["settle_frames"]
+    )
+
+def measure(frames, seconds):
+    """frames を順に繰り返し判定し、(1秒あたりの判定回数, 1回あたりの ms, 新しいと判定した回数, 判定回数) を返す。"""
+    detector = make_detector()
+    detector.is_new(frames[0])
+    count = new_frames = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        if detector.is_new(frames[count % len(frames)]):
+            new_frames += 1
+        count += 1
+    elapsed = time.perf_counter() - start
+    return count / elapsed, elapsed / count * 1000, new_frames, count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=["1200x240", "1920x400", "3840x2160"])
+    parser.add_argument("--seconds", type=float, default=1.0, help="1つの条件あたりの計測時間 (秒)")
+    args = parser.parse_args()
+
+    interval_ms = ConfigManager.DEFAULT_SETTINGS["watch_settings"]["interval_ms"]
+    print(f"監視の間隔 {interval_ms} ms (既定) に対する、変化の検出の処理時間")
+    for size in args.sizes:
+        width, height = (int(value) for value in size.lower().split("x"))
+        first, second = make_frame(width, height, 0), make_frame(width, height, 1)
+        # 内容が変わる画面は、文字の異なるフレームを2回ずつ交互に使う (settle_frames が 1 のため、変化の次のフレームで新しいと判定される)
+        for label, frames in (("静止", [first]), ("変化", [first, first, second, second])):
+            fps, ms, new_frames, count = measure(frames, args.seconds)
+            print(
+                f"{width}x{height} {label}: {fps:.0f} 回/秒 (1回 {ms:.2f} ms, 監視の間隔に対して {ms / interval_ms * 100:.2f}%), "
+                f"新しいと判定 {new_frames}/{count} 回"
+            )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
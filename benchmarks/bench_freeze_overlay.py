@@ -0,0 +1,135 @@
+"""
+範囲選択のオーバーレイの固定表示 (behavior.freeze_screen) のベンチマーク (オフスクリーンのQt)。
+
+ホットキーからオーバーレイの最初の描画までの時間と、マウスリリースから選択範囲の画像を得るまでの時間を、
+固定表示あり (表示時に画面全体を1回取得し、その画像から切り出す) となし (リリース後に選択範囲を取得する) で比較する。
+画面の取得には、合成した画面から mss と同じくバッファをコピーして返し、100万画素あたり --grab-ms-per-mp だけ待つ
+疑似バックエンドを使う。オフスクリーンの画面は論理 800x600 のため、物理解像度は --scale 倍 (既定で 3840x2880) とする。
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_freeze_overlay.py --rounds 10
+"""
+import os
+import sys
+import time
+import argparse
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# X サーバーのない環境でも selection_window (ホットキーの pynput を読み込む) をインポートできるようにする
+os.environ.setdefault("PYNPUT_BACKEND", "dummy")
+
+import _support
+from _support import StubModel, summarize, synthetic_screen
+
+import numpy as np
+from PyQt5.QtCore import QRect, qInstallMessageHandler
+from PyQt5.QtWidgets import QApplication
+
+from src.threads.gemini_service import GeminiService
+from src.utils.capture_backends import CaptureBackend
+from src.utils.capture_frame import CaptureFrame
+from src.windows import selection_window as selection_window_module
+from src.windows.selection_window import SelectionWindow
+
+class SyntheticBackend(CaptureBackend):
+    """
+    合成した画面 (物理ピクセル) から矩形をコピーして返すバックエンド。
+    座標は論理座標の scale 倍を物理座標とし、取得した画素数に比例する時間だけ待つ。
+    """
+    name = "synthetic"
+
+    def __init__(self, width, height, seconds_per_megapixel):
+        self.screen = np.asarray(synthetic_screen(width, height).convert("RGBA"))[..., [2, 1, 0, 3]].copy()
+        self.seconds_per_megapixel = seconds_per_megapixel
+        self.grabs = 0
+        self.grabbed_pixels = 0
+
+    def grab(self, x, y, width, height):
+        started = time.perf_counter()
+        data = self.screen[y:y + height, x:x + width].tobytes()
+        height, width = min(height, self.screen.shape[0] - y), min(width, self.screen.shape[1] - x)
+        self.grabs += 1
+        self.grabbed_pixels += width * height
+        remaining = width * height / 1e6 * self.seconds_per_megapixel - (time.perf_counter() - started)
+        if remaining > 0:
+            time.sleep(remaining)
+        return CaptureFrame(data, width, height, x, y)
+
+def create_window(application, config_manager, backend, scale):
+    """疑似バックエンドで画面を取得する SelectionWindow と、GeminiService を生成する。"""
+    selection_window_module.get_capture_backend = lambda config_manager: backend
+    # オフスクリーンの画面は拡大率 1 のため、論理座標を scale 倍して物理座標とする
+    selection_window_module.logical_to_physical = lambda x, y, width, height: (
+        round(x * scale), round(y * scale), round(width * scale), round(height * scale)
+    )
+    service = GeminiService(config_manager, model_factory=lambda model_name: StubModel())
+    window = SelectionWindow(config_manager=config_manager, gemini_service=service)
+    return window, service
+
+def wait_for_first_paint(application, window, timeout=5.0):
+    deadline = time.perf_counter() + timeout
+    while window._shown_at is not None and time.perf_counter() < deadline:
+        application.processEvents()
+    if window._shown_at is not None:
+        raise RuntimeError("オーバーレイが描画されませんでした。")
+
+def measure(application, window, backend, selection, rounds):
+    """(ホットキーから最初の描画までの ms のリスト, マウスリリースから画像までの ms のリスト, 1回あたりの取得回数, 取得画素数) を返す。"""
+    overlay_ms = []
+    release_ms = []
+    grabs = backend.grabs
+    pixels = backend.grabbed_pixels
+    for _ in range(rounds):
+        started = time.perf_counter()
+        window.begin_selection(started_at=started)
+        wait_for_first_paint(application, window)
+        overlay_ms.append((time.perf_counter() - started) * 1000)
+
+        # mouseReleaseEvent と同じく、固定表示の画像を保持してからウィンドウを非表示にし、選択範囲を切り出す
+        released = time.perf_counter()
+        frozen_frame = window._frozen_frame
+        window.hide()
+        frames = window._grab_regions([selection], frozen_frame)
+        release_ms.append((time.perf_counter() - released) * 1000)
+        assert frames and frames[0].width > 0
+        application.processEvents()
+    return overlay_ms, release_ms, (backend.grabs - grabs) / rounds, (backend.grabbed_pixels - pixels) / rounds
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--scale", type=float, default=4.8, help="論理座標に対する物理ピクセルの倍率")
+    parser.add_argument("--grab-ms-per-mp", type=float, default=4.0, help="疑似バックエンドの100万画素あたりの取得時間 (ms)")
+    args = parser.parse_args()
+
+    # オフスクリーンのプラグインが raise() などのたびに出す警告は表示しない
+    qInstallMessageHandler(lambda message_type, context, message: None)
+    application = QApplication.instance() or QApplication(sys.argv)
+    logical = application.desktop().screenGeometry()
+    width, height = round(logical.width() * args.scale), round(logical.height() * args.scale)
+    backend = SyntheticBackend(width, height, args.grab_ms_per_mp / 1000)
+    selection = QRect(logical.width() // 8, logical.height() * 3 // 4, logical.width() * 3 // 4, logical.height() // 6)
+    print(
+        f"画面: 論理 {logical.width()}x{logical.height()}, 物理 {width}x{height}, "
+        f"選択範囲 (論理) {selection.width()}x{selection.height()}, 取得 {args.grab_ms_per_mp:.1f} ms / 100万画素"
+    )
+
+    results = {}
+    for label, freeze in (("固定表示なし", False), ("固定表示あり", True)):
+        config_manager = _support.make_config({"behavior.freeze_screen": freeze})
+        window, service = create_window(application, config_manager, backend, args.scale)
+        overlay_ms, release_ms, grabs, pixels = measure(application, window, backend, selection, args.rounds)
+        service.shutdown()
+        window.deleteLater()
+        application.processEvents()
+        results[label] = (overlay_ms, release_ms)
+        print(f"\n{label}: 画面の取得 {grabs:.0f} 回 ({pixels / 1e6:.1f} 百万画素) / 1回の範囲選択")
+        print(f"  ホットキー -> オーバーレイの描画: {summarize(overlay_ms)}")
+        print(f"  マウスリリース -> 選択範囲の画像: {summarize(release_ms)}")
+    print(
+        "\n固定表示ありでは、選択範囲の画像はホットキーを押した時点の画面から切り出すため、"
+        "マウスリリースの後に画面を取得し直さない (選択中に画面が変わっても、その影響を受けない)。"
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
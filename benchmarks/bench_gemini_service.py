@@ -0,0 +1,77 @@
+"""
+GeminiService のスループットのベンチマーク。
+通信の代わりに一定時間待つスタブのモデルを使い、同時実行数ごとに N 件のジョブの処理時間を計測する。
+同時実行数 1 は、1件ずつ順番に処理する場合に相当する。
+
+    python benchmarks/bench_gemini_service.py --jobs 32 --latency 0.3 --concurrency 1 2 4 8
+"""
+import sys
+import time
+import argparse
+
+import _support
+from _support import StubModel
+
+from PyQt5.QtCore import QCoreApplication, QTimer
+
+from src.threads.gemini_service import GeminiService
+
+def run(application, concurrency, jobs, latency, stream):
+    config_manager = _support.make_config({
+        "gemini_settings.max_concurrent_requests": concurrency,
+        "gemini_settings.max_queued_requests": jobs,
+        "gemini_settings.stream": stream,
+        "rate_limit_settings.requests_per_minute": 1000000,
+        "rate_limit_settings.tokens_per_minute": 1000000000,
+        "batch_settings.enabled": False,
+    })
+    model = StubModel(latency=latency)
+    created = []
+    def model_factory(model_name):
+        created.append(model_name)
+        return model
+
+    service = GeminiService(config_manager, model_factory=model_factory)
+    finished = []
+    errors = []
+    def on_done():
+        if len(finished) + len(errors) == jobs:
+            application.quit()
+    service.finished.connect(lambda job_id, *_: (finished.append(job_id), on_done()))
+    service.error.connect(lambda job_id, message: (errors.append(message), on_done()))
+
+    started = time.perf_counter()
+    for number in range(jobs):
+        service.submit(f"image-{number}".encode(), "", "translation")
+    QTimer.singleShot(int((jobs * latency + 30) * 1000), application.quit) # 応答がない場合の打ち切り
+    application.exec_()
+    wall = time.perf_counter() - started
+    stats = service.stats()
+    service.shutdown()
+    if errors:
+        print(f"  エラー {len(errors)} 件: {errors[0]}")
+    return wall, len(finished), stats, len(created)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=32, help="投入するジョブの数")
+    parser.add_argument("--latency", type=float, default=0.3, help="スタブのモデルの応答時間 (秒)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--no-stream", action="store_true", help="ストリーミングを使わない")
+    args = parser.parse_args()
+
+    application = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    print(f"ジョブ {args.jobs} 件, スタブの応答時間 {args.latency * 1000:.0f} ms, ストリーミング {'なし' if args.no_stream else 'あり'}")
+    baseline = None
+    for concurrency in args.concurrency:
+        wall, completed, stats, models_created = run(application, concurrency, args.jobs, args.latency, not args.no_stream)
+        baseline = baseline or wall
+        print(
+            f"同時実行数 {concurrency}: {wall * 1000:.0f} ms, {completed / wall:.1f} 件/秒 "
+            f"(同時実行数 {args.concurrency[0]} の {baseline / wall:.1f} 倍), 完了 {completed}/{args.jobs} 件, "
+            f"ジョブの平均レイテンシ {stats['average_latency_ms']:.0f} ms, モデルの生成 {models_created} 回"
+        )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+OCRエンジンのベンチマーク。呼び出しごとにプロセスを起動して言語データを読み込み直すエンジン (pytesseract と同じ方式) と、
+言語データを読み込んだエンジンを保持し続けるエンジン (tesserocr と同じ方式) のOCR1回あたりの時間を比較する。
+
+Tesseract がなくても実行できるよう、言語データの読み込み時間 (--load-ms) と画素数に比例する認識時間
+(--ocr-ms-per-mp) を待つ疑似エンジンを使う。疑似的なプロセス方式では、実際に子プロセスを起動してその中で待つ。
+pytesseract / tesserocr と Tesseract が使える場合は、実際のエンジンでも同じ画像を計測する。
+
+    python benchmarks/bench_ocr_engine.py --captures 10 --load-ms 250 --ocr-ms-per-mp 150
+    python benchmarks/bench_ocr_engine.py --tesseract-path /usr/bin/tesseract --lang eng+jpn
+"""
+import sys
+import time
+import shutil
+import argparse
+import subprocess
+
+import _support
+from _support import summarize, synthetic_screen
+
+from src.utils.ocr_utils import OcrEngine, OcrEngineWorker, PytesseractEngine, TesserocrEngine, _tessdata_path
+
+SCREENSHOT_SIZES = [(1200, 240), (1920, 400), (800, 600), (1600, 900)]
+
+def _fake_data(image):
+    return {"text": ["Quest"], "conf": [95.0], "block_num": [1], "par_num": [1], "line_num": [1],
+            "top": [0], "height": [image.height]}
+
+class FakeSubprocessEngine(OcrEngine):
+    """呼び出しごとに子プロセスを起動し、その中で言語データの読み込みと認識の時間だけ待つ疑似エンジン。"""
+    name = "疑似 (呼び出しごとにプロセス起動)"
+
+    def __init__(self, load_seconds, seconds_per_megapixel):
+        self.load_seconds = load_seconds
+        self.seconds_per_megapixel = seconds_per_megapixel
+
+    def recognize_data(self, image):
+        seconds = self.load_seconds + image.width * image.height / 1e6 * self.seconds_per_megapixel
+        subprocess.run([sys.executable, "-c", f"import time; time.sleep({seconds})"], check=True)
+        return _fake_data(image)
+
+class FakeWarmEngine(OcrEngine):
+    """初期化時に1回だけ言語データの読み込み時間を待ち、以降は認識の時間だけ待つ疑似エンジン。"""
+    name = "疑似 (エンジンを保持)"
+
+    def __init__(self, load_seconds, seconds_per_megapixel):
+        time.sleep(load_seconds)
+        self.seconds_per_megapixel = seconds_per_megapixel
+
+    def recognize_data(self, image):
+        time.sleep(image.width * image.height / 1e6 * self.seconds_per_megapixel)
+        return _fake_data(image)
+
+class BenchEngineWorker(OcrEngineWorker):
+    """OcrEngineWorker のエンジンの生成だけを engine_factory に差し替えたもの。"""
+    def __init__(self, engine_factory):
+        super().__init__("auto", None, None, None, None)
+        self.engine_factory = engine_factory
+
+    def _create_engine(self):
+        return self.engine_factory()
+
+def measure(label, engine_factory, images):
+    """OcrEngineWorker でOCRを繰り返し、1回目 (エンジンの初期化を含む) と2回目以降の時間 (ms) を表示する。"""
+    worker = BenchEngineWorker(engine_factory)
+    timings = []
+    try:
+        for image in images:
+            start = time.perf_counter()
+            worker.recognize(image)
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        worker.close()
+    steady = timings[1:] or timings
+    print(f"{label}: 1回目 {timings[0]:.0f} ms, 2回目以降 {summarize(steady)}, 合計 {sum(timings):.0f} ms")
+    return sum(steady) / len(steady)
+
+def real_engines(args):
+    """使用できる実際のエンジンの (名前, 生成する関数) のリストを返す。"""
+    tesseract_path = args.tesseract_path or shutil.which("tesseract")
+    if not tesseract_path:
+        print("Tesseract が見つからないため、実際のエンジンの計測は省略します (--tesseract-path で指定できます)。")
+        return []
+    engines = []
+    try:
+        import pytesseract # noqa: F401
+        engines.append(("pytesseract (呼び出しごとにプロセス起動)",
+                        lambda: PytesseractEngine(tesseract_path, args.lang, args.config)))
+    except ImportError:
+        print("pytesseract がインストールされていないため、pytesseract の計測は省略します。")
+    try:
+        import tesserocr # noqa: F401
+        config_manager = _support.make_config({"ocr_settings.tesseract_path": tesseract_path})
+        tessdata_path = _tessdata_path(config_manager, tesseract_path)
+        engines.append(("tesserocr (エンジンを保持)", lambda: TesserocrEngine(tessdata_path, args.lang, args.config)))
+    except ImportError:
+        print("tesserocr がインストールされていないため、tesserocr の計測は省略します。")
+    return engines
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--captures", type=int, default=10, help="OCRするスクリーンショットの数")
+    parser.add_argument("--load-ms", type=float, default=250, help="疑似エンジンの言語データの読み込み時間 (ms)")
+    parser.add_argument("--ocr-ms-per-mp", type=float, default=150, help="疑似エンジンの100万画素あたりの認識時間 (ms)")
+    parser.add_argument("--tesseract-path", default=None, help="実際のエンジンの計測に使う tesseract コマンド")
+    parser.add_argument("--lang", default="eng+jpn")
+    parser.add_argument("--config", default="--psm 3")
+    args = parser.parse_args()
+
+    images = [synthetic_screen(*SCREENSHOT_SIZES[index % len(SCREENSHOT_SIZES)], seed=index) for index in range(args.captures)]
+    print(f"合成したスクリーンショット {len(images)} 枚 ({', '.join(f'{w}x{h}' for w, h in SCREENSHOT_SIZES)} を順に使用)")
+
+    load_seconds = args.load_ms / 1000
+    seconds_per_megapixel = args.ocr_ms_per_mp / 1000
+    print(f"疑似エンジン: 言語データの読み込み {args.load_ms:.0f} ms, 認識 {args.ocr_ms_per_mp:.0f} ms / 100万画素")
+    cold = measure(FakeSubprocessEngine.name, lambda: FakeSubprocessEngine(load_seconds, seconds_per_megapixel), images)
+    warm = measure(FakeWarmEngine.name, lambda: FakeWarmEngine(load_seconds, seconds_per_megapixel), images)
+    print(f"  2回目以降の平均: {cold:.0f} ms -> {warm:.0f} ms ({cold / warm:.1f} 倍)")
+
+    for label, factory in real_engines(args):
+        measure(label, factory, images)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
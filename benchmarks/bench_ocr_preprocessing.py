@@ -0,0 +1,177 @@
+"""
+OCRの前処理 (ocr_settings.preprocessing) の精度と処理時間のベンチマーク。
+
+フィクスチャ (正解のテキストが分かっている画像) ごとに、前処理の手順ごとの処理時間と、
+前処理なし / ありでのOCRの一致率 (正解のテキストとの difflib の類似度) を表示する。
+フィクスチャは合成した画像 (暗いパネルの文字、明るい背景の文字、派手な背景のHUDの文字、小さい文字) を使う。
+--fixtures には、画像 (name.png) と正解のテキスト (name.txt) を置いたフォルダを指定できる。
+
+OCRの一致率の計測には Tesseract と、tesserocr または pytesseract が必要 (ない場合は処理時間のみ計測する)。
+--check を付けると、前処理ありの平均一致率が前処理なしより低い場合に終了コード 1 を返す。
+
+    python benchmarks/bench_ocr_preprocessing.py --rounds 5
+    python benchmarks/bench_ocr_preprocessing.py --tesseract-path /usr/bin/tesseract --fixtures screenshots/ --check
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import logging
+import argparse
+import difflib
+
+import _support
+from _support import summarize
+
+from PIL import Image, ImageDraw, ImageFont
+
+from src.utils.ocr_preprocessing import prepare_ocr_image
+from src.utils.ocr_utils import create_ocr_engine, OcrError, _tessdata_path
+
+class Fixture:
+    """OCRの対象の画像と正解のテキスト。settings はこの画像の前処理に上書きする設定 (色キーなど)。"""
+    def __init__(self, name, image, text, settings=None):
+        self.name = name
+        self.image = image
+        self.text = text
+        self.settings = settings or {}
+
+def _draw_lines(draw, origin, lines, font, fill, line_height):
+    for index, line in enumerate(lines):
+        draw.text((origin[0], origin[1] + index * line_height), line, font=font, fill=fill)
+
+def synthetic_fixtures():
+    """合成したフィクスチャのリストを返す。"""
+    rng = random.Random(0)
+    fixtures = []
+
+    lines = ["The imperial courier has arrived.", "Deliver the sealed letter to the captain."]
+    image = Image.linear_gradient("L").resize((1200, 240)).convert("RGB")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((20, 30, 1180, 210), fill=(20, 24, 32), outline=(200, 180, 90))
+    _draw_lines(draw, (50, 60), lines, ImageFont.load_default(size=32), (230, 230, 230), 56)
+    fixtures.append(Fixture("dark_panel", image, "\n".join(lines)))
+
+    lines = ["Quest updated: Find the lost shield", "Reward: 250 Gold"]
+    image = Image.new("RGB", (1000, 200), (236, 226, 198))
+    _draw_lines(ImageDraw.Draw(image), (40, 40), lines, ImageFont.load_default(size=30), (40, 30, 20), 60)
+    fixtures.append(Fixture("light_dialog", image, "\n".join(lines)))
+
+    lines = ["THREAT LEVEL 3", "Shield 75%"]
+    image = Image.new("RGB", (900, 260))
+    draw = ImageDraw.Draw(image)
+    for _ in range(300):
+        left, top = rng.randrange(900), rng.randrange(260)
+        color = tuple(rng.randrange(40, 200) for _ in range(3))
+        draw.rectangle((left, top, left + rng.randint(10, 80), top + rng.randint(10, 80)), fill=color)
+    _draw_lines(draw, (40, 50), lines, ImageFont.load_default(size=48), (255, 215, 0), 90)
+    fixtures.append(Fixture("busy_hud", image, "\n".join(lines),
+                            {"color_keys": [{"color": "#FFD700", "tolerance": 60}]}))
+
+    lines = ["Press E to open the gate"]
+    image = Image.new("RGB", (420, 40), (30, 60, 40))
+    _draw_lines(ImageDraw.Draw(image), (10, 12), lines, ImageFont.load_default(size=14), (250, 250, 250), 20)
+    fixtures.append(Fixture("small_text", image, "\n".join(lines)))
+    return fixtures
+
+def load_fixtures(folder):
+    """folder にある name.png と name.txt の組をフィクスチャとして読み込む。"""
+    fixtures = []
+    for file_name in sorted(os.listdir(folder)):
+        name, extension = os.path.splitext(file_name)
+        text_path = os.path.join(folder, name + ".txt")
+        if extension.lower() not in (".png", ".jpg", ".jpeg", ".webp", ".bmp") or not os.path.exists(text_path):
+            continue
+        with open(text_path, encoding="utf-8") as f:
+            text = f.read().strip()
+        image = Image.open(os.path.join(folder, file_name))
+        image.load()
+        fixtures.append(Fixture(name, image.convert("RGB"), text))
+    return fixtures
+
+class _LastMessage(logging.Handler):
+    """前処理の手順ごとの処理時間のログ (DEBUG) の最後のメッセージを保持する。"""
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.message = ""
+
+    def emit(self, record):
+        self.message = record.getMessage()
+
+def preprocessing_config(fixture):
+    overrides = {"ocr_settings.preprocessing.enabled": True}
+    overrides.update({f"ocr_settings.preprocessing.{key}": value for key, value in fixture.settings.items()})
+    return _support.make_config(overrides)
+
+def similarity(expected, actual):
+    """正解のテキストとOCRの結果の一致率 (空白の違いは無視する)。"""
+    return difflib.SequenceMatcher(None, " ".join(expected.split()), " ".join(actual.split())).ratio()
+
+def create_engine(args):
+    """使用できるOCRエンジンを返す。Tesseract がない場合は None を返す。"""
+    tesseract_path = args.tesseract_path or shutil.which("tesseract")
+    if not tesseract_path:
+        print("Tesseract が見つからないため、OCRの一致率の計測は省略します (--tesseract-path で指定できます)。")
+        return None
+    config_manager = _support.make_config({"ocr_settings.tesseract_path": tesseract_path})
+    try:
+        return create_ocr_engine("auto", tesseract_path, _tessdata_path(config_manager, tesseract_path), args.lang, args.config)
+    except OcrError as e:
+        print(f"OCRエンジンを初期化できないため、OCRの一致率の計測は省略します: {e}")
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=None, help="画像 (name.png) と正解のテキスト (name.txt) を置いたフォルダ")
+    parser.add_argument("--rounds", type=int, default=5, help="処理時間の計測の繰り返し回数")
+    parser.add_argument("--tesseract-path", default=None)
+    parser.add_argument("--lang", default="eng")
+    parser.add_argument("--config", default="--psm 6")
+    parser.add_argument("--check", action="store_true", help="前処理で平均一致率が下がった場合に終了コード 1 を返す")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else synthetic_fixtures()
+    if not fixtures:
+        print(f"{args.fixtures} にフィクスチャ (name.png と name.txt の組) がありません。")
+        return 1
+    preprocessing_logger = logging.getLogger("src.utils.ocr_preprocessing")
+    step_log = _LastMessage()
+    preprocessing_logger.addHandler(step_log)
+    preprocessing_logger.setLevel(logging.DEBUG)
+    preprocessing_logger.propagate = False
+
+    engine = create_engine(args)
+    scores = {"なし": [], "あり": []}
+    for fixture in fixtures:
+        config_manager = preprocessing_config(fixture)
+        timings = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            prepared = prepare_ocr_image(fixture.image, config_manager)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"\n{fixture.name} ({fixture.image.width}x{fixture.image.height}): 前処理 {summarize(timings)}")
+        print(f"  手順ごと: {step_log.message}")
+        if engine is None:
+            continue
+        for label, image in (("なし", fixture.image), ("あり", prepared)):
+            start = time.perf_counter()
+            text = engine.recognize(image).text
+            elapsed = (time.perf_counter() - start) * 1000
+            score = similarity(fixture.text, text)
+            scores[label].append(score)
+            print(f"  前処理{label}: 一致率 {score * 100:.1f}%, OCR {elapsed:.0f} ms, 結果 {text!r}")
+
+    if engine is None:
+        return 0
+    engine.close()
+    without = sum(scores["なし"]) / len(fixtures)
+    with_preprocessing = sum(scores["あり"]) / len(fixtures)
+    print(f"\n平均一致率: 前処理なし {without * 100:.1f}%, 前処理あり {with_preprocessing * 100:.1f}%")
+    if args.check and with_preprocessing < without:
+        print("前処理によってOCRの平均一致率が下がりました。")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+大きな画像を帯に分割して並列にOCRするときの、ワーカー数ごとの処理時間のベンチマーク (4K の合成画像)。
+
+Tesseract がなくても実行できるよう、画素数に比例する時間だけ待つ疑似エンジンを使う
+(待機中は実際の tesserocr / tesseract プロセスと同じくGILを解放する)。
+帯ごとのエンジンの初期化は計測前に済ませ、分割・並列実行・結果の結合を含めた経過時間を計測する。
+
+    python benchmarks/bench_ocr_tiling.py --width 3840 --height 2160 --workers 1 2 4 8 --rounds 3
+"""
+import os
+import sys
+import time
+import argparse
+
+import _support
+from _support import summarize, synthetic_screen
+from bench_ocr_engine import FakeWarmEngine, BenchEngineWorker
+
+from src.utils.ocr_utils import OcrTileSettings, DEFAULT_TILING_WORKERS
+from src.config.config_manager import ConfigManager
+
+def measure(image, workers, seconds_per_megapixel, rounds):
+    """ワーカー数 workers で image のOCRを rounds 回実行し、経過時間 (ms) のリストと帯の数を返す。"""
+    defaults = ConfigManager.DEFAULT_SETTINGS["ocr_settings"]
+    worker = BenchEngineWorker(lambda: FakeWarmEngine(0, seconds_per_megapixel))
+    worker.tile_settings = OcrTileSettings(
+        defaults["tiling_min_pixels"], workers, defaults["tiling_overlap"], defaults["tiling_min_height"]
+    )
+    try:
+        worker.recognize(image) # 帯ごとのエンジンを初期化する
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            worker.recognize(image)
+            timings.append((time.perf_counter() - start) * 1000)
+        tiles = len(worker._plan_tiles(image))
+    finally:
+        worker.close()
+    return timings, tiles
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--ocr-ms-per-mp", type=float, default=150, help="疑似エンジンの100万画素あたりの認識時間 (ms)")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    image = synthetic_screen(args.width, args.height)
+    cpu_count = os.cpu_count() or 1
+    print(f"{args.width}x{args.height} の合成画像, 疑似エンジン {args.ocr_ms_per_mp:.0f} ms / 100万画素, CPU {cpu_count} コア "
+          f"(tiling_workers: 0 の場合 {min(DEFAULT_TILING_WORKERS, cpu_count)} ワーカー)")
+    baseline = None
+    for workers in args.workers:
+        timings, tiles = measure(image, workers, args.ocr_ms_per_mp / 1000, args.rounds)
+        best = min(timings)
+        baseline = baseline or best
+        print(f"ワーカー {workers} ({tiles} 帯): {summarize(timings)}, 1ワーカーに対して {baseline / best:.1f} 倍")
+    print(f"注: 疑似エンジンは待機するだけのため、実際のOCRではコア数 ({cpu_count}) を超えるワーカーを使っても速くならない。")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
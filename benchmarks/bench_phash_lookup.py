@@ -0,0 +1,73 @@
+"""
+知覚ハッシュの近似一致検索 (PerceptualHashIndex) のベンチマーク。
+ランダムな64ビットのハッシュを登録したインデックスに対して、登録済みのハッシュから数ビット変えたもの (ヒット) と
+無関係なハッシュ (ミス) を検索し、1回あたりの検索時間を表示する。
+
+    python benchmarks/bench_phash_lookup.py --entries 100000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.image_hash import PerceptualHashIndex, HASH_BITS
+
+def flip_bits(value, count, rng):
+    for bit in rng.sample(range(HASH_BITS), count):
+        value ^= 1 << bit
+    return value
+
+def measure(index, queries):
+    """各クエリの検索時間 (ms) のリストと、ヒット数を返す。"""
+    timings = []
+    hits = 0
+    for query in queries:
+        start = time.perf_counter()
+        match = index.find_nearest(query)
+        timings.append((time.perf_counter() - start) * 1000)
+        if match is not None:
+            hits += 1
+    return timings, hits
+
+def report(label, timings, hits):
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"{label}: {len(timings)} 回, ヒット {hits}, 平均 {statistics.mean(timings):.4f} ms, "
+          f"中央値 {statistics.median(timings):.4f} ms, p99 {p99:.4f} ms, 最大 {timings[-1]:.4f} ms")
+    return p99
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100000, help="インデックスに登録するハッシュの数")
+    parser.add_argument("--queries", type=int, default=10000, help="ヒット・ミスそれぞれの検索回数")
+    parser.add_argument("--max-distance", type=int, default=4, help="近似一致とみなすハミング距離")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    hashes = [rng.getrandbits(HASH_BITS) for _ in range(args.entries)]
+
+    index = PerceptualHashIndex(max_distance=args.max_distance)
+    start = time.perf_counter()
+    for number, value in enumerate(hashes):
+        index.add(value, number)
+    print(f"インデックスの構築: {len(index)} 件, {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    near_queries = [
+        flip_bits(rng.choice(hashes), rng.randint(0, args.max_distance), rng) for _ in range(args.queries)
+    ]
+    miss_queries = [rng.getrandbits(HASH_BITS) for _ in range(args.queries)]
+
+    worst_p99 = max(
+        report("近似ヒット", *measure(index, near_queries)),
+        report("ミス", *measure(index, miss_queries)),
+    )
+    print(f"p99 が 1 ms 未満: {'はい' if worst_p99 < 1.0 else 'いいえ'}")
+    return 0 if worst_p99 < 1.0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+範囲選択のオーバーレイのマウス移動ごとの描画時間のベンチマーク (オフスクリーンのQt)。
+
+従来の描画 (マウス移動のたびに repaint() でウィンドウ全体を同期的に再描画し、選択範囲を半透明で塗りつぶす) と、
+現在の描画 (前回と今回の選択範囲を合わせた範囲だけを update() で再描画する) を、固定表示あり / なしで比較する。
+マウス移動のイベントを1回送るごとにイベントループを回し、移動1回あたりの処理時間 (描画を含む) と描画した面積を計測する。
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_selection_paint.py --width 3840 --height 2160 --moves 200
+"""
+import os
+import sys
+import time
+import argparse
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# X サーバーのない環境でも selection_window (ホットキーの pynput を読み込む) をインポートできるようにする
+os.environ.setdefault("PYNPUT_BACKEND", "dummy")
+
+import _support
+from _support import StubModel, summarize
+from bench_freeze_overlay import SyntheticBackend
+
+from PyQt5.QtCore import Qt, QRect, QPoint, QEvent, qInstallMessageHandler
+from PyQt5.QtGui import QPainter, QPen, QColor, QMouseEvent
+from PyQt5.QtWidgets import QApplication
+
+from src.threads.gemini_service import GeminiService
+from src.windows import selection_window as selection_window_module
+from src.windows.selection_window import SelectionWindow
+
+class MeasuredSelectionWindow(SelectionWindow):
+    """描画の回数・時間・面積を記録する SelectionWindow。"""
+    paints = 0
+    paint_seconds = 0.0
+    painted_pixels = 0
+
+    def reset_measurement(self):
+        self.paints = 0
+        self.paint_seconds = 0.0
+        self.painted_pixels = 0
+
+    def paintEvent(self, event):
+        started = time.perf_counter()
+        self.paint_selection(event)
+        self.paints += 1
+        self.paint_seconds += time.perf_counter() - started
+        self.painted_pixels += event.rect().width() * event.rect().height()
+
+    def paint_selection(self, event):
+        super().paintEvent(event)
+
+class LegacySelectionWindow(MeasuredSelectionWindow):
+    """従来の描画: マウス移動のたびにウィンドウ全体を repaint() し、選択範囲を半透明で塗りつぶす。"""
+    def mouseMoveEvent(self, event):
+        if self.selecting:
+            self.end_point = event.pos()
+            self.repaint()
+
+    def paint_selection(self, event):
+        painter = QPainter(self)
+        if self.selecting and self.start_point and self.end_point:
+            painter.setPen(QPen(QColor(255, 0, 0), 2))
+            painter.setBrush(QColor(255, 255, 255, 50))
+            painter.drawRect(QRect(self.start_point, self.end_point).normalized())
+        painter.end()
+
+def show_window(window_class, config_manager, service, geometry):
+    """begin_selection と同じ手順で、geometry の大きさのオーバーレイを表示する (オフスクリーンの画面の大きさに関係なく)。"""
+    window = window_class(config_manager=config_manager, gemini_service=service)
+    window.setGeometry(geometry)
+    frozen = config_manager.get("behavior.freeze_screen", True) and window._freeze_screen(False)
+    window.setWindowOpacity(1.0 if frozen else 0.2)
+    window.setAttribute(Qt.WA_OpaquePaintEvent, frozen)
+    window.show()
+    return window
+
+def mouse_event(event_type, point):
+    buttons = Qt.LeftButton if event_type != QEvent.MouseButtonRelease else Qt.NoButton
+    return QMouseEvent(event_type, QPoint(point[0], point[1]), Qt.LeftButton, buttons, Qt.NoModifier)
+
+def drag(application, window, moves):
+    """左上から右下へのドラッグを moves 回のマウス移動で行い、移動1回あたりの処理時間 (ms) のリストを返す。"""
+    start = (window.width() // 10, window.height() // 10)
+    end = (window.width() * 6 // 10, window.height() * 6 // 10)
+    window.mousePressEvent(mouse_event(QEvent.MouseButtonPress, start))
+    application.processEvents()
+    window.reset_measurement()
+    timings = []
+    for step in range(1, moves + 1):
+        point = (start[0] + (end[0] - start[0]) * step // moves, start[1] + (end[1] - start[1]) * step // moves)
+        started = time.perf_counter()
+        window.mouseMoveEvent(mouse_event(QEvent.MouseMove, point))
+        application.processEvents()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--moves", type=int, default=200)
+    args = parser.parse_args()
+
+    # オフスクリーンのプラグインが出す警告は表示しない
+    qInstallMessageHandler(lambda message_type, context, message: None)
+    application = QApplication.instance() or QApplication(sys.argv)
+    backend = SyntheticBackend(args.width, args.height, 0)
+    selection_window_module.get_capture_backend = lambda config_manager: backend
+    selection_window_module.logical_to_physical = lambda x, y, width, height: (x, y, width, height)
+    geometry = QRect(0, 0, args.width, args.height)
+    print(f"オーバーレイ {args.width}x{args.height}, マウス移動 {args.moves} 回のドラッグ")
+
+    cases = (
+        ("従来 (repaint でウィンドウ全体)", LegacySelectionWindow, False),
+        ("現在 (update で変化した範囲のみ)", MeasuredSelectionWindow, False),
+        ("現在 + 固定表示", MeasuredSelectionWindow, True),
+    )
+    baseline = None
+    for label, window_class, freeze in cases:
+        config_manager = _support.make_config({"behavior.freeze_screen": freeze})
+        service = GeminiService(config_manager, model_factory=lambda model_name: StubModel())
+        window = show_window(window_class, config_manager, service, geometry)
+        application.processEvents()
+        timings = drag(application, window, args.moves)
+        paints = max(1, window.paints)
+        per_paint_ms = window.paint_seconds / paints * 1000
+        average_pixels = window.painted_pixels / paints
+        window.hide()
+        window.deleteLater()
+        service.shutdown()
+        application.processEvents()
+        total = sum(timings)
+        baseline = baseline or total
+        print(
+            f"\n{label}:\n  マウス移動1回: {summarize(timings)}, 合計 {total:.0f} ms ({baseline / total:.1f} 倍)\n"
+            f"  描画 {window.paints} 回, 1回 {per_paint_ms:.2f} ms, 1回の面積 {average_pixels / 1e6:.2f} 百万画素 "
+            f"(ウィンドウの {average_pixels / (args.width * args.height) * 100:.1f}%)"
+        )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
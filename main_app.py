@@ -7,11 +7,19 @@ from PyQt5.QtCore import QTimer, Qt
 from PyQt5.QtGui import QIcon
 import logging
 import json
+import time
 
 # 分割したモジュールをインポート
 from src.config.config_manager import ConfigManager
 from src.utils.helper_functions import hotkey_signal, set_global_hotkey, get_key_name_from_vk_code
 from src.utils.logger_config import configure_logging
+from src.utils.translation_cache import TranslationCache
+from src.utils.history_store import get_history_store
+from src.utils.translation_memory import TranslationMemory
+from src.utils.glossary import Glossary, GlossaryError
+from src.utils.ocr_utils import shutdown_ocr_engine
+from src.utils.capture_backends import CaptureError, get_capture_backend, shutdown_capture_backend
+from src.threads.gemini_service import GeminiService
 
 from src.windows.selection_window import SelectionWindow
 from src.windows.result_window import ResultWindow
@@ -30,7 +38,9 @@ else:
     APP_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 SETTINGS_FILE = os.path.join(APP_BASE_DIR, "setting.yaml")
-HISTORY_FILE = os.path.join(APP_BASE_DIR, "translation_history.json")
+HISTORY_FILE = os.path.join(APP_BASE_DIR, "translation_history.db")
+LEGACY_HISTORY_FILE = os.path.join(APP_BASE_DIR, "translation_history.json") # 旧形式 (初回起動時に移行)
+CACHE_FILE = os.path.join(APP_BASE_DIR, "translation_cache.db")
 OUTPUT_FOLDER = os.path.join(APP_BASE_DIR, "screenshots")
 
 APP_ICON_PATH = os.path.join(APP_BASE_DIR, "app_icon.ico")
@@ -49,14 +59,12 @@ if not os.path.exists(SETTINGS_FILE) or \
     config_manager.save_settings()
     config_manager.reload()
 
-# translation_history.json が存在しない場合、空のファイルとして生成
-if not os.path.exists(HISTORY_FILE):
-    try:
-        with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump([], f, ensure_ascii=False, indent=4)
-        logger.info(f"translation_history.json が存在しないため、空のファイルを生成しました: {HISTORY_FILE}")
-    except Exception as e:
-        logger.exception(f"translation_history.json の生成中にエラーが発生しました: {HISTORY_FILE}")
+# 翻訳履歴データベースを開く (存在しない場合は生成し、旧形式の translation_history.json があれば移行する)
+try:
+    get_history_store(HISTORY_FILE, legacy_json_path=LEGACY_HISTORY_FILE)
+    logger.info(f"翻訳履歴データベースを開きました: {HISTORY_FILE}")
+except Exception as e:
+    logger.exception(f"翻訳履歴データベースの初期化中にエラーが発生しました: {HISTORY_FILE}")
 
 
 # ホットキーの仮想キーコードをConfigManagerから取得
@@ -78,14 +86,15 @@ result_window = None
 history_window = None
 settings_window = None
 tray_icon = None
+translation_cache = None
+gemini_service = None
+watch_action = None
 
 def on_hotkey_pressed():
     """グローバルホットキーが押されたときに呼び出されるスロット。"""
     if not selection_window.isVisible():
         logger.debug("ホットキー検出！範囲選択を開始します。")
-        selection_window.showFullScreen()
-        selection_window.raise_()
-        selection_window.activateWindow()
+        selection_window.begin_selection(started_at=time.perf_counter())
 
 def show_settings_dialog():
     """設定ウィンドウをモーダル表示するヘルパー関数。"""
@@ -121,11 +130,30 @@ def hide_result_window_to_tray():
     else:
         logger.warning("result_window が初期化されていないため、非表示にできません。")
 
+def toggle_watch_mode():
+    """範囲の監視を開始する (監視中の場合は終了する)。"""
+    if selection_window.is_watching():
+        selection_window.stop_watch()
+    else:
+        logger.debug("監視する範囲の選択を開始します。")
+        selection_window.start_watch_selection()
+    if watch_action:
+        watch_action.setText("範囲の監視を終了" if selection_window.is_watching() else "範囲を監視...")
+
 def quit_application():
     """アプリケーションを完全に終了する。"""
     logger.info("アプリケーションを終了します。")
     if tray_icon:
         tray_icon.hide()
+    if selection_window:
+        selection_window.stop_watch()
+    if gemini_service:
+        gemini_service.shutdown()
+    if translation_cache:
+        logger.info(f"翻訳キャッシュ統計: {translation_cache.stats()}")
+        translation_cache.close()
+    shutdown_ocr_engine()
+    shutdown_capture_backend()
     QApplication.quit()
 
 if __name__ == "__main__":
@@ -162,10 +190,64 @@ if __name__ == "__main__":
     settings_window.hide()
     logger.info("SettingsWindowインスタンスを作成し、非表示にしました。")
 
+    if config_manager.get("cache_settings.enabled", True):
+        try:
+            translation_cache = TranslationCache(
+                CACHE_FILE,
+                max_entries=config_manager.get("cache_settings.max_entries", 5000),
+                max_bytes=int(config_manager.get("cache_settings.max_size_mb", 50) * 1024 * 1024),
+                near_duplicate_threshold=config_manager.get("cache_settings.near_duplicate_threshold", None)
+            )
+            logger.info(f"翻訳キャッシュを有効化しました: {CACHE_FILE}")
+        except Exception as e:
+            logger.exception("翻訳キャッシュの初期化中にエラーが発生しました。キャッシュなしで続行します。")
+            translation_cache = None
+
+    translation_memory = None
+    if config_manager.get("translation_memory_settings.enabled", True):
+        try:
+            # 翻訳メモリは翻訳履歴と同じデータベースに保存する
+            translation_memory = TranslationMemory(
+                get_history_store(HISTORY_FILE),
+                fuzzy_direct_similarity=config_manager.get("translation_memory_settings.fuzzy_direct_similarity", 0.9),
+                fuzzy_hint_similarity=config_manager.get("translation_memory_settings.fuzzy_hint_similarity", 0.6),
+                fuzzy_top_k=config_manager.get("translation_memory_settings.fuzzy_top_k", 3)
+            )
+            logger.info("翻訳メモリを有効化しました。")
+        except Exception as e:
+            logger.exception("翻訳メモリの初期化中にエラーが発生しました。翻訳メモリなしで続行します。")
+
+    glossary = None
+    if config_manager.get("glossary_settings.enabled", True):
+        glossary_path = config_manager.get("glossary_settings.path", "glossary.tsv")
+        if not os.path.isabs(glossary_path):
+            glossary_path = os.path.join(APP_BASE_DIR, glossary_path)
+        if os.path.exists(glossary_path):
+            try:
+                glossary = Glossary.load(glossary_path)
+                logger.info(f"用語集を読み込みました: {glossary_path} ({len(glossary)} 件)")
+            except GlossaryError as e:
+                logger.error(f"{e} 用語集なしで続行します。")
+        else:
+            logger.info(f"用語集ファイルが見つからないため、用語集は使用しません: {glossary_path}")
+
+    gemini_service = GeminiService(
+        config_manager, translation_cache=translation_cache, translation_memory=translation_memory,
+        glossary=glossary
+    )
+    logger.info("GeminiServiceインスタンスを作成しました。")
+
+    try:
+        # 起動時に使用できるキャプチャバックエンドを計測し、最初の範囲選択の前に選んでおく
+        get_capture_backend(config_manager)
+    except CaptureError as e:
+        logger.error(f"{e}")
+
     selection_window = SelectionWindow(
         config_manager=config_manager,
         history_file_path=HISTORY_FILE,
-        result_window=result_window
+        result_window=result_window,
+        gemini_service=gemini_service
     )
     selection_window.hide()
     logger.info("SelectionWindowインスタンスを作成し、非表示にしました。")
@@ -188,6 +270,16 @@ if __name__ == "__main__":
 
         tray_menu.addSeparator()
 
+        watch_action = QAction("範囲を監視...", app)
+        watch_action.triggered.connect(toggle_watch_mode)
+        tray_menu.addAction(watch_action)
+        # Ctrl+ドラッグで監視を開始した場合もメニューの表示を合わせる
+        tray_menu.aboutToShow.connect(
+            lambda: watch_action.setText("範囲の監視を終了" if selection_window.is_watching() else "範囲を監視...")
+        )
+
+        tray_menu.addSeparator()
+
         quit_action = QAction("終了", app)
         quit_action.triggered.connect(quit_application)
         tray_menu.addAction(quit_action)
@@ -46,6 +46,11 @@ class ConfigManager:
         "gemini_settings": {
             "mode": "translation", # 新しいモード設定: "translation" または "explanation"
             "model_name": "gemini-1.5-flash-latest",
+            "stream": True, # 応答をストリーミングで受信し、届いた部分から表示する
+            "max_concurrent_requests": 4, # 同時に実行するAPIリクエストの最大数
+            "max_queued_requests": 16, # 実行中・待機中を合わせたリクエストの上限
+            "request_timeout_seconds": 60, # 1リクエストの応答を待つ最大秒数 (0で無制限)
+            "cancel_superseded": True, # 新しいキャプチャを送信したとき、処理中の古いリクエストを打ち切る
             "translation_prompt": """この画像は英語で表示されたゲーム画面です。含まれる全ての英語テキストを日本語に翻訳してください。ただし、ゲーム内の固有名詞（船、アイテム、勢力、地名、キャラクター名など）は翻訳せずに、元の英語をカタカナ表記にしてください。一般的な英単語でも、文脈からゲーム用語である可能性が高い場合は、無理に翻訳せずカタカナ表記にすることを優先してください。翻訳する際は、不自然な直訳にならないよう、文脈を考慮した自然な日本語への意訳を許可します。特に、ゲームのUIやメッセージとして表示されるテキストが、より自然で理解しやすい日本語になるように調整してください。
 
 例：
@@ -73,12 +78,92 @@ class ConfigManager:
 """
         },
         "behavior": {
-            "show_api_confirmation": True
+            "show_api_confirmation": True,
+            "freeze_screen": True # ホットキーを押した時点の画面を固定表示し、その画像から選択範囲を切り出す
         },
         "ocr_settings": {
             "tesseract_path": None,
             "lang": "eng+jpn",
-            "config": "--psm 3"
+            "config": "--psm 3",
+            "engine": "auto", # "auto" (tesserocr を優先), "tesserocr" または "pytesseract"
+            "tessdata_path": None, # tesserocr が使用する tessdata フォルダ (null で tesseract_path と同じフォルダの tessdata)
+            "tiling_enabled": True, # 大きな画像を横長の帯に分割し、複数のコアで並列にOCRする
+            "tiling_min_pixels": 2000000, # この画素数以上の画像を分割する
+            "tiling_workers": 0, # 同時にOCRする帯の数 (0 でCPUのコア数。ただし最大 4。帯ごとにOCRエンジンを1つずつ持つ)
+            "tiling_overlap": 48, # 空白行で区切れない場合に帯を重ねる幅 (px)
+            "tiling_min_height": 200, # 帯の最小の高さ (px)
+            "preprocessing": {
+                "enabled": False, # OCRの前に画像を加工する (試験的: OCR精度は benchmarks/bench_ocr_preprocessing.py --check で確認できる。明暗の反転・二値化などはNumPyが必要)
+                "grayscale": True, # グレースケールに変換する
+                "invert": "auto", # 明暗を反転する: "auto" (暗い画面のみ), true, false
+                "upscale_below_height": 400, # 高さがこれ未満の画像を拡大する (0 で無効)
+                "upscale_factor": 2.0, # 拡大率
+                "adaptive_threshold": True, # 周囲の平均輝度を基準に二値化する
+                "threshold_block_size": 31, # 二値化で平均を求める範囲 (px)
+                "threshold_offset": 10, # 平均よりこの値以上暗い画素を文字とみなす
+                "color_keys": [] # HUDの文字色 (例: [{"color": "#FFD700", "tolerance": 60}])。指定した色に近い画素だけを文字とする
+            }
+        },
+        "upload_settings": {
+            "format": "png", # API送信時の画像形式: "png", "webp", "jpeg"
+            "quality": 90, # webp / jpeg の品質 (1-100)
+            "max_long_edge": 0, # 長辺がこれを超える場合に縮小する (0 で無効)
+            "grayscale": False, # グレースケールに変換する
+            "normalize_contrast": False, # コントラストを正規化する
+            "crop_margins": False, # 内容のない余白を切り落とす
+            "margin_padding": 8, # 切り落とし後に残す余白 (px)
+            "measure_savings": False # 加工なしのPNGと比べた削減量をログに出す (比較用に画像をもう一度エンコードするため計測時のみ)
+        },
+        "cache_settings": {
+            "enabled": True,
+            "max_entries": 5000, # キャッシュに保持する最大エントリ数
+            "max_size_mb": 50, # キャッシュの最大サイズ (MB)
+            "near_duplicate_threshold": None # 類似画像とみなす知覚ハッシュのハミング距離 (null で無効。OCRテキストが一致する場合のみ使用するため、OCRが必要)
+        },
+        "rate_limit_settings": {
+            "requests_per_minute": 0, # 1分あたりのリクエスト数の上限 (0 でモデルの既定値)
+            "tokens_per_minute": 0, # 1分あたりのトークン数の上限 (0 でモデルの既定値)
+            "max_retries": 4, # 一時的なエラー (429, 503 など) の再試行回数
+            "backoff_base_seconds": 1.0, # 再試行の待ち時間の基準値 (試行ごとに2倍)
+            "backoff_max_seconds": 30.0 # 再試行の待ち時間の上限
+        },
+        "batch_settings": {
+            "enabled": False, # 短い間隔で送信したキャプチャを1回のリクエストにまとめる
+            "window_ms": 1500, # 最初のキャプチャから、まとめて送信するまでの待ち時間 (ミリ秒)
+            "max_batch_size": 4 # 1回のリクエストにまとめる最大枚数
+        },
+        "routing_settings": {
+            "enabled": True, # OCRの信頼度に応じて、画像を送るかどうかを切り替える
+            "text_only_min_confidence": 90, # この信頼度以上であれば画像を送らずOCRテキストのみで翻訳する
+            "text_only_min_length": 4, # テキストのみで送信するために必要なOCRテキストの最小文字数
+            "text_only_modes": ["translation"], # テキストのみの送信を許可するモード
+            "image_and_text_min_confidence": 50 # この信頼度未満のOCRテキストは送らず画像のみで翻訳する
+        },
+        "translation_memory_settings": {
+            "enabled": True, # OCRテキストの行ごとの訳文を蓄積し、登録済みの行はAPIを呼ばずに翻訳する
+            "fuzzy_direct_similarity": 0.9, # 登録済みの行との類似度がこれ以上であれば、その訳文をそのまま使う (null で無効)
+            "fuzzy_hint_similarity": 0.6, # 登録済みの行との類似度がこれ以上であれば、参考訳としてプロンプトに含める (null で無効)
+            "fuzzy_top_k": 3, # 1行あたりに検索する類似行の数
+            "max_hints": 10 # プロンプトに含める参考訳の最大数
+        },
+        "glossary_settings": {
+            "enabled": True, # OCRテキストに含まれる用語集の用語と訳語をプロンプトに含める
+            "path": "glossary.tsv", # 用語集ファイル (相対パスはアプリのフォルダ基準。.tsv: 原文<TAB>訳語<TAB>備考, .yaml: 原文: 訳語)
+            "max_terms": 50 # 1リクエストに含める用語の最大数
+        },
+        "watch_settings": {
+            "interval_ms": 500, # 監視範囲を取得する間隔 (ミリ秒)
+            "block_size": 6, # 変化の検出で平均輝度を比較するブロックの大きさ (px)
+            "pixel_threshold": 10, # ブロックの平均輝度の差がこれを超えたら変化したとみなす
+            "min_changed_blocks": 2, # 変化したブロックがこの数以上であれば内容が変わったとみなす
+            "settle_frames": 1, # 変化の後、この回数続けて変化がなければ翻訳する (文字送り表示の途中を翻訳しないため)
+            "save_screenshots": False # 監視モードのキャプチャをファイルに保存する
+        },
+        "capture_settings": {
+            "backend": "auto", # "auto" (起動時に計測して最も速いものを選ぶ), "mss", "qt" または "pil"
+            "benchmark_width": 1280, # 起動時の計測で取得する範囲の大きさ (px)
+            "benchmark_height": 720,
+            "benchmark_rounds": 5 # 起動時の計測で各バックエンドを取得する回数
         }
     }
 
@@ -0,0 +1,51 @@
+import asyncio
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AsyncLoopThread:
+    """
+    asyncio のイベントループを専用スレッドで常駐させるクラス。
+    ループはアプリケーションの終了まで使い回すため、ループに結び付いた非同期クライアントの接続も再利用される。
+    GUIスレッドからはコルーチンを submit() で投入し、結果は Qt のシグナルで受け取る。
+    """
+    def __init__(self, name="AsyncLoopThread"):
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    @property
+    def loop(self):
+        return self._loop
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(self._started.set)
+        try:
+            self._loop.run_forever()
+        finally:
+            # 停止時に残っているタスクをキャンセルし、終了を待ってからループを閉じる
+            pending = [task for task in asyncio.all_tasks(self._loop) if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+            logger.debug("AsyncLoopThread: イベントループを終了しました。")
+
+    def submit(self, coro):
+        """コルーチンをループに投入し、concurrent.futures.Future を返す。Future をキャンセルするとタスクもキャンセルされる。"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def stop(self, timeout=5.0):
+        """ループを停止し、スレッドの終了を待つ。"""
+        if not self._thread.is_alive():
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"AsyncLoopThread: {timeout} 秒以内にイベントループが終了しませんでした。")
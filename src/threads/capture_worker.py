@@ -0,0 +1,109 @@
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+import os
+import time
+import logging
+
+from src.config.config_manager import ConfigManager
+from src.utils.image_hash import compute_dhash
+from src.utils.image_preparation import prepare_upload_image
+from src.utils.ocr_utils import perform_ocr_with_confidence, OcrError
+from src.utils.ocr_preprocessing import prepare_ocr_image
+
+logger = logging.getLogger(__name__)
+
+class CaptureResult:
+    """キャプチャパイプライン (エンコード・保存・OCR) の処理結果。"""
+    def __init__(self, capture_id, image_data, mime_type, image_hash, ocr_text, file_path, captured_at, ocr_confidence=None):
+        self.capture_id = capture_id
+        self.image_data = image_data # API送信用にエンコード済みの画像バイト列
+        self.mime_type = mime_type # image_data のMIMEタイプ
+        self.image_hash = image_hash # 知覚ハッシュ (dHash)
+        self.ocr_text = ocr_text # OCRで抽出されたテキスト (OCR無効・失敗時は空文字列)
+        self.ocr_confidence = ocr_confidence # OCRの平均信頼度 (0-100, OCR無効・失敗時は None)
+        self.file_path = file_path # ディスクに保存したファイルのパス (保存失敗時は None)
+        self.captured_at = captured_at # キャプチャした時刻 (time.perf_counter の値)
+
+class CaptureWorkerSignals(QObject):
+    """CaptureWorker からGUIスレッドへ結果を通知するシグナル。"""
+    finished = pyqtSignal(object) # CaptureResult
+    error = pyqtSignal(int, str) # capture_id, error_message
+    ocr_error = pyqtSignal(int, str) # capture_id, error_message (OCRなしで処理は続行される)
+
+class CaptureWorker(QRunnable):
+    """
+    キャプチャしたフレーム (CaptureFrame) を受け取り、送信用画像の加工・エンコード、ディスク保存、OCRを
+    スレッドプール上で実行するワーカー。GUIスレッドはフレームを渡すだけでよい。
+    BGRAバッファからの変換は1回だけ行い、OCRには変換後の画像を直接渡す。
+    """
+    def __init__(self, capture_id, frame, config_manager: ConfigManager, captured_at=None, save_to_disk=True,
+                 parallel_ocr=False):
+        super().__init__()
+        self.capture_id = capture_id
+        self.frame = frame
+        self.config_manager = config_manager
+        self.captured_at = captured_at if captured_at is not None else time.perf_counter()
+        self.save_to_disk = save_to_disk # False の場合はスクリーンショットをファイルに保存しない
+        self.parallel_ocr = parallel_ocr # True の場合は他のキャプチャのOCRと並行してOCRする (複数範囲の同時キャプチャ)
+        self.signals = CaptureWorkerSignals()
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            img_pil = self.frame.to_image()
+            frame_bytes = self.frame.nbytes
+            # OCR用の前処理はキャプチャのBGRAバッファを直接読み取る
+            ocr_image = prepare_ocr_image(img_pil, self.config_manager, bgra=self.frame.as_array())
+            self.frame = None # 以降は不要なため、mssのバッファへの参照を手放す
+            converted_at = time.perf_counter()
+
+            # エンコードは upload_settings の形式で1回だけ行い、同じバイト列をディスク保存とAPI送信の両方に使う
+            prepared = prepare_upload_image(img_pil, self.config_manager)
+            encoded_at = time.perf_counter()
+
+            file_path = self._save_to_disk(prepared.data, prepared.extension) if self.save_to_disk else None
+            # 知覚ハッシュには加工前の画像を使う
+            image_hash = compute_dhash(img_pil)
+            logger.debug(f"CaptureWorker: スクリーンショットの知覚ハッシュ: {image_hash:016x}")
+
+            ocr_text = ""
+            ocr_confidence = None
+            try:
+                ocr_result = perform_ocr_with_confidence(ocr_image, self.config_manager, parallel=self.parallel_ocr)
+                ocr_text, ocr_confidence = ocr_result.text, ocr_result.confidence
+            except OcrError as e:
+                self.signals.ocr_error.emit(self.capture_id, str(e))
+            logger.debug(f"OCR抽出結果: {ocr_text[:100]}..." if ocr_text else "OCRでテキストが抽出できませんでした。")
+
+            finished_at = time.perf_counter()
+            logger.debug(
+                f"CaptureWorker: キャプチャ {self.capture_id} ({img_pil.width}x{img_pil.height}, {frame_bytes} bytes) の処理完了 "
+                f"(変換 {(converted_at - start) * 1000:.1f} ms, エンコード {(encoded_at - converted_at) * 1000:.1f} ms, "
+                f"保存・OCR {(finished_at - encoded_at) * 1000:.1f} ms)"
+            )
+            self.signals.finished.emit(
+                CaptureResult(
+                    self.capture_id, prepared.data, prepared.mime_type, image_hash, ocr_text, file_path, self.captured_at,
+                    ocr_confidence=ocr_confidence
+                )
+            )
+        except Exception as e:
+            logger.exception(f"CaptureWorker: キャプチャ {self.capture_id} の処理中にエラーが発生しました。")
+            self.signals.error.emit(self.capture_id, f"スクリーンショットの処理中にエラーが発生しました。\n{e}")
+
+    def _save_to_disk(self, image_data, extension):
+        """エンコード済みの画像をOUTPUT_FOLDERに保存し、保存先のパスを返す。失敗した場合は None を返す。"""
+        output_folder = self.config_manager.get("OUTPUT_FOLDER", "screenshots")
+        try:
+            if not os.path.exists(output_folder):
+                os.makedirs(output_folder, exist_ok=True)
+                logger.debug(f"フォルダ '{output_folder}' を作成しました。")
+
+            timestamp = time.strftime("%Y%m%d-%H%M%S")
+            filepath = os.path.join(output_folder, f"screenshot_{timestamp}_{self.capture_id}.{extension}")
+            with open(filepath, 'wb') as f:
+                f.write(image_data)
+            logger.debug(f"スクリーンショットをファイルに保存しました: {filepath}")
+            return filepath
+        except Exception as e:
+            logger.exception(f"スクリーンショットのファイル保存中にエラーが発生しました。")
+            return None
@@ -0,0 +1,208 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+import google.generativeai as genai
+import threading
+import time
+import logging
+
+from src.config.config_manager import ConfigManager
+from src.threads.async_loop_thread import AsyncLoopThread
+from src.threads.gemini_worker import GeminiWorker, GeminiBatchWorker
+from src.threads.request_scheduler import RequestScheduler, PRIORITY_INTERACTIVE
+from src.utils.request_routing import RouteStatistics
+
+logger = logging.getLogger(__name__)
+
+class GeminiService(QObject):
+    """
+    アプリケーション全体で共有する、Gemini APIの常駐ワーカーサービス。
+    専用スレッドで常駐する asyncio のイベントループ上でジョブを実行する。
+    APIの呼び出しは RequestScheduler が優先度・同時実行数・レート制限に従って順番に許可し、待機ジョブ数にも上限を設ける。
+    モデルのクライアントはモデル名ごとに使い回すため、同じループ上で接続が再利用される。
+    ジョブには一意のIDを割り当て、結果のシグナルにIDを付けて呼び出し元へ返す。ジョブは cancel() で途中終了できる。
+    batch_settings.enabled が有効な場合、短い間隔で投入された同じモードのジョブを1回のリクエストにまとめる。
+    """
+    finished = pyqtSignal(int, str, str, str) # job_id, original_text, translation, explanation
+    partial = pyqtSignal(int, str, str) # job_id, translation, explanation
+    error = pyqtSignal(int, str) # job_id, error_message
+    cancelled = pyqtSignal(int) # job_id
+
+    def __init__(self, config_manager: ConfigManager, translation_cache=None, model_factory=None, parent=None,
+                 translation_memory=None, glossary=None):
+        super().__init__(parent)
+        self.config_manager = config_manager
+        self.translation_cache = translation_cache
+        self.translation_memory = translation_memory # TranslationMemory (無効時は None)
+        self.glossary = glossary # Glossary (無効時は None)
+        # モデル名を受け取ってモデルを生成する関数。テスト時はスタブモデルを返す関数に差し替えられる
+        self.model_factory = model_factory if model_factory is not None else genai.GenerativeModel
+        self.max_queued_jobs = config_manager.get("gemini_settings.max_queued_requests", 16)
+
+        self.max_concurrent_jobs = max(1, config_manager.get("gemini_settings.max_concurrent_requests", 4))
+
+        self._loop_thread = AsyncLoopThread(name="GeminiServiceLoop")
+        self.scheduler = RequestScheduler(config_manager, max_concurrent=self.max_concurrent_jobs)
+        self.route_stats = RouteStatistics()
+        self._models = {}
+        self._models_lock = threading.Lock()
+        self._job_counter = 0
+        self._jobs = {} # job_id -> 投入時刻 (未完了のジョブ)
+        self._futures = {} # job_id -> concurrent.futures.Future (ループ上のタスク。バッチ内のジョブは同じ Future を共有する)
+        self._batch = [] # まとめて送信するために待機中の GeminiWorker
+        self._batch_timer = QTimer(self)
+        self._batch_timer.setSingleShot(True)
+        self._batch_timer.timeout.connect(self.flush_batch)
+        self._completed_jobs = 0
+        self._cancelled_jobs = 0
+        self._total_latency = 0.0
+        logger.debug(f"GeminiService: 初期化しました (同時実行数 {self.max_concurrent_jobs}, キュー上限 {self.max_queued_jobs})。")
+
+    def get_model(self, model_name):
+        """モデル名に対応するモデルのクライアントを返す。初回のみ生成し、以降は使い回す。"""
+        with self._models_lock:
+            model = self._models.get(model_name)
+            if model is None:
+                model = self.model_factory(model_name)
+                self._models[model_name] = model
+                logger.debug(f"GeminiService: モデル '{model_name}' のクライアントを生成しました。")
+            return model
+
+    def submit(self, image_data, original_text, mode, image_hash=None, mime_type='image/png', priority=PRIORITY_INTERACTIVE,
+               ocr_confidence=None):
+        """
+        翻訳ジョブを投入し、ジョブIDを返す。priority の値が小さいジョブほど先にAPIを呼び出す。
+        ocr_confidence (0-100) は、画像を送らずにOCRテキストだけで翻訳するかどうかの判断に使う。
+        キューが上限に達している場合は投入せずに、そのジョブIDを返した後で error シグナルを発行する。
+        """
+        self._job_counter += 1
+        job_id = self._job_counter
+
+        if len(self._jobs) >= self.max_queued_jobs:
+            logger.warning(f"GeminiService: キューが上限 ({self.max_queued_jobs}) に達しているため、ジョブ {job_id} を拒否しました。")
+            # 呼び出し元がジョブIDを登録してから通知を受け取れるよう、イベントループに戻ってから発行する
+            message = "処理待ちの翻訳リクエストが多すぎます。しばらく待ってから再度お試しください。"
+            QTimer.singleShot(0, lambda: self.error.emit(job_id, message))
+            return job_id
+
+        worker = GeminiWorker(
+            job_id, image_data, original_text, mode, self.config_manager, self.get_model,
+            translation_cache=self.translation_cache, image_hash=image_hash, mime_type=mime_type,
+            scheduler=self.scheduler, priority=priority,
+            ocr_confidence=ocr_confidence, route_stats=self.route_stats,
+            translation_memory=self.translation_memory, glossary=self.glossary
+        )
+        worker.signals.finished.connect(self._on_worker_finished)
+        worker.signals.partial.connect(self._on_worker_partial)
+        worker.signals.error.connect(self._on_worker_error)
+        self._jobs[job_id] = time.perf_counter()
+        if self.config_manager.get("batch_settings.enabled", False):
+            self._add_to_batch(worker)
+        else:
+            self._futures[job_id] = self._loop_thread.submit(worker.run())
+        logger.debug(f"GeminiService: ジョブ {job_id} を投入しました (未完了 {len(self._jobs)} 件)。")
+        return job_id
+
+    def _add_to_batch(self, worker):
+        """ジョブをバッチに追加する。上限に達した場合や、モードが異なるジョブが来た場合は直ちに送信する。"""
+        if self._batch and self._batch[0].mode != worker.mode:
+            self.flush_batch()
+        self._batch.append(worker)
+        if len(self._batch) >= self.config_manager.get("batch_settings.max_batch_size", 4):
+            self.flush_batch()
+        elif not self._batch_timer.isActive():
+            self._batch_timer.start(self.config_manager.get("batch_settings.window_ms", 1500))
+
+    def flush_batch(self):
+        """待機中のバッチを送信する。"""
+        self._batch_timer.stop()
+        workers = [worker for worker in self._batch if worker.job_id in self._jobs]
+        self._batch = []
+        if not workers:
+            return
+        if len(workers) == 1:
+            future = self._loop_thread.submit(workers[0].run())
+        else:
+            batch_worker = GeminiBatchWorker(workers, self.config_manager, self.get_model, scheduler=self.scheduler)
+            future = self._loop_thread.submit(batch_worker.run())
+            logger.debug(f"GeminiService: ジョブ {[worker.job_id for worker in workers]} を1回のリクエストにまとめて送信します。")
+        for worker in workers:
+            self._futures[worker.job_id] = future
+
+    def cancel(self, job_id):
+        """
+        未完了のジョブをキャンセルする。API呼び出し中であれば通信を打ち切る。
+        キャンセルした場合は cancelled シグナルを発行し True を返す。以降、そのジョブの結果は通知されない。
+        """
+        if job_id not in self._jobs:
+            return False
+        self._jobs.pop(job_id)
+        future = self._futures.pop(job_id, None)
+        if future is not None and not any(other is future for other in self._futures.values()):
+            # バッチの場合は、同じリクエストのジョブがすべてキャンセルされたときだけ通信を打ち切る
+            future.cancel()
+        self._cancelled_jobs += 1
+        logger.debug(f"GeminiService: ジョブ {job_id} をキャンセルしました (累計 {self._cancelled_jobs} 件)。")
+        self.cancelled.emit(job_id)
+        return True
+
+    def pending_count(self):
+        """実行中・待機中のジョブ数を返す。"""
+        return len(self._jobs)
+
+    def stats(self, timeout=1.0):
+        """スケジューラーのキューの深さ・待ち時間と、ジョブの完了数・平均レイテンシを返す。"""
+        async def collect():
+            # スケジューラーの状態はイベントループのスレッドで読み出す
+            return self.scheduler.stats()
+        try:
+            stats = self._loop_thread.submit(collect()).result(timeout)
+        except Exception:
+            logger.exception("GeminiService: スケジューラーの統計の取得に失敗しました。")
+            stats = {}
+        stats.update({
+            "pending_jobs": len(self._jobs),
+            "completed_jobs": self._completed_jobs,
+            "cancelled_jobs": self._cancelled_jobs,
+            "average_latency_ms": round(self._total_latency / self._completed_jobs * 1000, 1) if self._completed_jobs else 0.0,
+            "routes": self.route_stats.summary(),
+        })
+        if self.translation_memory is not None:
+            stats["translation_memory"] = self.translation_memory.stats()
+        return stats
+
+    def _complete_job(self, job_id):
+        """ジョブを完了扱いにする。既にキャンセル・完了済みのジョブであれば False を返す。"""
+        self._futures.pop(job_id, None)
+        submitted_at = self._jobs.pop(job_id, None)
+        if submitted_at is None:
+            return False
+        latency = time.perf_counter() - submitted_at
+        self._completed_jobs += 1
+        self._total_latency += latency
+        logger.debug(
+            f"GeminiService: ジョブ {job_id} 完了 ({latency * 1000:.0f} ms, "
+            f"累計 {self._completed_jobs} 件, 平均 {self._total_latency / self._completed_jobs * 1000:.0f} ms)"
+        )
+        return True
+
+    def _on_worker_finished(self, job_id, original_text, translation, explanation):
+        if self._complete_job(job_id):
+            self.finished.emit(job_id, original_text, translation, explanation)
+
+    def _on_worker_partial(self, job_id, translation, explanation):
+        # キャンセル後に届いた途中経過は通知しない
+        if job_id in self._jobs:
+            self.partial.emit(job_id, translation, explanation)
+
+    def _on_worker_error(self, job_id, error_message):
+        if self._complete_job(job_id):
+            self.error.emit(job_id, error_message)
+
+    def shutdown(self, timeout_ms=5000):
+        """未完了のジョブをすべてキャンセルし、イベントループを停止する。"""
+        logger.info(f"GeminiService: 統計: {self.stats()}")
+        self._batch_timer.stop()
+        self._batch = []
+        for job_id in list(self._jobs):
+            self.cancel(job_id)
+        self._loop_thread.stop(timeout_ms / 1000)
+        logger.debug("GeminiService: 停止しました。")
@@ -1,105 +1,565 @@
-from PyQt5.QtCore import QThread, pyqtSignal
-import google.generativeai as genai
+from PyQt5.QtCore import QObject, pyqtSignal
+import asyncio
+import threading
+import time
 import logging # logging モジュールを追加
 
 # src/config/config_managerから設定マネージャーをインポート
 from src.config.config_manager import ConfigManager
+from src.utils.response_parser import StreamingResponseParser, BatchResponseDemuxer, BATCH_SECTION_HEADER
+from src.threads.request_scheduler import (
+    PRIORITY_INTERACTIVE, estimate_request_tokens, is_retryable_error, backoff_delay
+)
+from src.utils.request_routing import choose_route, ROUTE_TEXT_ONLY, ROUTE_IMAGE_ONLY
+from src.utils.translation_memory import TranslationMemory, MEMORY_ONLY_EXPLANATION
+from src.utils.glossary import Glossary
 
 logger = logging.getLogger(__name__) # このモジュール用のロガーを取得
 
-class GeminiWorker(QThread):
+class GeminiWorkerSignals(QObject):
+    """GeminiWorker の処理結果を通知するシグナル。すべてのシグナルにジョブIDが付く。"""
+    finished = pyqtSignal(int, str, str, str) # job_id, original_text, translation, explanation
+    partial = pyqtSignal(int, str, str) # ストリーミング中の途中経過: job_id, translation, explanation
+    error = pyqtSignal(int, str) # job_id, error_message
+
+class GeminiRequestBase:
     """
-    Gemini APIを非同期で呼び出し、翻訳処理を行うWorkerスレッド。
+    Gemini APIの呼び出し部分 (スケジューラーによる順番待ち・期限・再試行・ストリーミング受信) をまとめた基底クラス。
+    受信したテキストは、試行ごとに make_sink() で作り直す受け口の feed() に渡される。
+    受け口には、成功した試行のレイテンシ (latency) と、応答に含まれていれば実際の入力トークン数 (prompt_tokens) が設定される。
     """
-    finished = pyqtSignal(str, str, str) # original_text (str), translation (str), explanation (str)
-    error = pyqtSignal(str) # error_message (str)
+    def __init__(self, config_manager: ConfigManager, model_provider, scheduler=None, priority=PRIORITY_INTERACTIVE):
+        self.config_manager = config_manager
+        self.model_provider = model_provider # モデル名を受け取り、generate_content(_async) を持つモデルを返す関数
+        self.scheduler = scheduler # RequestScheduler (None の場合は制限なしで即時実行)
+        self.priority = priority
+        self._cancelled = threading.Event() # 同期モデルをスレッドで実行している場合の中断フラグ
+
+    async def _generate(self, model_name, prompt_parts, tokens, make_sink, label):
+        """
+        プロンプトを送信し、応答を流し込んだ受け口を返す。
+        一時的なエラーはジッター付き指数バックオフで再試行し、期限切れの場合は asyncio.TimeoutError を送出する。
+        """
+        model = self.model_provider(model_name)
+        stream = self.config_manager.get("gemini_settings.stream", True)
+        timeout = self.config_manager.get("gemini_settings.request_timeout_seconds", 60)
+        max_retries = self.config_manager.get("rate_limit_settings.max_retries", 4)
+        backoff_base = self.config_manager.get("rate_limit_settings.backoff_base_seconds", 1.0)
+        backoff_max = self.config_manager.get("rate_limit_settings.backoff_max_seconds", 30.0)
+
+        attempt = 0
+        while True:
+            if self.scheduler is not None:
+                await self.scheduler.acquire(model_name, tokens, self.priority)
+            try:
+                logger.debug(f"GeminiWorker: Gemini APIへリクエスト送信中... ({label}, stream={stream}, timeout={timeout}s, 試行 {attempt + 1})")
+                request_start = time.perf_counter()
+                # 再試行時は途中まで受信した内容を捨てて最初から解析し直す
+                sink = make_sink()
+                await asyncio.wait_for(
+                    self._request(model, prompt_parts, sink, stream, request_start),
+                    timeout if timeout and timeout > 0 else None
+                )
+                sink.latency = time.perf_counter() - request_start
+                logger.debug(f"GeminiWorker: Gemini APIからの応答を受信しました。({label}, {sink.latency * 1000:.0f} ms)")
+                return sink
+            except asyncio.TimeoutError:
+                self._cancelled.set()
+                logger.warning(f"GeminiWorker: {label} が {timeout} 秒以内に完了しなかったため打ち切りました。")
+                raise
+            except Exception as e:
+                if attempt >= max_retries or not is_retryable_error(e):
+                    raise
+                delay = backoff_delay(attempt, backoff_base, backoff_max)
+                attempt += 1
+                if self.scheduler is not None:
+                    self.scheduler.record_retry()
+                logger.warning(f"GeminiWorker: {label} で一時的なエラーが発生しました ({e})。{delay:.1f} 秒後に再試行します ({attempt}/{max_retries})。")
+            finally:
+                if self.scheduler is not None:
+                    self.scheduler.release()
+            await asyncio.sleep(delay)
+
+    def _request(self, model, prompt_parts, sink, stream, request_start):
+        """応答を受信して sink に流し込む awaitable を返す。非同期APIを持たないモデルはスレッドで実行する。"""
+        if hasattr(model, "generate_content_async"):
+            return self._request_async(model, prompt_parts, sink, stream, request_start)
+        # キャンセル時はスレッドを止められないため、次のチャンクで打ち切る
+        return asyncio.get_running_loop().run_in_executor(
+            None, self._request_sync, model, prompt_parts, sink, stream, request_start
+        )
+
+    async def _request_async(self, model, prompt_parts, sink, stream, request_start):
+        """generate_content_async で応答を受信し、sink に流し込む。"""
+        if stream:
+            response = await model.generate_content_async(prompt_parts, stream=True)
+            first_chunk_at = None
+            async for chunk in response:
+                chunk_text = self._chunk_text(chunk)
+                if not chunk_text:
+                    continue
+                if first_chunk_at is None:
+                    first_chunk_at = time.perf_counter()
+                    logger.debug(f"GeminiWorker: 最初のチャンクを受信しました。({(first_chunk_at - request_start) * 1000:.0f} ms)")
+                sink.feed(chunk_text)
+                self._note_usage(sink, chunk)
+        else:
+            response = await model.generate_content_async(prompt_parts)
+            sink.feed(response.text)
+            self._note_usage(sink, response)
+
+    def _request_sync(self, model, prompt_parts, sink, stream, request_start):
+        """generate_content で応答を受信し、sink に流し込む。スレッドプール上で実行される。"""
+        if stream:
+            first_chunk_at = None
+            response = model.generate_content(prompt_parts, stream=True)
+            for chunk in response:
+                if self._cancelled.is_set():
+                    logger.debug("GeminiWorker: キャンセルされたため受信を中断しました。")
+                    return
+                chunk_text = self._chunk_text(chunk)
+                if not chunk_text:
+                    continue
+                if first_chunk_at is None:
+                    first_chunk_at = time.perf_counter()
+                    logger.debug(f"GeminiWorker: 最初のチャンクを受信しました。({(first_chunk_at - request_start) * 1000:.0f} ms)")
+                sink.feed(chunk_text)
+                self._note_usage(sink, chunk)
+        else:
+            response = model.generate_content(prompt_parts)
+            sink.feed(response.text)
+            self._note_usage(sink, response)
 
-    def __init__(self, image_data, original_text, config_manager: ConfigManager, history_file_path: str):
-        super().__init__()
+    @staticmethod
+    def _note_usage(sink, response):
+        # ストリーミングでは最後のチャンクに usage_metadata が含まれる
+        prompt_tokens = getattr(getattr(response, "usage_metadata", None), "prompt_token_count", None)
+        if prompt_tokens:
+            sink.prompt_tokens = prompt_tokens
+
+    @staticmethod
+    def _chunk_text(chunk):
+        try:
+            return chunk.text
+        except ValueError:
+            # テキストを含まないチャンク (終了理由のみなど)
+            return ""
+
+class _TextSink:
+    """応答テキストをそのまま蓄積する受け口 (途中経過は通知しない)。"""
+    def __init__(self):
+        self.text = ""
+        self.latency = None
+        self.prompt_tokens = None
+
+    def feed(self, text):
+        self.text += text
+
+class _StreamingSink:
+    """1件のジョブの応答を StreamingResponseParser で解析し、途中経過をシグナルで通知する受け口。"""
+    def __init__(self, worker, mode):
+        self.worker = worker
+        self.parser = StreamingResponseParser(mode)
+        self.latency = None
+        self.prompt_tokens = None
+
+    def feed(self, text):
+        partial_translation, partial_explanation = self.parser.feed(text)
+        self.worker.signals.partial.emit(self.worker.job_id, partial_translation, partial_explanation)
+
+class GeminiWorker(GeminiRequestBase):
+    """
+    Gemini APIを呼び出して1件の翻訳処理を行う非同期ジョブ。
+    GeminiService のイベントループ上で run() が実行され、タスクのキャンセルや期限切れで途中終了できる。
+    """
+    def __init__(self, job_id, image_data, original_text, mode, config_manager: ConfigManager, model_provider,
+                 translation_cache=None, image_hash=None, mime_type='image/png',
+                 scheduler=None, priority=PRIORITY_INTERACTIVE, ocr_confidence=None, route_stats=None,
+                 translation_memory=None, glossary=None):
+        super().__init__(config_manager, model_provider, scheduler=scheduler, priority=priority)
+        self.job_id = job_id
         self.image_data = image_data
+        self.mime_type = mime_type # image_data のMIMEタイプ (upload_settings.format に依存)
         self.original_text = original_text # OCRで抽出された原文テキスト (または空文字列)
-        self.config_manager = config_manager
-        self.history_file_path = history_file_path # 履歴ファイルパスは履歴保存用として保持
+        self.mode = mode # "translation" または "explanation"
+        self.translation_cache = translation_cache # TranslationCache (無効時は None)
+        self.image_hash = image_hash # スクリーンショットの知覚ハッシュ (dHash, 近似一致検索用)
+        self.ocr_confidence = ocr_confidence # OCRの平均信頼度 (0-100, 不明な場合は None)
+        self.route_stats = route_stats # RouteStatistics (None の場合は集計しない)
+        self.route = None # リクエストの送り方 (run() の開始時に決定する)
+        self.translation_memory = translation_memory # TranslationMemory (無効時は None)
+        self._memory_hints = "" # 翻訳メモリの類似セグメントから作成した、プロンプトに追加する参考訳
+        self.glossary = glossary # Glossary (無効時は None)
+        self.signals = GeminiWorkerSignals()
+
+    async def run(self, prepared=None):
+        """
+        翻訳処理を行う。prepared に _prepare() の結果を渡した場合は、キャッシュ・翻訳メモリの検索を省略する
+        (GeminiBatchWorker が検索済みのジョブを単独で送信する場合)。
+        """
+        logger.debug(f"GeminiWorker: ジョブ {self.job_id} のAPI処理を開始します。")
 
-    def run(self):
-        logger.debug("GeminiWorker: API処理を開始します。")
-        
         try:
             model_name = self.config_manager.get("gemini_settings.model_name")
-            model = genai.GenerativeModel(model_name)
-            
-            image_part = {
-                'mime_type': 'image/png',
-                'data': self.image_data
-            }
-
-            # 現在のモードに応じてプロンプトを選択
-            current_mode = self.config_manager.get("gemini_settings.mode", "translation")
-            if current_mode == "translation":
-                translation_prompt = self.config_manager.get("gemini_settings.translation_prompt")
-                logger.debug("GeminiWorker: 翻訳モードでプロンプトを構築します。")
-            elif current_mode == "explanation":
-                translation_prompt = self.config_manager.get("gemini_settings.explanation_prompt")
-                logger.debug("GeminiWorker: 解説モードでプロンプトを構築します。")
-            else:
-                # 未定義のモードの場合、デフォルトで翻訳モードを使用
-                translation_prompt = self.config_manager.get("gemini_settings.translation_prompt")
-                logger.warning(f"GeminiWorker: 未定義のモード '{current_mode}' が設定されています。デフォルトの翻訳モードを使用します。")
-            
-            # OCRでテキストが抽出された場合のみ、プロンプトに原文を含める
-            if self.original_text and self.original_text.strip() != "" and \
-               not self.original_text.startswith("OCRエラー:"):
-                translation_prompt += f"\n\n--- 画像からOCRで抽出されたテキスト ---\n{self.original_text.strip()}\n\n"
-                if current_mode == "explanation":
-                    translation_prompt += "上記OCRテキストを参考に、ゲーム内の要素について詳しく解説してください。もし画像内の文字が不鮮明な場合、OCRテキストを優先して情報を取得し、正確な解説を生成してください。"
-                else:
-                    translation_prompt += "上記OCRテキストを考慮し、もし画像テキストが読み取れない場合はOCRテキストを優先して翻訳・解説してください。"
-            else:
-                logger.debug("GeminiWorker: OCRテキストが空か、エラーメッセージのため、プロンプトには含めません。")
-            
-            prompt_parts = [
-                image_part,
-                translation_prompt,
-            ]
+            if prepared is None:
+                prepared = await self._prepare(model_name)
+                if prepared is None:
+                    return
+            current_mode, translation_prompt, cache_key, cache_context, segments, known = prepared
 
-            logger.debug("GeminiWorker: Gemini APIへリクエスト送信中...")
-            response = model.generate_content(prompt_parts)
-            logger.debug("GeminiWorker: Gemini APIからの応答を受信しました。")
-            
-            text_content = response.text
-            
-            translation = ""
-            explanation = "解説が見つかりませんでした。"
-
-            if current_mode == "translation":
-                if "翻訳結果:" in text_content:
-                    parts = text_content.split("翻訳結果:", 1)
-                    translation_part = parts[1]
-                    if "解説:" in translation_part:
-                        trans_exp_parts = translation_part.split("解説:", 1)
-                        translation = trans_exp_parts[0].strip()
-                        explanation = trans_exp_parts[1].strip()
-                    else:
-                        translation = translation_part.strip()
-                elif "解説:" in text_content:
-                    explanation = text_content.split("解説:", 1)[1].strip()
-                else:
-                    translation = text_content.strip()
-            elif current_mode == "explanation":
-                if "解説:" in text_content:
-                    explanation = text_content.split("解説:", 1)[1].strip()
-                    translation = text_content.split("解説:", 1)[0].strip() # 解説より前の部分を要約として表示
-                else:
-                    explanation = text_content.strip()
-                    translation = ""
-            
-            logger.debug(f"GeminiWorker: 最終プロンプトの一部: {translation_prompt[:200]}...")
+            memory_result = await self._translate_with_memory(model_name, current_mode, translation_prompt, segments, known)
+            if memory_result is not None:
+                translation, explanation = memory_result
+                self._store_cache(cache_key, cache_context, translation, explanation)
+                self.signals.finished.emit(self.job_id, self.original_text, translation, explanation)
+                return
+
+            prompt_parts = self._build_prompt_parts(current_mode, translation_prompt)
+            estimated_tokens = estimate_request_tokens(
+                prompt_parts[-1], image_count=0 if self.route == ROUTE_TEXT_ONLY else 1
+            )
+            sink = await self._generate(
+                model_name, prompt_parts, estimated_tokens,
+                lambda: _StreamingSink(self, current_mode),
+                f"ジョブ {self.job_id}, {self.route}, 画像 {len(self.image_data)} bytes, {self.mime_type}"
+            )
+            if self.route_stats is not None:
+                self.route_stats.record(self.route, sink.latency, sink.prompt_tokens or estimated_tokens)
+            translation, explanation = sink.parser.sections(final=True)
+
+            logger.debug(f"GeminiWorker: 最終プロンプトの一部: {prompt_parts[-1][:200]}...")
             logger.debug(f"GeminiWorker: 翻訳結果 (mode={current_mode}): {translation[:50]}...")
             logger.debug(f"GeminiWorker: 解説 (mode={current_mode}): {explanation[:50]}...")
-            
-            self.finished.emit(self.original_text, translation, explanation)
 
+            self._store_cache(cache_key, cache_context, translation, explanation)
+            self.signals.finished.emit(self.job_id, self.original_text, translation, explanation)
+            await self._learn_from_result(current_mode, translation)
+
+        except asyncio.TimeoutError:
+            timeout = self.config_manager.get("gemini_settings.request_timeout_seconds", 60)
+            self.signals.error.emit(self.job_id, f"翻訳リクエストがタイムアウトしました。({timeout}秒)")
+        except asyncio.CancelledError:
+            self._cancelled.set()
+            logger.debug(f"GeminiWorker: ジョブ {self.job_id} はキャンセルされました。")
+            raise
         except Exception as e:
             logger.exception(f"GeminiWorker: Gemini API処理中にエラーが発生しました。")
-            self.error.emit(f"翻訳処理中にエラーが発生しました。\n{e}")
+            self.signals.error.emit(self.job_id, f"翻訳処理中にエラーが発生しました。\n{e}")
+
+    async def _prepare(self, model_name):
+        """
+        プロンプトの選択、キャッシュの検索、送信方法の決定、翻訳メモリの検索を行い、
+        (モード, プロンプト, cache_key, cache_context, セグメントのリスト, 訳文のリスト) を返す。
+        キャッシュにヒットした場合は finished シグナルを発行して None を返す。
+        """
+        current_mode, translation_prompt = self._select_prompt()
+        # 用語集の訳語が変わった場合に古い結果を返さないよう、用語集を含めたプロンプトでキャッシュを検索する
+        translation_prompt += Glossary.format_prompt(self._glossary_entries())
+
+        cache_key, cache_context, cached = self._lookup_cache(model_name, current_mode, translation_prompt)
+        if cached is not None:
+            translation, explanation = cached
+            self.signals.finished.emit(self.job_id, self.original_text, translation, explanation)
+            return None
+
+        self._resolve_route(current_mode)
+        segments, known = await self._lookup_memory(current_mode)
+        return current_mode, translation_prompt, cache_key, cache_context, segments, known
+
+    def _select_prompt(self):
+        """モードに応じたプロンプトを選択し、(モード, プロンプト) を返す。"""
+        current_mode = self.mode
+        if current_mode == "translation":
+            translation_prompt = self.config_manager.get("gemini_settings.translation_prompt")
+            logger.debug("GeminiWorker: 翻訳モードでプロンプトを構築します。")
+        elif current_mode == "explanation":
+            translation_prompt = self.config_manager.get("gemini_settings.explanation_prompt")
+            logger.debug("GeminiWorker: 解説モードでプロンプトを構築します。")
+        else:
+            # 未定義のモードの場合、デフォルトで翻訳モードを使用
+            translation_prompt = self.config_manager.get("gemini_settings.translation_prompt")
+            logger.warning(f"GeminiWorker: 未定義のモード '{current_mode}' が設定されています。デフォルトの翻訳モードを使用します。")
+        return current_mode, translation_prompt
+
+    def _glossary_entries(self):
+        """OCRテキストに含まれる用語集の項目のリストを返す。"""
+        if self.glossary is None or not self.original_text or self.original_text.startswith("OCRエラー:"):
+            return []
+        entries = self.glossary.match(
+            self.original_text, self.config_manager.get("glossary_settings.max_terms", 50)
+        )
+        if entries:
+            logger.debug(f"GeminiWorker: ジョブ {self.job_id} のOCRテキストに用語集の用語が {len(entries)} 件含まれています。")
+        return entries
+
+    def _lookup_cache(self, model_name, current_mode, translation_prompt):
+        """
+        キャッシュを検索し、(cache_key, cache_context, (translation, explanation) または None) を返す。
+        キャッシュが無効な場合はすべて None を返す。
+        """
+        if self.translation_cache is None:
+            return None, None, None
+
+        cache_key = self.translation_cache.make_key(
+            self.image_data, self.original_text, model_name, current_mode, translation_prompt
+        )
+        cached = self.translation_cache.get(cache_key, count_miss=False)
+        if cached is not None:
+            logger.debug("GeminiWorker: キャッシュから結果を返します。API呼び出しはスキップされました。")
+            return cache_key, None, cached
+
+        # 完全一致しない場合は、見た目がほぼ同じで同じテキストの過去のスクリーンショットの結果を再利用する
+        cache_context = self.translation_cache.make_context(model_name, current_mode, translation_prompt)
+        similar = self.translation_cache.find_similar(self.image_hash, cache_context, self.original_text)
+        if similar is not None:
+            translation, explanation, distance = similar
+            logger.debug(f"GeminiWorker: 類似画像 (ハミング距離 {distance}) のキャッシュ結果を返します。")
+            return cache_key, cache_context, (translation, explanation)
+        self.translation_cache.record_miss()
+        return cache_key, cache_context, None
+
+    def _memory_segments(self, current_mode):
+        """翻訳メモリの対象となるセグメントのリストを返す。対象外の場合は空のリストを返す。"""
+        if self.translation_memory is None or current_mode != "translation" or not self._has_ocr_text():
+            return []
+        return self.translation_memory.split_segments(self.original_text)
+
+    async def _lookup_memory(self, current_mode):
+        """(セグメントのリスト, 訳文のリスト) を返す。訳文のリストの未登録のセグメントは None になる。"""
+        segments = self._memory_segments(current_mode)
+        if not segments:
+            return [], []
+        # 検索時のヒット数の更新はディスクへの書き込みを伴うため、他のリクエストを止めないようループの外で実行する
+        known = await asyncio.get_running_loop().run_in_executor(None, self.translation_memory.lookup, segments)
+        return segments, known
+
+    async def _translate_with_memory(self, model_name, current_mode, translation_prompt, segments, known):
+        """
+        _lookup_memory() の結果 (segments, known) を使って (translation, explanation) を作成する。
+        すべてのセグメントが登録済みであればAPIを呼ばずに訳文を組み立てる。
+        一部のみ登録済みで、画像を送らずに済む場合は未登録のセグメントだけを翻訳させる。
+        それ以外の場合は None を返し、通常のリクエストを行う。
+        """
+        if not segments:
+            return None
+        unknown = [segment for segment, translation in zip(segments, known) if translation is None]
+        if not unknown:
+            logger.debug(f"GeminiWorker: ジョブ {self.job_id} のすべてのセグメントが翻訳メモリに登録済みのため、APIを呼び出しません。")
+            return "\n".join(known), MEMORY_ONLY_EXPLANATION
+        self._memory_hints = TranslationMemory.format_hints(self.translation_memory.find_hints(
+            unknown, self.config_manager.get("translation_memory_settings.max_hints", 10)
+        ))
+        if self.route != ROUTE_TEXT_ONLY or len(unknown) == len(segments):
+            return None
+
+        prompt = translation_prompt + self._memory_hints + TranslationMemory.build_segment_request(unknown)
+        estimated_tokens = estimate_request_tokens(prompt, image_count=0)
+        sink = await self._generate(
+            model_name, [prompt], estimated_tokens, _TextSink,
+            f"ジョブ {self.job_id}, 未登録のセグメント {len(unknown)}/{len(segments)} 件"
+        )
+        if self.route_stats is not None:
+            self.route_stats.record("memory_segments", sink.latency, sink.prompt_tokens or estimated_tokens)
+        translated = TranslationMemory.parse_numbered_translations(sink.text, len(unknown))
+        if translated is None:
+            logger.warning(f"GeminiWorker: ジョブ {self.job_id} のセグメント単位の応答を解析できなかったため、キャプチャ全体を翻訳します。")
+            return None
+        await asyncio.get_running_loop().run_in_executor(None, self.translation_memory.learn, unknown, translated)
+        translated_iter = iter(translated)
+        merged = [translation if translation is not None else next(translated_iter) for translation in known]
+        return "\n".join(merged), f"{len(segments) - len(unknown)}/{len(segments)} 行は翻訳メモリの訳文を使用し、残りの行のみAPIで翻訳しました。"
+
+    async def _learn_from_result(self, current_mode, translation):
+        segments = self._memory_segments(current_mode)
+        if segments:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.translation_memory.learn_from_translation, segments, translation
+            )
+
+    def _store_cache(self, cache_key, cache_context, translation, explanation):
+        if cache_key is not None:
+            self.translation_cache.put(
+                cache_key, self.original_text, translation, explanation,
+                phash=self.image_hash, context=cache_context
+            )
+
+    def _image_part(self):
+        return {
+            'mime_type': self.mime_type,
+            'data': self.image_data
+        }
+
+    def _resolve_route(self, current_mode):
+        """OCRの信頼度からリクエストの送り方を決め、self.route に設定して返す。"""
+        self.route = choose_route(self.original_text, self.ocr_confidence, current_mode, self.config_manager)
+        logger.debug(f"GeminiWorker: ジョブ {self.job_id} の送信方法: {self.route} (OCR信頼度 {self.ocr_confidence})")
+        return self.route
+
+    def _has_ocr_text(self):
+        # OCRで信頼できるテキストが抽出された場合のみ、プロンプトに原文を含める
+        return self.route != ROUTE_IMAGE_ONLY and \
+            bool(self.original_text and self.original_text.strip() != "" and
+                 not self.original_text.startswith("OCRエラー:"))
+
+    def _build_prompt_parts(self, current_mode, translation_prompt):
+        """画像とプロンプトから generate_content に渡すリストを構築する。"""
+        translation_prompt += self._memory_hints
+        if self.route == ROUTE_TEXT_ONLY:
+            # OCRの信頼度が高いため、画像を送らずにテキストのみで翻訳する
+            return [
+                translation_prompt +
+                f"\n\n画像の代わりに、画像からOCRで抽出したテキストを以下に示します。このテキストを画像に表示されている内容として扱ってください。"
+                f"\n--- 画像からOCRで抽出されたテキスト ---\n{self.original_text.strip()}"
+            ]
+
+        if self._has_ocr_text():
+            translation_prompt += f"\n\n--- 画像からOCRで抽出されたテキスト ---\n{self.original_text.strip()}\n\n"
+            if current_mode == "explanation":
+                translation_prompt += "上記OCRテキストを参考に、ゲーム内の要素について詳しく解説してください。もし画像内の文字が不鮮明な場合、OCRテキストを優先して情報を取得し、正確な解説を生成してください。"
+            else:
+                translation_prompt += "上記OCRテキストを考慮し、もし画像テキストが読み取れない場合はOCRテキストを優先して翻訳・解説してください。"
+        else:
+            logger.debug("GeminiWorker: OCRテキストが空か、エラーメッセージのため、プロンプトには含めません。")
+
+        return [
+            self._image_part(),
+            translation_prompt,
+        ]
+
+class _BatchSink:
+    """バッチリクエストの応答を画像ごとに振り分け、各ジョブの途中経過をシグナルで通知する受け口。"""
+    def __init__(self, workers, mode):
+        self.workers = workers
+        self.demuxer = BatchResponseDemuxer(len(workers), mode)
+        self.latency = None
+        self.prompt_tokens = None
+
+    def feed(self, text, final=False):
+        for index in self.demuxer.feed(text, final=final):
+            worker = self.workers[index - 1]
+            partial_translation, partial_explanation = self.demuxer.sections(index)
+            worker.signals.partial.emit(worker.job_id, partial_translation, partial_explanation)
+
+class GeminiBatchWorker(GeminiRequestBase):
+    """
+    同じモードの複数のジョブ (GeminiWorker) を、画像ごとに番号付きの見出しを付けた1回のリクエストにまとめて処理する。
+    共通のプロンプトは1回だけ送信し、応答は見出しで画像ごとに振り分けて、各ジョブのシグナルで通知する。
+    """
+    def __init__(self, workers, config_manager: ConfigManager, model_provider, scheduler=None):
+        super().__init__(
+            config_manager, model_provider, scheduler=scheduler,
+            priority=min(worker.priority for worker in workers)
+        )
+        self.workers = workers
+
+    async def run(self):
+        job_ids = [worker.job_id for worker in self.workers]
+        logger.debug(f"GeminiBatchWorker: ジョブ {job_ids} をまとめて処理します。")
+        settled = set() # 結果またはエラーを通知済みのジョブID (エラー時に重ねて通知しない)
+        try:
+            model_name = self.config_manager.get("gemini_settings.model_name")
+            remaining = []
+            for worker in self.workers:
+                prepared = await worker._prepare(model_name)
+                if prepared is None:
+                    settled.add(worker.job_id)
+                    continue
+                current_mode, _, cache_key, cache_context, segments, known = prepared
+                if segments and all(translation is not None for translation in known):
+                    # すべてのセグメントが翻訳メモリに登録済みのキャプチャはバッチに含めない
+                    translation = "\n".join(known)
+                    worker._store_cache(cache_key, cache_context, translation, MEMORY_ONLY_EXPLANATION)
+                    worker.signals.finished.emit(worker.job_id, worker.original_text, translation, MEMORY_ONLY_EXPLANATION)
+                    settled.add(worker.job_id)
+                    continue
+                remaining.append((worker, prepared))
+
+            if not remaining:
+                return
+            if len(remaining) == 1:
+                # 1件だけ残った場合は、検索済みの状態を引き継いで通常のリクエストとして処理する
+                worker, prepared = remaining[0]
+                # GeminiWorker.run はエラーも自身で通知する
+                settled.add(worker.job_id)
+                await worker.run(prepared=prepared)
+                return
+
+            workers = [worker for worker, _ in remaining]
+            current_mode, translation_prompt = workers[0]._select_prompt()
+            translation_prompt += Glossary.format_prompt(self._glossary_entries(workers))
+            prompt_parts = self._build_prompt_parts(workers, translation_prompt)
+            prompt_text = "".join(part for part in prompt_parts if isinstance(part, str))
+            image_count = sum(1 for part in prompt_parts if isinstance(part, dict))
+            estimated_tokens = estimate_request_tokens(prompt_text, image_count=image_count)
+            sink = await self._generate(
+                model_name, prompt_parts, estimated_tokens,
+                lambda: _BatchSink(workers, current_mode),
+                f"バッチ {[worker.job_id for worker in workers]}, 画像 {image_count} 枚"
+            )
+            route_stats = workers[0].route_stats
+            if route_stats is not None:
+                route_stats.record("batch", sink.latency, sink.prompt_tokens or estimated_tokens)
+            # 見出しの誤検出を避けるため保留していた末尾のテキストを振り分ける
+            sink.feed("", final=True)
+
+            # 画像ごとにプロンプトを送信した場合と比べて削減できたトークン数の概算
+            saved_tokens = estimate_request_tokens(translation_prompt, image_count=0) * (len(workers) - 1)
+            logger.debug(f"GeminiBatchWorker: {len(workers)} 件をまとめて処理しました (プロンプト約 {saved_tokens} トークン削減)。")
+
+            results = []
+            for index, (worker, (_, _, cache_key, cache_context, _, _)) in enumerate(remaining, start=1):
+                sections = sink.demuxer.sections(index, final=True)
+                if sections is None:
+                    logger.warning(f"GeminiBatchWorker: 応答に画像 {index} (ジョブ {worker.job_id}) の回答が含まれていませんでした。")
+                    worker.signals.error.emit(worker.job_id, "まとめて送信した翻訳リクエストの応答に、このキャプチャの結果が含まれていませんでした。")
+                    settled.add(worker.job_id)
+                    continue
+                translation, explanation = sections
+                worker._store_cache(cache_key, cache_context, translation, explanation)
+                worker.signals.finished.emit(worker.job_id, worker.original_text, translation, explanation)
+                settled.add(worker.job_id)
+                results.append((worker, translation))
+            # すべてのジョブの結果を通知してから翻訳メモリに登録する
+            for worker, translation in results:
+                await worker._learn_from_result(current_mode, translation)
+
+        except asyncio.TimeoutError:
+            timeout = self.config_manager.get("gemini_settings.request_timeout_seconds", 60)
+            for worker in self.workers:
+                if worker.job_id not in settled:
+                    worker.signals.error.emit(worker.job_id, f"翻訳リクエストがタイムアウトしました。({timeout}秒)")
+        except asyncio.CancelledError:
+            self._cancelled.set()
+            logger.debug(f"GeminiBatchWorker: ジョブ {job_ids} はキャンセルされました。")
+            raise
+        except Exception as e:
+            logger.exception(f"GeminiBatchWorker: Gemini API処理中にエラーが発生しました。")
+            for worker in self.workers:
+                if worker.job_id not in settled:
+                    worker.signals.error.emit(worker.job_id, f"翻訳処理中にエラーが発生しました。\n{e}")
+
+    @staticmethod
+    def _glossary_entries(workers):
+        """いずれかの画像のOCRテキストに含まれる用語集の項目を、重複を除いて返す。"""
+        entries = {}
+        for worker in workers:
+            for entry in worker._glossary_entries():
+                entries.setdefault(entry.source, entry)
+        return list(entries.values())
 
+    def _build_prompt_parts(self, workers, translation_prompt):
+        """共通のプロンプトの後に、見出し・画像・OCRテキストを画像ごとに並べたリストを構築する。"""
+        prompt_parts = [
+            translation_prompt +
+            f"\n\n以下の{len(workers)}枚の画像それぞれについて、上記の指示に従って回答してください。"
+            f"各画像の回答の前に、必ず「{BATCH_SECTION_HEADER.format(index='番号')}」という見出しを1行で記載してください"
+            f" (番号は1から{len(workers)})。画像の下にOCRテキストがある場合は、画像の文字が読み取れないときにOCRテキストを優先してください。"
+            "画像がなくOCRテキストのみの番号は、そのテキストを画像に表示されている内容として扱ってください。"
+        ]
+        for index, worker in enumerate(workers, start=1):
+            prompt_parts.append(BATCH_SECTION_HEADER.format(index=index))
+            if worker.route != ROUTE_TEXT_ONLY:
+                prompt_parts.append(worker._image_part())
+            if worker._has_ocr_text():
+                prompt_parts.append(f"--- 画像{index}からOCRで抽出されたテキスト ---\n{worker.original_text.strip()}")
+        return prompt_parts
@@ -0,0 +1,94 @@
+import threading
+import time
+import logging
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from src.config.config_manager import ConfigManager
+from src.utils.capture_backends import create_capture_backend
+from src.utils.frame_diff import FrameChangeDetector
+
+logger = logging.getLogger(__name__)
+
+class RegionWatcherSignals(QObject):
+    """RegionWatcher からGUIスレッドへ通知するシグナル。"""
+    frame_changed = pyqtSignal(object) # CaptureFrame (内容が変化して落ち着いたフレーム)
+    error = pyqtSignal(str)
+
+class RegionWatcher:
+    """
+    画面上の固定の矩形 (物理ピクセル) を watch_settings.interval_ms ごとに取得し、内容が変わったフレームだけを通知する。
+    取得と変化の検出は専用スレッドで行い、GUIスレッドには新しいフレームのみをシグナルで渡す。
+    取得の間隔はスレッドを待機させるため、変化がない間のCPU使用量は取得と縮小比較の分だけで済む。
+    """
+    def __init__(self, x, y, width, height, config_manager: ConfigManager, backend_name="mss"):
+        self.region = (x, y, width, height)
+        self.config_manager = config_manager
+        self.backend_name = backend_name # GUIスレッド専用のバックエンドは使用できないため、呼び出し側で選ぶ
+        self.signals = RegionWatcherSignals()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._frames = 0
+        self._changes = 0
+        self._grab_seconds = 0.0
+        self._detect_seconds = 0.0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="RegionWatcher", daemon=True)
+        self._thread.start()
+        logger.info(f"RegionWatcher: 範囲 {self.region} の監視を開始しました。")
+
+    def stop(self, timeout=2.0):
+        """監視を終了し、スレッドの終了を待つ。"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        logger.info(f"RegionWatcher: 監視を終了しました。統計: {self.stats()}")
+
+    def _run(self):
+        interval = max(50, self.config_manager.get("watch_settings.interval_ms", 500)) / 1000
+        detector = FrameChangeDetector(
+            block_size=self.config_manager.get("watch_settings.block_size", 6),
+            pixel_threshold=self.config_manager.get("watch_settings.pixel_threshold", 10),
+            min_changed_blocks=self.config_manager.get("watch_settings.min_changed_blocks", 2),
+            settle_frames=self.config_manager.get("watch_settings.settle_frames", 1)
+        )
+        backend = None
+        try:
+            # mss のインスタンスはスレッドをまたいで使えないため、監視スレッド専用のバックエンドを生成して使い回す
+            backend = create_capture_backend(self.backend_name)
+            while not self._stop_event.is_set():
+                started = time.perf_counter()
+                frame = backend.grab(*self.region)
+                grabbed = time.perf_counter()
+                is_new = detector.is_new(frame)
+                detected = time.perf_counter()
+                with self._lock:
+                    self._frames += 1
+                    self._grab_seconds += grabbed - started
+                    self._detect_seconds += detected - grabbed
+                    if is_new:
+                        self._changes += 1
+                if is_new:
+                    logger.debug(f"RegionWatcher: 内容の変化を検出しました (取得 {(grabbed - started) * 1000:.1f} ms, 判定 {(detected - grabbed) * 1000:.2f} ms)。")
+                    self.signals.frame_changed.emit(frame)
+                self._stop_event.wait(max(0.0, interval - (time.perf_counter() - started)))
+        except Exception as e:
+            logger.exception("RegionWatcher: 画面の監視中にエラーが発生しました。")
+            self.signals.error.emit(f"画面の監視中にエラーが発生しました。\n{e}")
+        finally:
+            if backend is not None:
+                backend.close()
+
+    def stats(self):
+        """取得したフレーム数・新しいフレーム数・取得と判定の平均時間、判定のみで処理できるフレームレートを返す。"""
+        with self._lock:
+            frames = self._frames
+            return {
+                "frames": frames,
+                "changes": self._changes,
+                "average_grab_ms": round(self._grab_seconds / frames * 1000, 2) if frames else 0.0,
+                "average_detect_ms": round(self._detect_seconds / frames * 1000, 3) if frames else 0.0,
+                "detect_fps": round(frames / self._detect_seconds) if self._detect_seconds else 0,
+            }
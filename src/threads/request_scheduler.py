@@ -0,0 +1,164 @@
+import asyncio
+import heapq
+import itertools
+import random
+import socket
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ジョブの優先度 (値が小さいほど先に実行される)
+PRIORITY_INTERACTIVE = 0 # ユーザーが選択したキャプチャ
+PRIORITY_BACKGROUND = 10 # 監視モードなどのバックグラウンド処理
+
+# モデル名の接頭辞 -> (1分あたりのリクエスト数, 1分あたりのトークン数)。無料枠の上限を既定値とする
+MODEL_RATE_LIMITS = {
+    "gemini-1.5-pro": (2, 32000),
+    "gemini-1.5-flash": (15, 1000000),
+    "gemini-2.0-flash": (15, 1000000),
+}
+DEFAULT_RATE_LIMIT = (15, 1000000)
+
+# 画像1枚あたりのトークン数 (Gemini は画像1枚を固定で258トークンとして数える)
+IMAGE_TOKENS = 258
+# 再試行の対象とするHTTPステータスコード
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+def estimate_request_tokens(prompt_text, image_count=1, expected_output_tokens=0):
+    """リクエストの入力トークン数を概算する (テキストは4文字 = 1トークンとして数える)。"""
+    return IMAGE_TOKENS * image_count + (len(prompt_text) + 3) // 4 + expected_output_tokens
+
+# 再試行する通信エラー。FileNotFoundError や PermissionError など、再試行しても結果が変わらない OSError は含めない
+RETRYABLE_ERROR_TYPES = (ConnectionError, TimeoutError, socket.timeout, socket.gaierror, socket.herror)
+
+def is_retryable_error(error):
+    """一時的なエラー (クォータ超過、サーバーエラー、通信エラー) であれば True を返す。"""
+    # google.api_core の例外は HTTP ステータスコードを code 属性に持つ
+    code = getattr(error, "code", None)
+    if isinstance(code, int) and code in RETRYABLE_STATUS_CODES:
+        return True
+    return isinstance(error, RETRYABLE_ERROR_TYPES)
+
+def backoff_delay(attempt, base_seconds=1.0, max_seconds=30.0):
+    """attempt 回目 (0始まり) の再試行までの待ち時間を、ジッター付き指数バックオフで返す。"""
+    return random.uniform(0, min(max_seconds, base_seconds * (2 ** attempt)))
+
+class TokenBucket:
+    """一定の速度で補充されるトークンバケット。"""
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.refill_per_second)
+        self._updated_at = now
+
+    def delay_until_available(self, amount):
+        """amount 個のトークンがそろうまでの秒数を返す (すでにそろっていれば0)。"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self._tokens >= amount:
+            return 0.0
+        return (amount - self._tokens) / self.refill_per_second
+
+    def consume(self, amount):
+        self._refill()
+        self._tokens -= min(amount, self.capacity)
+
+class RequestScheduler:
+    """
+    APIリクエストの実行順と実行タイミングを決めるスケジューラー。イベントループのスレッドでのみ使用する。
+    優先度付きキューで待機させ、同時実行数とモデルごとのRPM/TPMのトークンバケットに空きがあるものから順に実行を許可する。
+    """
+    def __init__(self, config_manager, max_concurrent=4):
+        self.config_manager = config_manager
+        self.max_concurrent = max_concurrent
+        self._queue = [] # (priority, seq, future, model_name, tokens, enqueued_at)
+        self._seq = itertools.count()
+        self._running = 0
+        self._buckets = {} # model_name -> (rpm_bucket, tpm_bucket)
+        self._wakeup_handle = None
+        self._granted = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._retries = 0
+
+    def _buckets_for(self, model_name):
+        buckets = self._buckets.get(model_name)
+        if buckets is None:
+            rpm, tpm = DEFAULT_RATE_LIMIT
+            for prefix, limits in MODEL_RATE_LIMITS.items():
+                if model_name and model_name.startswith(prefix):
+                    rpm, tpm = limits
+                    break
+            # 設定値が0以外であればモデルの既定値より優先する
+            rpm = self.config_manager.get("rate_limit_settings.requests_per_minute", 0) or rpm
+            tpm = self.config_manager.get("rate_limit_settings.tokens_per_minute", 0) or tpm
+            buckets = (TokenBucket(rpm, rpm / 60.0), TokenBucket(tpm, tpm / 60.0))
+            self._buckets[model_name] = buckets
+            logger.debug(f"RequestScheduler: モデル '{model_name}' のレート制限: {rpm} RPM, {tpm} TPM")
+        return buckets
+
+    async def acquire(self, model_name, tokens, priority=PRIORITY_INTERACTIVE):
+        """実行の許可が出るまで待つ。許可された後は、必ず release() を呼び出すこと。"""
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), future, model_name, tokens, time.monotonic()))
+        logger.debug(f"RequestScheduler: キューに追加しました (優先度 {priority}, 待機 {len(self._queue)} 件, 実行中 {self._running} 件)。")
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 許可と同時にキャンセルされた場合は、確保した枠を返す
+                self.release()
+            raise
+
+    def release(self):
+        self._running -= 1
+        self._dispatch()
+
+    def record_retry(self):
+        self._retries += 1
+
+    def _dispatch(self):
+        """キューの先頭から、実行できるリクエストに許可を出す。"""
+        if self._wakeup_handle is not None:
+            self._wakeup_handle.cancel()
+            self._wakeup_handle = None
+        while self._queue and self._running < self.max_concurrent:
+            priority, seq, future, model_name, tokens, enqueued_at = self._queue[0]
+            if future.done():
+                # 待機中にキャンセルされたジョブ
+                heapq.heappop(self._queue)
+                continue
+            rpm_bucket, tpm_bucket = self._buckets_for(model_name)
+            delay = max(rpm_bucket.delay_until_available(1), tpm_bucket.delay_until_available(tokens))
+            if delay > 0:
+                # レート制限に達しているため、トークンが補充される時刻に再度試みる
+                self._wakeup_handle = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                logger.debug(f"RequestScheduler: レート制限のため {delay:.2f} 秒待機します。")
+                break
+            heapq.heappop(self._queue)
+            rpm_bucket.consume(1)
+            tpm_bucket.consume(tokens)
+            self._running += 1
+            wait = time.monotonic() - enqueued_at
+            self._granted += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            future.set_result(None)
+
+    def stats(self):
+        """キューの深さと待ち時間の統計を返す。"""
+        return {
+            "queue_depth": sum(1 for entry in self._queue if not entry[2].done()),
+            "running": self._running,
+            "granted": self._granted,
+            "retries": self._retries,
+            "average_wait_ms": round(self._total_wait / self._granted * 1000, 1) if self._granted else 0.0,
+            "max_wait_ms": round(self._max_wait * 1000, 1),
+        }
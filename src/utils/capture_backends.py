@@ -0,0 +1,272 @@
+import math
+import statistics
+import threading
+import time
+import logging
+
+from src.utils.capture_frame import CaptureFrame
+
+logger = logging.getLogger(__name__)
+
+BACKEND_NAMES = ("mss", "qt", "pil")
+
+class CaptureError(Exception):
+    """画面の取得に失敗したことを表す例外。"""
+    pass
+
+class CaptureBackend:
+    """
+    画面の矩形を取得して CaptureFrame を返すキャプチャバックエンドの基底クラス。
+    座標は仮想デスクトップ (全モニターを合わせた座標系) の物理ピクセルで指定する。
+    """
+    name = ""
+    gui_thread_only = False # True の場合はGUIスレッドからのみ呼び出せる
+
+    def grab(self, x, y, width, height):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class MssBackend(CaptureBackend):
+    """
+    mss で画面を取得するバックエンド。mss のインスタンスは生成に時間がかかり、スレッドをまたいで使えないため、
+    スレッドごとに1つ生成して使い回す。
+    """
+    name = "mss"
+
+    def __init__(self):
+        import mss
+        self._mss = mss
+        self._local = threading.local()
+        self._instances = []
+        self._lock = threading.Lock()
+
+    def _instance(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = self._mss.mss()
+            self._local.sct = sct
+            with self._lock:
+                self._instances.append(sct)
+        return sct
+
+    def grab(self, x, y, width, height):
+        try:
+            return CaptureFrame.from_mss(self._instance().grab({"left": x, "top": y, "width": width, "height": height}))
+        except self._mss.exception.ScreenShotError as e:
+            raise CaptureError(f"mss での画面の取得に失敗しました: {e}") from e
+
+    def close(self):
+        with self._lock:
+            instances, self._instances = self._instances, []
+        for sct in instances:
+            try:
+                sct.close()
+            except Exception:
+                logger.exception("mss のインスタンスの終了中にエラーが発生しました。")
+        self._local = threading.local()
+
+class QtScreenBackend(CaptureBackend):
+    """
+    Qt の QScreen.grabWindow で画面を取得するバックエンド。QScreen はGUIスレッドからのみ使用できる。
+    取得範囲の中心を含むモニターから取得し、物理ピクセルの座標をそのモニターの左上を基準とした論理座標に変換して渡す。
+    """
+    name = "qt"
+    gui_thread_only = True
+
+    def __init__(self):
+        from PyQt5.QtGui import QGuiApplication, QImage
+        if QGuiApplication.instance() is None:
+            raise CaptureError("QApplication が作成されていないため、Qt のキャプチャは使用できません。")
+        self._application = QGuiApplication
+        self._format = QImage.Format_RGB32
+
+    def grab(self, x, y, width, height):
+        screen = screen_at_physical(x + width // 2, y + height // 2) or self._application.primaryScreen()
+        pixmap = screen.grabWindow(0, *physical_to_screen_offset(screen, x, y, width, height))
+        if pixmap.isNull():
+            raise CaptureError("Qt での画面の取得に失敗しました。")
+        # Format_RGB32 のバッファはリトルエンディアンでBGRAの並びのため、CaptureFrame にそのまま渡せる
+        image = pixmap.toImage().convertToFormat(self._format)
+        bits = image.constBits()
+        bits.setsize(image.sizeInBytes())
+        frame_width = image.bytesPerLine() // 4
+        frame = CaptureFrame(bytes(bits), frame_width, image.height(), x, y)
+        if frame_width != image.width():
+            frame = frame.crop(0, 0, image.width(), image.height())
+        return frame
+
+class PilImageGrabBackend(CaptureBackend):
+    """PIL の ImageGrab で画面を取得するバックエンド。Windows では全モニターの仮想デスクトップから取得する。"""
+    name = "pil"
+
+    def __init__(self):
+        from PIL import ImageGrab
+        self._image_grab = ImageGrab
+
+    def grab(self, x, y, width, height):
+        try:
+            image = self._image_grab.grab(bbox=(x, y, x + width, y + height), all_screens=True)
+        except OSError as e:
+            raise CaptureError(f"PIL ImageGrab での画面の取得に失敗しました: {e}") from e
+        return CaptureFrame(bytearray(image.tobytes("raw", "BGRX")), image.width, image.height, x, y)
+
+_BACKEND_CLASSES = {
+    "mss": MssBackend,
+    "qt": QtScreenBackend,
+    "pil": PilImageGrabBackend,
+}
+
+def create_capture_backend(name):
+    """指定した名前のキャプチャバックエンドを生成する。使用できない場合は CaptureError を送出する。"""
+    if name not in _BACKEND_CLASSES:
+        raise CaptureError(f"不明なキャプチャバックエンドです: {name}")
+    try:
+        return _BACKEND_CLASSES[name]()
+    except ImportError as e:
+        raise CaptureError(f"キャプチャバックエンド {name} に必要なモジュールがインストールされていません: {e}") from e
+
+def physical_screen_geometries():
+    """
+    各モニターの (QScreen, (left, top, width, height)) のリストを物理ピクセルで返す。
+    Qt5 ではモニターの左上の位置は物理座標のまま、大きさのみが拡大率で割られるため、大きさにのみ拡大率を掛ける。
+    """
+    from PyQt5.QtGui import QGuiApplication
+    geometries = []
+    for screen in QGuiApplication.screens():
+        geometry = screen.geometry()
+        ratio = screen.devicePixelRatio()
+        geometries.append((screen, (
+            geometry.x(), geometry.y(), round(geometry.width() * ratio), round(geometry.height() * ratio)
+        )))
+    return geometries
+
+def screen_at_physical(x, y):
+    """物理ピクセルの座標 (x, y) を含むモニターの QScreen を返す。どのモニターにも含まれない場合は None を返す。"""
+    for screen, (left, top, width, height) in physical_screen_geometries():
+        if left <= x < left + width and top <= y < top + height:
+            return screen
+    return None
+
+def virtual_desktop_geometry():
+    """全モニターを合わせた仮想デスクトップの範囲 (left, top, width, height) を物理ピクセルで返す。"""
+    geometries = [geometry for _, geometry in physical_screen_geometries()]
+    left = min(geometry[0] for geometry in geometries)
+    top = min(geometry[1] for geometry in geometries)
+    right = max(geometry[0] + geometry[2] for geometry in geometries)
+    bottom = max(geometry[1] + geometry[3] for geometry in geometries)
+    return left, top, right - left, bottom - top
+
+def logical_to_physical(x, y, width, height):
+    """
+    Qt の論理座標の矩形を、矩形の中心を含むモニターの拡大率で物理ピクセルの矩形に変換する。
+    高DPIの拡大が無効な場合 (拡大率 1) はそのままの値になる。
+    """
+    from PyQt5.QtCore import QPoint
+    from PyQt5.QtGui import QGuiApplication
+    screen = QGuiApplication.screenAt(QPoint(x + width // 2, y + height // 2)) or QGuiApplication.primaryScreen()
+    origin = screen.geometry().topLeft()
+    ratio = screen.devicePixelRatio()
+    return (
+        origin.x() + round((x - origin.x()) * ratio), origin.y() + round((y - origin.y()) * ratio),
+        round(width * ratio), round(height * ratio)
+    )
+
+def physical_to_screen_offset(screen, x, y, width, height):
+    """
+    物理ピクセルの矩形を、QScreen.grabWindow(0, ...) に渡す (x, y, width, height) に変換する。
+    Qt5 の grabWindow(0, ...) はモニターの左上を基準とした論理座標を受け取り、Qt が拡大率を掛けてから
+    そのモニターの物理座標に足し合わせる。モニターの左上の位置は物理座標のままのため、左上からの差だけを拡大率で割る
+    (logical_to_physical の逆の変換)。
+    """
+    origin = screen.geometry().topLeft()
+    ratio = screen.devicePixelRatio()
+    return (
+        math.floor((x - origin.x()) / ratio), math.floor((y - origin.y()) / ratio),
+        math.ceil(width / ratio), math.ceil(height / ratio)
+    )
+
+def benchmark_backends(backends, region, rounds=5):
+    """
+    各バックエンドで region (x, y, width, height) を rounds 回取得し、名前 -> 取得時間の中央値 (ms) の辞書を返す。
+    最初の1回は初期化の時間を含むため計測から除く。取得に失敗したバックエンドは含めない。
+    """
+    results = {}
+    for backend in backends:
+        try:
+            backend.grab(*region)
+            timings = []
+            for _ in range(rounds):
+                started = time.perf_counter()
+                backend.grab(*region)
+                timings.append((time.perf_counter() - started) * 1000)
+            results[backend.name] = statistics.median(timings)
+        except Exception as e:
+            logger.warning(f"キャプチャバックエンド {backend.name} の計測中にエラーが発生しました: {e}")
+    return results
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def select_capture_backend(config_manager):
+    """
+    capture_settings.backend のバックエンドを生成して返す。"auto" の場合は使用できるバックエンドを
+    画面中央の capture_settings.benchmark_width x benchmark_height の範囲で計測し、最も速いものを選ぶ。
+    """
+    name = config_manager.get("capture_settings.backend", "auto")
+    if name != "auto":
+        try:
+            backend = create_capture_backend(name)
+            logger.info(f"キャプチャバックエンド {name} を使用します。")
+            return backend
+        except CaptureError as e:
+            logger.error(f"{e} 自動選択に切り替えます。")
+
+    backends = []
+    for candidate in BACKEND_NAMES:
+        try:
+            backends.append(create_capture_backend(candidate))
+        except CaptureError as e:
+            logger.info(f"{e}")
+    if not backends:
+        raise CaptureError("使用できるキャプチャバックエンドがありません。")
+
+    left, top, width, height = virtual_desktop_geometry()
+    region_width = min(width, config_manager.get("capture_settings.benchmark_width", 1280))
+    region_height = min(height, config_manager.get("capture_settings.benchmark_height", 720))
+    region = (left + (width - region_width) // 2, top + (height - region_height) // 2, region_width, region_height)
+    results = benchmark_backends(backends, region, config_manager.get("capture_settings.benchmark_rounds", 5))
+    if not results:
+        for backend in backends:
+            backend.close()
+        raise CaptureError("すべてのキャプチャバックエンドで画面の取得に失敗しました。")
+
+    fastest = min(results, key=results.get)
+    logger.info(
+        f"キャプチャバックエンド {fastest} を使用します (取得時間の中央値 {region[2]}x{region[3]}: "
+        f"{', '.join(f'{name} {elapsed:.1f} ms' for name, elapsed in sorted(results.items(), key=lambda item: item[1]))})"
+    )
+    selected = None
+    for backend in backends:
+        if backend.name == fastest:
+            selected = backend
+        else:
+            backend.close()
+    return selected
+
+def get_capture_backend(config_manager):
+    """アプリケーション全体で共有するキャプチャバックエンドを返す。初回の呼び出しで選択する。"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = select_capture_backend(config_manager)
+        return _backend
+
+def shutdown_capture_backend():
+    """共有しているキャプチャバックエンドを終了する。"""
+    global _backend
+    with _backend_lock:
+        backend, _backend = _backend, None
+    if backend is not None:
+        backend.close()
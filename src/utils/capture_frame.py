@@ -0,0 +1,73 @@
+from PIL import Image
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+class CaptureFrame:
+    """
+    画面キャプチャのピクセルデータ (BGRA, 1ピクセル4バイト) をコピーせずに保持するフレーム。
+    mss の grab() が返すバッファを memoryview で参照し、OCRやエンコードが必要とする形式への変換は
+    必要になった時点で1回だけ行う。
+    """
+    def __init__(self, bgra, width, height, left=0, top=0):
+        self.buffer = memoryview(bgra)
+        self.width = width
+        self.height = height
+        self.left = left # 仮想デスクトップ上の位置
+        self.top = top
+        if self.buffer.nbytes != width * height * 4:
+            raise ValueError(f"バッファサイズ {self.buffer.nbytes} が {width}x{height} のBGRA画像と一致しません。")
+
+    @classmethod
+    def from_mss(cls, sct_img):
+        """mss の ScreenShot から、生のBGRAバッファを共有するフレームを生成する。"""
+        return cls(sct_img.raw, sct_img.width, sct_img.height, sct_img.left, sct_img.top)
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    @property
+    def nbytes(self):
+        return self.buffer.nbytes
+
+    def as_array(self):
+        """
+        バッファを共有する (height, width, 4) のBGRA NumPy配列を返す (コピーなし)。
+        NumPyがインストールされていない場合は None を返す。
+        """
+        if np is None:
+            return None
+        return np.frombuffer(self.buffer, dtype=np.uint8).reshape(self.height, self.width, 4)
+
+    def to_image(self):
+        """BGRAバッファから直接RGBのPIL画像を生成する。中間のRGBバイト列は作らない。"""
+        return Image.frombuffer("RGB", self.size, self.buffer, "raw", "BGRX", 0, 1)
+
+    def crop(self, x, y, width, height):
+        """
+        フレーム内の矩形 (フレーム左上基準の座標) を切り出した新しいフレームを返す。
+        切り出した範囲のピクセルだけがコピーされる。
+        """
+        x = max(0, min(x, self.width))
+        y = max(0, min(y, self.height))
+        width = max(0, min(width, self.width - x))
+        height = max(0, min(height, self.height - y))
+
+        array = self.as_array()
+        if array is not None:
+            cropped = np.ascontiguousarray(array[y:y + height, x:x + width])
+            return CaptureFrame(cropped.data, width, height, self.left + x, self.top + y)
+
+        stride = self.width * 4
+        cropped = bytearray(width * height * 4)
+        row_bytes = width * 4
+        for row in range(height):
+            src = (y + row) * stride + x * 4
+            cropped[row * row_bytes:(row + 1) * row_bytes] = self.buffer[src:src + row_bytes]
+        return CaptureFrame(cropped, width, height, self.left + x, self.top + y)
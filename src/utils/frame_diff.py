@@ -0,0 +1,57 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+def compute_signature(frame, block_size=6):
+    """
+    フレームを block_size 四方のブロックに縮小したグレースケールの署名 (ブロックごとの平均輝度, 0-255 のバイト列) を返す。
+    細い文字の変化も平均に反映されるよう、間引きではなくブロック平均 (PILの reduce) で縮小する。
+    ブロックが文字より大きいと、似た形の文字への置き換えが平均に埋もれるため、文字の線幅程度の大きさにする。
+    """
+    block_size = max(1, min(block_size, frame.width, frame.height))
+    return frame.to_image().convert("L").reduce(block_size).tobytes()
+
+def count_changed_blocks(signature, previous, pixel_threshold=10):
+    """2つの署名で、平均輝度の差が pixel_threshold を超えるブロックの数を返す。比較できない場合はすべてのブロックを変化とみなす。"""
+    if previous is None or len(signature) != len(previous):
+        return len(signature)
+    if signature == previous:
+        # 静止した画面ではバイト列が完全に一致するため、1ブロックずつ比較せずに済む
+        return 0
+    return sum(1 for current, old in zip(signature, previous) if abs(current - old) > pixel_threshold)
+
+class FrameChangeDetector:
+    """
+    連続するフレームの署名を比較し、内容が変化して落ち着いたフレームを検出する。
+    文字送り表示などで変化が続いている間は待ち、settle_frames 回続けて変化がなかった時点で1回だけ新しいフレームと判定する。
+    前回新しいと判定したフレームと同じ内容に戻った場合 (点滅など) は新しいフレームとしない。
+    """
+    def __init__(self, block_size=6, pixel_threshold=10, min_changed_blocks=2, settle_frames=1):
+        self.block_size = block_size
+        self.pixel_threshold = pixel_threshold
+        # 横長の字幕の範囲では1行の変化が全体のごく一部になるため、割合ではなくブロック数で判定する
+        self.min_changed_blocks = min_changed_blocks
+        self.settle_frames = settle_frames
+        self._previous = None # 直前のフレームの署名
+        self._accepted = None # 最後に新しいと判定したフレームの署名
+        self._stable_frames = 0
+        self._pending = True # 変化があり、落ち着くのを待っている
+
+    def is_new(self, frame):
+        """frame が前回の判定以降の新しい内容で、変化が落ち着いたフレームであれば True を返す。"""
+        signature = compute_signature(frame, self.block_size)
+        changed = count_changed_blocks(signature, self._previous, self.pixel_threshold) >= self.min_changed_blocks
+        self._previous = signature
+        if changed:
+            self._stable_frames = 0
+            self._pending = True
+            return False
+        self._stable_frames += 1
+        if not self._pending or self._stable_frames < self.settle_frames:
+            return False
+        self._pending = False
+        if self._accepted is not None and \
+           count_changed_blocks(signature, self._accepted, self.pixel_threshold) < self.min_changed_blocks:
+            return False
+        self._accepted = signature
+        return True
@@ -0,0 +1,78 @@
+import math
+import heapq
+import threading
+from collections import Counter
+from array import array
+import logging
+
+logger = logging.getLogger(__name__)
+
+def trigrams(text):
+    """前後に空白を補った文字列の、文字トライグラムの集合を返す。"""
+    padded = f" {text} "
+    if len(padded) < 3:
+        return {padded}
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TrigramIndex:
+    """
+    文字トライグラムの転置インデックスによる近似文字列検索。類似度はトライグラム集合のDice係数。
+    検索では query のトライグラムの転置リストを走査して共通トライグラム数を数え、そこから類似度を直接求める。
+    類似度の下限から必要な共通トライグラム数を求め、それに満たない候補は類似度を計算せずに除外する。
+    転置リストは array で保持し、数十万件でもメモリ使用量を抑える。複数のスレッドから呼び出してよい。
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ids = {} # key -> id
+        self._keys = [] # id -> key
+        self._payloads = [] # id -> payload
+        self._gram_counts = array('I') # id -> トライグラム数
+        self._postings = {} # trigram -> array of id
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, key, payload):
+        """key を登録する。登録済みの key の場合は payload のみ置き換える。"""
+        with self._lock:
+            entry_id = self._ids.get(key)
+            if entry_id is not None:
+                self._payloads[entry_id] = payload
+                return
+            entry_id = len(self._keys)
+            grams = trigrams(key)
+            self._ids[key] = entry_id
+            self._keys.append(key)
+            self._payloads.append(payload)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                posting = self._postings.get(gram)
+                if posting is None:
+                    posting = self._postings[gram] = array('I')
+                posting.append(entry_id)
+
+    def search(self, query, top_k=3, min_similarity=0.6):
+        """query に類似した key を類似度の高い順に最大 top_k 件、(key, payload, similarity) のリストで返す。"""
+        query_grams = trigrams(query)
+        query_size = len(query_grams)
+        # Dice係数が min_similarity 以上になるために必要な共通トライグラム数
+        min_overlap = max(1, math.ceil(min_similarity * query_size / (2 - min_similarity)))
+
+        with self._lock:
+            # 各エントリが query と共有するトライグラム数を数える (Counter.update はC実装のため転置リストの走査が速い)
+            overlaps = Counter()
+            for gram in query_grams:
+                posting = self._postings.get(gram)
+                if posting:
+                    overlaps.update(posting)
+
+            gram_counts = self._gram_counts
+            results = []
+            for entry_id, overlap in overlaps.items():
+                if overlap < min_overlap:
+                    continue
+                similarity = 2 * overlap / (query_size + gram_counts[entry_id])
+                if similarity >= min_similarity:
+                    results.append((similarity, entry_id))
+            best = heapq.nlargest(top_k, results)
+            return [(self._keys[entry_id], self._payloads[entry_id], similarity) for similarity, entry_id in best]
@@ -0,0 +1,192 @@
+import os
+import time
+from collections import deque
+import yaml
+import logging
+
+logger = logging.getLogger(__name__)
+
+class GlossaryError(Exception):
+    """用語集ファイルの読み込みに失敗したことを表す例外。"""
+    pass
+
+class GlossaryEntry:
+    """用語集の1項目 (原文の用語、訳語、備考)。"""
+    def __init__(self, source, target, note=""):
+        self.source = source
+        self.target = target
+        self.note = note
+
+def _normalize(text):
+    # OCRの改行や連続した空白で用語が分断されても一致するよう、空白を1文字にまとめてから照合する
+    return " ".join(text.split()).casefold()
+
+def _is_word_char(char):
+    # 英数字の用語のみ単語境界を確認する (日本語には単語の区切りがないため)
+    return char.isascii() and char.isalnum()
+
+class AhoCorasickMatcher:
+    """
+    Aho-Corasick法による複数パターンの同時検索。パターン数によらず、テキストの長さに比例する時間で検索できる。
+    構築後は変更しないため、複数のスレッドから検索してよい。
+    """
+    def __init__(self, patterns):
+        self._goto = [{}] # 状態 -> {文字: 次の状態}
+        self._fail = [0]
+        self._outputs = [()] # 状態 -> その状態で一致するパターン番号
+        self._lengths = []
+        for pattern_id, pattern in enumerate(patterns):
+            self._add(pattern_id, pattern)
+        self._build_failure_links()
+
+    def _add(self, pattern_id, pattern):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append(())
+            state = next_state
+        self._outputs[state] = self._outputs[state] + (pattern_id,)
+        self._lengths.append(len(pattern))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                # 失敗遷移先で一致するパターン (接尾辞) も出力に含めておく
+                self._outputs[next_state] += self._outputs[self._fail[next_state]]
+
+    def find_all(self, text):
+        """text 中で一致したパターンを (開始位置, 終了位置, パターン番号) のリストで返す。"""
+        goto, fail, outputs, lengths = self._goto, self._fail, self._outputs, self._lengths
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in outputs[state]:
+                end = position + 1
+                matches.append((end - lengths[pattern_id], end, pattern_id))
+        return matches
+
+class Glossary:
+    """
+    原文の用語 -> 訳語 の用語集。用語集全体から Aho-Corasick の照合器を起動時に1回だけ構築し、
+    キャプチャごとにOCRテキストに含まれる用語だけを取り出してプロンプトに含める。
+    用語集が大きくなっても、1リクエストに含める用語は表示されているものだけに限られる。
+    """
+    def __init__(self, entries):
+        start = time.perf_counter()
+        unique = {}
+        for entry in entries:
+            key = _normalize(entry.source)
+            if key:
+                unique[key] = entry # 同じ用語が複数ある場合は後の項目を優先する
+        self._keys = list(unique)
+        self._entries = list(unique.values())
+        self._matcher = AhoCorasickMatcher(self._keys)
+        logger.debug(f"Glossary: {len(self._entries)} 件の用語の照合器を構築しました ({(time.perf_counter() - start) * 1000:.0f} ms)。")
+
+    def __len__(self):
+        return len(self._entries)
+
+    @classmethod
+    def load(cls, path):
+        """
+        用語集ファイルを読み込む。
+        .yaml / .yml は「原文: 訳語」または「原文: {translation: 訳語, note: 備考}」のマッピング、
+        それ以外は1行に「原文<TAB>訳語<TAB>備考 (省略可)」を記載したUTF-8のテキスト (# で始まる行はコメント) とする。
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+                    entries = cls._entries_from_yaml(yaml.safe_load(f) or {})
+                else:
+                    entries = cls._entries_from_tsv(f)
+        except (OSError, yaml.YAMLError, ValueError) as e:
+            raise GlossaryError(f"用語集ファイル '{path}' を読み込めませんでした: {e}")
+        return cls(entries)
+
+    @staticmethod
+    def _entries_from_yaml(data):
+        if not isinstance(data, dict):
+            raise ValueError("用語集は「原文: 訳語」のマッピングで記載してください。")
+        entries = []
+        for source, value in data.items():
+            if isinstance(value, dict):
+                entries.append(GlossaryEntry(str(source), str(value.get("translation", "")), str(value.get("note", "") or "")))
+            else:
+                entries.append(GlossaryEntry(str(source), str(value)))
+        return entries
+
+    @staticmethod
+    def _entries_from_tsv(lines):
+        entries = []
+        for line_number, line in enumerate(lines, start=1):
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            columns = line.split("\t")
+            if len(columns) < 2:
+                logger.warning(f"Glossary: {line_number} 行目は「原文<TAB>訳語」の形式ではないため無視します: {line}")
+                continue
+            entries.append(GlossaryEntry(columns[0].strip(), columns[1].strip(), columns[2].strip() if len(columns) > 2 else ""))
+        return entries
+
+    def match(self, text, max_terms=50):
+        """
+        text に含まれる用語を、出現順に最大 max_terms 件の GlossaryEntry のリストで返す。
+        重なり合う用語は、先に始まり長いもの (例: "Imperial Courier" と "Courier" では前者) を優先する。
+        """
+        if not text or not self._entries:
+            return []
+        normalized = _normalize(text)
+        candidates = []
+        for start, end, pattern_id in self._matcher.find_all(normalized):
+            key = self._keys[pattern_id]
+            # 英数字の用語は単語の途中で一致したものを除外する (例: "SHIP" の中の "HP")
+            if _is_word_char(key[0]) and start > 0 and _is_word_char(normalized[start - 1]):
+                continue
+            if _is_word_char(key[-1]) and end < len(normalized) and _is_word_char(normalized[end]):
+                continue
+            candidates.append((start, -end, pattern_id))
+
+        matched = []
+        seen = set()
+        covered_until = 0
+        for start, negative_end, pattern_id in sorted(candidates):
+            if start < covered_until:
+                continue
+            covered_until = -negative_end
+            if pattern_id not in seen:
+                seen.add(pattern_id)
+                matched.append(self._entries[pattern_id])
+                if len(matched) >= max_terms:
+                    break
+        return matched
+
+    @staticmethod
+    def format_prompt(entries):
+        """用語集の項目をプロンプトに追加する文字列にする。"""
+        if not entries:
+            return ""
+        lines = "\n".join(
+            f"- {entry.source} → {entry.target}" + (f" ({entry.note})" if entry.note else "")
+            for entry in entries
+        )
+        return (
+            "\n\n--- 用語集 ---\n"
+            f"{lines}\n"
+            "上記の用語は、用語集の訳語を使用してください。"
+        )
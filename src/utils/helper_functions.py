@@ -5,6 +5,8 @@ import logging # logging モジュールを追加
 from pynput import keyboard
 from PyQt5.QtCore import Qt, QTimer, QObject, pyqtSignal, QMetaObject, Q_ARG, QGenericArgument # QMetaObject, Q_ARG, QGenericArgument を追加
 
+from src.utils.history_store import get_history_store
+
 logger = logging.getLogger(__name__) # このモジュール用のロガーを取得
 
 # --- ホットキーの状態を通知するためのシグナルクラス ---
@@ -19,11 +21,11 @@ hotkey_signal = HotkeySignal()
 WIN32_AVAILABLE = True # pynputがWindowsで動作する限りTrueとみなす
 
 # --- 翻訳履歴の保存/読み込み関数 ---
+# 履歴の実体は HistoryStore (SQLite) が管理する。history_file_path にはデータベースのパスを渡す。
 def save_translation_history(history_file_path, history_data):
-    """翻訳履歴データをファイルに保存する。"""
+    """翻訳履歴データ全体をファイルに保存する (既存の履歴は置き換えられる)。"""
     try:
-        with open(history_file_path, 'w', encoding='utf-8') as f:
-            json.dump(history_data, f, ensure_ascii=False, indent=4)
+        get_history_store(history_file_path).replace_all(history_data)
         logger.debug(f"翻訳履歴を '{history_file_path}' に保存しました。")
     except Exception as e:
         logger.exception(f"翻訳履歴の保存中にエラーが発生しました。")
@@ -31,28 +33,34 @@ def save_translation_history(history_file_path, history_data):
 def load_translation_history(history_file_path):
     """翻訳履歴データをファイルから読み込む。"""
     history = []
-    if os.path.exists(history_file_path):
-        try:
-            with open(history_file_path, 'r', encoding='utf-8') as f:
-                history = json.load(f)
-            logger.debug(f"翻訳履歴を '{history_file_path}' から読み込みました。")
-        except json.JSONDecodeError as e:
-            logger.error(f"翻訳履歴ファイル '{history_file_path}' の読み込み中にJSONデコードエラーが発生しました: {e}")
-        except Exception as e:
-            logger.exception(f"翻訳履歴の読み込み中にエラーが発生しました。")
+    try:
+        history = get_history_store(history_file_path).load_all()
+        logger.debug(f"翻訳履歴を '{history_file_path}' から読み込みました。")
+    except Exception as e:
+        logger.exception(f"翻訳履歴の読み込み中にエラーが発生しました。")
     return history
 
-def add_translation_entry(history_data, original_text, translation, explanation):
-    """新しい翻訳エントリを履歴に追加する。"""
-    new_entry = {
+def _make_translation_entry(original_text, translation, explanation):
+    return {
         "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "original_text": original_text,
         "translation": translation,
         "explanation": explanation
     }
-    history_data.append(new_entry)
+
+def add_translation_entry(history_data, original_text, translation, explanation):
+    """新しい翻訳エントリを履歴に追加する。"""
+    history_data.append(_make_translation_entry(original_text, translation, explanation))
     logger.debug("新しい翻訳エントリを履歴に追加しました。")
 
+def append_translation_entry(history_file_path, original_text, translation, explanation):
+    """新しい翻訳エントリを履歴ファイルに直接追記する。既存の履歴は読み込まない。"""
+    try:
+        get_history_store(history_file_path).append(_make_translation_entry(original_text, translation, explanation))
+        logger.debug(f"新しい翻訳エントリを '{history_file_path}' に追記しました。")
+    except Exception as e:
+        logger.exception(f"翻訳履歴の追記中にエラーが発生しました。")
+
 # --- pynputのキーオブジェクトからVKコードとキー名を取得するヘルパー関数 ---
 def get_vk_code_from_key(key):
     """pynputのKeyオブジェクトから仮想キーコード（Windows）を取得する。"""
@@ -0,0 +1,300 @@
+import os
+import json
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class HistoryStore:
+    """
+    翻訳履歴を保存するSQLite (WALモード) バックエンド。
+    1件の追加は1トランザクションのINSERTのみで完了し、履歴の件数に依存しない。
+    旧形式の translation_history.json が存在する場合は、初回のみ取り込む。
+    原文・翻訳・解説にはFTS5の全文検索インデックスを張り、ページ単位で検索できる。
+    同じデータベースに、行・セグメント単位の翻訳メモリ (translation_memory テーブル) も保存する。
+    """
+    ENTRY_FIELDS = ("timestamp", "original_text", "translation", "explanation")
+    SEARCH_FIELDS = ("original_text", "translation", "explanation")
+
+    def __init__(self, db_path, legacy_json_path=None):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        # ワーカースレッドからも参照されるため check_same_thread=False とし、ロックで保護する
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # 履歴はキャッシュと異なり失いたくないため、コミットごとに同期する
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT,
+                original_text TEXT,
+                translation TEXT,
+                explanation TEXT
+            )"""
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS translation_memory (
+                segment_key TEXT PRIMARY KEY,
+                segment TEXT,
+                translation TEXT,
+                hits INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT
+            )"""
+        )
+        self._conn.commit()
+        self.fts_tokenizer = self._create_fts_index()
+        logger.debug(f"HistoryStore: '{db_path}' を開きました。")
+
+        if legacy_json_path:
+            self._migrate_from_json(legacy_json_path)
+
+    def _create_fts_index(self):
+        """
+        全文検索インデックス (FTS5) を作成し、使用したトークナイザ名を返す。
+        日本語は空白で区切られないため trigram トークナイザを優先し、使えない場合は unicode61 にする。
+        FTS5自体が使えないSQLiteの場合は None を返し、検索はLIKEで行う。
+        """
+        exists = self._conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'history_fts'"
+        ).fetchone()
+        if exists is not None:
+            return "trigram" if "trigram" in exists[0] else "unicode61"
+
+        for tokenizer in ("trigram", "unicode61"):
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "CREATE VIRTUAL TABLE history_fts USING fts5("
+                        "original_text, translation, explanation, "
+                        f"content='history', content_rowid='id', tokenize='{tokenizer}')"
+                    )
+                    # 本体テーブルの変更をインデックスへ反映するトリガー
+                    self._conn.execute(
+                        """CREATE TRIGGER IF NOT EXISTS history_ai AFTER INSERT ON history BEGIN
+                            INSERT INTO history_fts(rowid, original_text, translation, explanation)
+                            VALUES (new.id, new.original_text, new.translation, new.explanation);
+                        END"""
+                    )
+                    self._conn.execute(
+                        """CREATE TRIGGER IF NOT EXISTS history_ad AFTER DELETE ON history BEGIN
+                            INSERT INTO history_fts(history_fts, rowid, original_text, translation, explanation)
+                            VALUES ('delete', old.id, old.original_text, old.translation, old.explanation);
+                        END"""
+                    )
+                    self._conn.execute(
+                        """CREATE TRIGGER IF NOT EXISTS history_au AFTER UPDATE ON history BEGIN
+                            INSERT INTO history_fts(history_fts, rowid, original_text, translation, explanation)
+                            VALUES ('delete', old.id, old.original_text, old.translation, old.explanation);
+                            INSERT INTO history_fts(rowid, original_text, translation, explanation)
+                            VALUES (new.id, new.original_text, new.translation, new.explanation);
+                        END"""
+                    )
+                    # 既存の履歴をインデックスに取り込む
+                    self._conn.execute("INSERT INTO history_fts(history_fts) VALUES ('rebuild')")
+                logger.debug(f"HistoryStore: 全文検索インデックスを作成しました (tokenizer={tokenizer})。")
+                return tokenizer
+            except sqlite3.OperationalError as e:
+                logger.warning(f"HistoryStore: tokenizer={tokenizer} で全文検索インデックスを作成できませんでした: {e}")
+        logger.warning("HistoryStore: FTS5が利用できないため、履歴検索はLIKEで行います。")
+        return None
+
+    def _migrate_from_json(self, legacy_json_path):
+        """旧形式のJSON履歴を一度だけ取り込む。元のJSONファイルは削除しない。"""
+        with self._lock:
+            migrated = self._conn.execute("SELECT value FROM meta WHERE key = 'migrated_from_json'").fetchone()
+            if migrated is not None or not os.path.exists(legacy_json_path):
+                return
+            try:
+                with open(legacy_json_path, 'r', encoding='utf-8') as f:
+                    legacy_history = json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                logger.error(f"HistoryStore: 旧形式の履歴ファイル '{legacy_json_path}' を読み込めませんでした: {e}")
+                return
+
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO history (timestamp, original_text, translation, explanation) VALUES (?, ?, ?, ?)",
+                    [self._entry_to_row(entry) for entry in legacy_history if isinstance(entry, dict)]
+                )
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('migrated_from_json', ?)", (legacy_json_path,)
+                )
+            logger.info(f"HistoryStore: '{legacy_json_path}' から {len(legacy_history)} 件の履歴を移行しました。")
+
+    @classmethod
+    def _entry_to_row(cls, entry):
+        return tuple(entry.get(field, "") for field in cls.ENTRY_FIELDS)
+
+    @classmethod
+    def _row_to_entry(cls, row):
+        return dict(zip(cls.ENTRY_FIELDS, row))
+
+    def append(self, entry):
+        """履歴エントリを1件追加し、そのIDを返す。"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO history (timestamp, original_text, translation, explanation) VALUES (?, ?, ?, ?)",
+                self._entry_to_row(entry)
+            )
+            return cursor.lastrowid
+
+    def load_all(self):
+        """すべての履歴エントリを古い順のリストとして返す。"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT timestamp, original_text, translation, explanation FROM history ORDER BY id"
+            ).fetchall()
+        return [self._row_to_entry(row) for row in rows]
+
+    def replace_all(self, entries):
+        """履歴全体を置き換える。"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM history")
+            self._conn.executemany(
+                "INSERT INTO history (timestamp, original_text, translation, explanation) VALUES (?, ?, ?, ?)",
+                [self._entry_to_row(entry) for entry in entries]
+            )
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    SUMMARY_LENGTH = 60 # 一覧表示用に取得する原文の最大文字数
+
+    def _summary_columns(self, table_alias=""):
+        prefix = f"{table_alias}." if table_alias else ""
+        return f"{prefix}id, {prefix}timestamp, substr({prefix}original_text, 1, {self.SUMMARY_LENGTH})"
+
+    @staticmethod
+    def _row_to_summary(row):
+        return {"id": row[0], "timestamp": row[1], "original_text": row[2] or ""}
+
+    def fetch_page(self, limit, before_id=None):
+        """
+        新しい順に並べた履歴の一覧用サマリ (id, timestamp, 原文の先頭部分) を返す。
+        before_id を指定すると、そのIDより古いエントリから取得する (キーセットページング)。
+        """
+        with self._lock:
+            if before_id is None:
+                rows = self._conn.execute(
+                    f"SELECT {self._summary_columns()} FROM history ORDER BY id DESC LIMIT ?", (limit,)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    f"SELECT {self._summary_columns()} FROM history WHERE id < ? ORDER BY id DESC LIMIT ?",
+                    (before_id, limit)
+                ).fetchall()
+        return [self._row_to_summary(row) for row in rows]
+
+    def get_entry(self, entry_id):
+        """IDを指定して履歴エントリを1件取得する。存在しない場合は None を返す。"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT timestamp, original_text, translation, explanation FROM history WHERE id = ?", (entry_id,)
+            ).fetchone()
+        return dict(self._row_to_entry(row), id=entry_id) if row is not None else None
+
+    def search(self, query, limit, offset=0):
+        """
+        原文・翻訳・解説を全文検索し、関連度順 (bm25) に並べた結果の一覧用サマリを返す。
+        クエリは空白区切りの語のAND検索として扱う。
+        """
+        terms = [term for term in query.split() if term]
+        if not terms:
+            return []
+
+        # trigram トークナイザは3文字未満の語を検索できないため、その場合はLIKEで検索する
+        use_fts = self.fts_tokenizer is not None and \
+            not (self.fts_tokenizer == "trigram" and any(len(term) < 3 for term in terms))
+        with self._lock:
+            if use_fts:
+                match_query = " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+                rows = self._conn.execute(
+                    f"SELECT {self._summary_columns('h')} "
+                    "FROM history_fts JOIN history AS h ON h.id = history_fts.rowid "
+                    "WHERE history_fts MATCH ? ORDER BY bm25(history_fts) LIMIT ? OFFSET ?",
+                    (match_query, limit, offset)
+                ).fetchall()
+            else:
+                conditions = []
+                params = []
+                for term in terms:
+                    pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                    conditions.append("(" + " OR ".join(f"{field} LIKE ? ESCAPE '\\'" for field in self.SEARCH_FIELDS) + ")")
+                    params.extend([pattern] * len(self.SEARCH_FIELDS))
+                rows = self._conn.execute(
+                    f"SELECT {self._summary_columns()} FROM history "
+                    f"WHERE {' AND '.join(conditions)} ORDER BY id DESC LIMIT ? OFFSET ?",
+                    params + [limit, offset]
+                ).fetchall()
+        return [self._row_to_summary(row) for row in rows]
+
+    def lookup_segments(self, segment_keys):
+        """翻訳メモリからセグメントの訳文を検索し、{segment_key: translation} を返す。見つかったセグメントのヒット数を加算する。"""
+        keys = list(dict.fromkeys(segment_keys))
+        if not keys:
+            return {}
+        found = {}
+        with self._lock, self._conn:
+            # SQLiteのパラメータ数の上限を超えないよう、分割して検索する
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT segment_key, translation FROM translation_memory WHERE segment_key IN ({placeholders})", chunk
+                ).fetchall()
+                found.update(rows)
+            if found:
+                self._conn.executemany(
+                    "UPDATE translation_memory SET hits = hits + 1 WHERE segment_key = ?", [(key,) for key in found]
+                )
+        return found
+
+    def store_segments(self, rows):
+        """(segment_key, segment, translation) のリストを翻訳メモリに登録する。同じキーは新しい訳文で上書きする。"""
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """INSERT INTO translation_memory (segment_key, segment, translation, updated_at)
+                   VALUES (?, ?, ?, datetime('now'))
+                   ON CONFLICT(segment_key) DO UPDATE SET
+                       segment = excluded.segment, translation = excluded.translation, updated_at = excluded.updated_at""",
+                rows
+            )
+
+    def load_segments(self):
+        """翻訳メモリのすべての (segment_key, segment, translation) を返す。"""
+        with self._lock:
+            return self._conn.execute("SELECT segment_key, segment, translation FROM translation_memory").fetchall()
+
+    def count_segments(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM translation_memory").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+        logger.debug(f"HistoryStore: '{self.db_path}' を閉じました。")
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_history_store(db_path, legacy_json_path=None):
+    """パスごとに1つの HistoryStore を生成して使い回す。"""
+    key = os.path.abspath(db_path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = HistoryStore(db_path, legacy_json_path=legacy_json_path)
+            _stores[key] = store
+        return store
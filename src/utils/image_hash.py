@@ -0,0 +1,98 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+
+def compute_dhash(image, hash_size=8):
+    """
+    PIL画像から差分ハッシュ (dHash) を計算する。
+    グレースケールに変換して (hash_size+1) x hash_size に縮小し、隣接ピクセルの明暗差をビット列にする。
+    数ピクセルのずれやカーソルの点滅程度の変化ではハッシュはほとんど変わらない。
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size))
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (1 if pixels[offset + col] > pixels[offset + col + 1] else 0)
+    return value
+
+def hamming_distance(a, b):
+    """2つのハッシュ値のハミング距離を返す。"""
+    return bin(a ^ b).count("1")
+
+class PerceptualHashIndex:
+    """
+    知覚ハッシュの近傍検索インデックス (Multi-Index Hashing)。
+    64ビットのハッシュを (max_distance + 1) 個のバンドに分割し、バンドごとに完全一致の辞書を持つ。
+    鳩の巣原理により、距離が max_distance 以下のハッシュは少なくとも1つのバンドが完全一致するため、
+    全件走査せずに候補だけを距離計算すればよい。
+    """
+    def __init__(self, max_distance=4, hash_bits=HASH_BITS):
+        if max_distance < 0 or max_distance >= hash_bits:
+            raise ValueError(f"max_distance は 0 以上 {hash_bits} 未満で指定してください: {max_distance}")
+        self.max_distance = max_distance
+        self.hash_bits = hash_bits
+
+        band_count = max_distance + 1
+        base_width, remainder = divmod(hash_bits, band_count)
+        self._bands = [] # (shift, mask) のリスト
+        shift = 0
+        for i in range(band_count):
+            width = base_width + (1 if i < remainder else 0)
+            self._bands.append((shift, (1 << width) - 1))
+            shift += width
+        self._tables = [{} for _ in self._bands]
+        self._entries = {} # payload -> hash_value
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _band_values(self, hash_value):
+        return [(hash_value >> shift) & mask for shift, mask in self._bands]
+
+    def add(self, hash_value, payload):
+        """ハッシュ値とペイロード (キャッシュキーなど) を登録する。同じペイロードは上書きされる。"""
+        if payload in self._entries:
+            self.remove(payload)
+        self._entries[payload] = hash_value
+        for table, band_value in zip(self._tables, self._band_values(hash_value)):
+            table.setdefault(band_value, set()).add(payload)
+
+    def remove(self, payload):
+        """ペイロードをインデックスから削除する。"""
+        hash_value = self._entries.pop(payload, None)
+        if hash_value is None:
+            return
+        for table, band_value in zip(self._tables, self._band_values(hash_value)):
+            bucket = table.get(band_value)
+            if bucket is not None:
+                bucket.discard(payload)
+                if not bucket:
+                    del table[band_value]
+
+    def find_nearest(self, hash_value, max_distance=None):
+        """
+        最も近いエントリを検索する。
+        距離が max_distance (省略時はインデックスの閾値) 以下のものがあれば (payload, distance) を、なければ None を返す。
+        """
+        if max_distance is None or max_distance > self.max_distance:
+            max_distance = self.max_distance
+        best = None
+        seen = set()
+        for table, band_value in zip(self._tables, self._band_values(hash_value)):
+            bucket = table.get(band_value)
+            if not bucket:
+                continue
+            for payload in bucket:
+                if payload in seen:
+                    continue
+                seen.add(payload)
+                distance = hamming_distance(hash_value, self._entries[payload])
+                if distance <= max_distance and (best is None or distance < best[1]):
+                    best = (payload, distance)
+                    if distance == 0:
+                        return best
+        return best
@@ -0,0 +1,102 @@
+from PIL import Image, ImageChops, ImageOps
+from io import BytesIO
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 設定値の形式名 -> (PILの保存形式, MIMEタイプ, 拡張子)
+UPLOAD_FORMATS = {
+    "png": ("PNG", "image/png", "png"),
+    "webp": ("WEBP", "image/webp", "webp"),
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+    "jpg": ("JPEG", "image/jpeg", "jpg"),
+}
+
+class PreparedImage:
+    """API送信用に加工・エンコードした画像。"""
+    def __init__(self, data, mime_type, extension, size, original_size):
+        self.data = data
+        self.mime_type = mime_type
+        self.extension = extension
+        self.size = size # 加工後の (幅, 高さ)
+        self.original_size = original_size # 加工前の (幅, 高さ)
+
+def crop_empty_margins(image, tolerance=16, padding=8):
+    """
+    画像の四隅の色を背景色とみなし、背景だけが続く余白を切り落とす。
+    テキストなどの内容がある範囲の周囲に padding ピクセルの余白を残す。
+    """
+    gray = image.convert("L")
+    width, height = gray.size
+    corners = [gray.getpixel((0, 0)), gray.getpixel((width - 1, 0)),
+               gray.getpixel((0, height - 1)), gray.getpixel((width - 1, height - 1))]
+    background = sorted(corners)[len(corners) // 2]
+    diff = ImageChops.difference(gray, Image.new("L", gray.size, background))
+    mask = diff.point(lambda value: 255 if value > tolerance else 0)
+    bbox = mask.getbbox()
+    if bbox is None:
+        return image
+    left = max(bbox[0] - padding, 0)
+    top = max(bbox[1] - padding, 0)
+    right = min(bbox[2] + padding, width)
+    bottom = min(bbox[3] + padding, height)
+    if (left, top, right, bottom) == (0, 0, width, height):
+        return image
+    return image.crop((left, top, right, bottom))
+
+def prepare_upload_image(image, config_manager):
+    """
+    upload_settings に従って画像を加工・エンコードし、PreparedImage を返す。
+    余白の切り落とし → 長辺の縮小 → グレースケール化 → コントラスト正規化 の順に適用する。
+    """
+    start = time.perf_counter()
+    original_size = image.size
+    original_image = image
+
+    format_name = str(config_manager.get("upload_settings.format", "png")).lower()
+    if format_name not in UPLOAD_FORMATS:
+        logger.warning(f"未対応の画像形式 '{format_name}' が設定されています。PNGを使用します。")
+        format_name = "png"
+    pil_format, mime_type, extension = UPLOAD_FORMATS[format_name]
+    quality = config_manager.get("upload_settings.quality", 90)
+    max_long_edge = config_manager.get("upload_settings.max_long_edge", 0)
+
+    if config_manager.get("upload_settings.crop_margins", False):
+        image = crop_empty_margins(image, padding=config_manager.get("upload_settings.margin_padding", 8))
+
+    if max_long_edge and max(image.size) > max_long_edge:
+        scale = max_long_edge / max(image.size)
+        image = image.resize(
+            (max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS
+        )
+
+    if config_manager.get("upload_settings.grayscale", False):
+        image = image.convert("L")
+
+    if config_manager.get("upload_settings.normalize_contrast", False):
+        image = ImageOps.autocontrast(image, cutoff=1)
+
+    buffer = BytesIO()
+    if pil_format == "PNG":
+        image.save(buffer, pil_format)
+    else:
+        image.save(buffer, pil_format, quality=quality)
+    data = buffer.getvalue()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    savings = ""
+    if config_manager.get("upload_settings.measure_savings", False):
+        # 比較の基準は、加工せずにPNGで送信していた従来の画像。画像全体をもう一度エンコードするため、計測時のみ有効にする
+        if image is original_image and pil_format == "PNG":
+            baseline_bytes = len(data)
+        else:
+            baseline_buffer = BytesIO()
+            original_image.save(baseline_buffer, "PNG")
+            baseline_bytes = len(baseline_buffer.getvalue())
+        savings = f" (加工なしのPNG {baseline_bytes} bytes から {baseline_bytes - len(data)} bytes 削減)"
+    logger.debug(
+        f"prepare_upload_image: {original_size[0]}x{original_size[1]} -> {image.width}x{image.height} {format_name}, "
+        f"{len(data)} bytes{savings}, {elapsed_ms:.1f} ms"
+    )
+    return PreparedImage(data, mime_type, extension, image.size, original_size)
@@ -0,0 +1,152 @@
+from PIL import Image
+import time
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+_numpy_warning_logged = False
+_experimental_warning_logged = False
+
+def _parse_color(value):
+    """"#RRGGBB" または [R, G, B] を (R, G, B) にする。"""
+    if isinstance(value, str):
+        value = value.lstrip("#")
+        return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+    return tuple(int(channel) for channel in value[:3])
+
+def _to_gray(rgb_source, channels):
+    """RGBの各チャンネルから輝度 (ITU-R BT.601) を整数演算で求め、uint8 の2次元配列を返す。"""
+    red, green, blue = (rgb_source[..., index].astype(np.uint16) for index in channels)
+    return ((77 * red + 150 * green + 29 * blue) >> 8).astype(np.uint8)
+
+def _color_key_mask(rgb_source, channels, color_keys):
+    """color_keys のいずれかの色に近い画素を True とするマスクを返す。"""
+    planes = [rgb_source[..., index].astype(np.int32) for index in channels]
+    mask = np.zeros(planes[0].shape, dtype=bool)
+    for key in color_keys:
+        color = _parse_color(key.get("color", "#FFFFFF"))
+        tolerance = int(key.get("tolerance", 40))
+        distance = np.zeros(planes[0].shape, dtype=np.int32)
+        for plane, value in zip(planes, color):
+            diff = plane - value
+            distance += diff * diff
+        mask |= distance <= tolerance * tolerance
+    return mask
+
+def _adaptive_threshold(gray, block_size, offset):
+    """
+    各画素を周囲 block_size 四方の平均輝度と比べて二値化する (文字が黒 0、背景が白 255)。
+    周囲の平均は積分画像から求めるため、block_size によらず画素数に比例する時間で済む。
+    """
+    height, width = gray.shape
+    radius = max(1, block_size // 2)
+    size = 2 * radius + 1
+    dtype = np.int64 if height * width * 255 >= 2 ** 31 else np.int32
+    # 周囲を 0 で埋めた画像の積分画像を作り、各画素の範囲の合計をスライスの足し引きだけで求める
+    integral = np.zeros((height + size, width + size), dtype=dtype)
+    np.cumsum(
+        np.cumsum(np.pad(gray, radius), axis=0, dtype=dtype), axis=1, out=integral[1:, 1:]
+    )
+    sums = integral[size:, size:] - integral[:-size, size:] - integral[size:, :-size] + integral[:-size, :-size]
+    # 画像の端では範囲が画像外にはみ出すため、画像内の画素数で平均する
+    rows = np.arange(height)
+    cols = np.arange(width)
+    row_counts = np.minimum(rows + radius + 1, height) - np.maximum(rows - radius, 0)
+    col_counts = np.minimum(cols + radius + 1, width) - np.maximum(cols - radius, 0)
+    counts = (row_counts[:, None] * col_counts[None, :]).astype(dtype)
+    # gray < 平均 - offset を、割り算を避けて gray * counts < sums - offset * counts として判定する
+    is_text = gray.astype(dtype) * counts < sums - offset * counts
+    return np.where(is_text, 0, 255).astype(np.uint8)
+
+def _upscale(gray_image, settings):
+    below_height = settings.get("upscale_below_height", 400)
+    factor = settings.get("upscale_factor", 2.0)
+    if below_height and factor > 1 and gray_image.height < below_height:
+        return gray_image.resize(
+            (round(gray_image.width * factor), round(gray_image.height * factor)), Image.BICUBIC
+        )
+    return gray_image
+
+def prepare_ocr_image(image, config_manager, bgra=None):
+    """
+    ocr_settings.preprocessing に従ってOCR用の画像を作成し、PIL画像を返す。
+    色キーによるHUD文字の抽出 → グレースケール化 → 明暗の反転 → 小さい文字の拡大 → 適応的二値化 の順に適用する。
+    bgra には CaptureFrame.as_array() の配列を渡すと、キャプチャのバッファを直接読み取る (RGBへの変換を待たない)。
+    NumPyがない場合はグレースケール化と拡大のみを行う。無効な場合 (既定) は image をそのまま返す。
+    前処理によってOCRの精度が下がらないことは画面の種類に依存するため、試験的な機能として既定では無効にしている
+    (手元のスクリーンショットでの精度は benchmarks/bench_ocr_preprocessing.py --fixtures で確認できる)。
+    """
+    global _numpy_warning_logged, _experimental_warning_logged
+    settings = config_manager.get("ocr_settings.preprocessing", {}) or {}
+    if not settings.get("enabled", False):
+        return image
+    if not _experimental_warning_logged:
+        logger.warning("OCRの前処理は試験的な機能です。OCRの結果が悪くなる場合は ocr_settings.preprocessing.enabled を false にしてください。")
+        _experimental_warning_logged = True
+
+    timings = []
+    start = last = time.perf_counter()
+    def mark(step):
+        nonlocal last
+        now = time.perf_counter()
+        timings.append(f"{step} {(now - last) * 1000:.1f} ms")
+        last = now
+
+    if np is None:
+        if not _numpy_warning_logged:
+            logger.warning("NumPyがインストールされていないため、OCRの前処理はグレースケール化と拡大のみを行います。")
+            _numpy_warning_logged = True
+        result = image.convert("L") if settings.get("grayscale", True) else image
+        mark("grayscale")
+        result = _upscale(result, settings)
+        mark("upscale")
+        logger.debug(f"OCR前処理 ({image.width}x{image.height}): {', '.join(timings)}")
+        return result
+
+    if bgra is not None:
+        source, channels = bgra, (2, 1, 0)
+    else:
+        source, channels = np.asarray(image.convert("RGB")), (0, 1, 2)
+    mark("load")
+
+    color_keys = settings.get("color_keys") or []
+    binary = None
+    if color_keys:
+        # 既知のHUDの文字色に近い画素だけを文字として残す (背景は色に関係なく白にする)
+        mask = _color_key_mask(source, channels, color_keys)
+        binary = np.where(mask, 0, 255).astype(np.uint8)
+        mark("color_key")
+
+    if binary is None:
+        if settings.get("grayscale", True) or settings.get("adaptive_threshold", True):
+            gray = _to_gray(source, channels)
+            mark("grayscale")
+            invert = settings.get("invert", "auto")
+            # Tesseract は明るい背景の暗い文字を前提とするため、暗い背景の画面は反転する
+            if invert is True or (invert == "auto" and gray.mean() < 128):
+                gray = 255 - gray
+                mark("invert")
+            result = _upscale(Image.fromarray(gray), settings)
+            mark("upscale")
+            if settings.get("adaptive_threshold", True):
+                result = Image.fromarray(_adaptive_threshold(
+                    np.asarray(result), settings.get("threshold_block_size", 31), settings.get("threshold_offset", 10)
+                ))
+                mark("adaptive_threshold")
+        else:
+            result = _upscale(image, settings)
+            mark("upscale")
+    else:
+        result = _upscale(Image.fromarray(binary), settings)
+        mark("upscale")
+
+    logger.debug(
+        f"OCR前処理 ({image.width}x{image.height} -> {result.width}x{result.height}): {', '.join(timings)}, "
+        f"合計 {(time.perf_counter() - start) * 1000:.1f} ms"
+    )
+    return result
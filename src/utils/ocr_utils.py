@@ -0,0 +1,425 @@
+import os
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+from src.utils.ocr_tiling import plan_tiles, merge_tile_data
+
+logger = logging.getLogger(__name__)
+
+class OcrError(Exception):
+    """OCR処理に失敗したことを表す例外。メッセージはそのままユーザーに表示できる形式とする。"""
+    pass
+
+class OcrResult:
+    """OCRで抽出したテキストと、その信頼度。"""
+    def __init__(self, text, confidence=None, word_count=0):
+        self.text = text
+        self.confidence = confidence # 単語の信頼度 (0-100) を文字数で重み付けした平均。単語がない場合は None
+        self.word_count = word_count
+
+def _is_cjk(char):
+    # ひらがな・カタカナ・漢字・全角記号など (日本語の単語の間には空白を入れない)
+    return ord(char) >= 0x2E80
+
+def _result_from_data(data):
+    """pytesseract.image_to_data の結果から、行・段落の区切りを復元したテキストと平均信頼度を求める。"""
+    lines = []
+    current_key = None
+    current_paragraph = None
+    total_weight = 0
+    weighted_confidence = 0.0
+    word_count = 0
+    for index, word in enumerate(data["text"]):
+        word = word.strip()
+        if not word:
+            continue
+        confidence = float(data["conf"][index])
+        if confidence < 0:
+            continue
+        paragraph = (data["block_num"][index], data["par_num"][index])
+        key = paragraph + (data["line_num"][index],)
+        if key != current_key:
+            if current_paragraph is not None and paragraph != current_paragraph:
+                lines.append("")
+            lines.append(word)
+            current_key = key
+            current_paragraph = paragraph
+        elif _is_cjk(lines[-1][-1]) and _is_cjk(word[0]):
+            lines[-1] += word
+        else:
+            lines[-1] += " " + word
+        total_weight += len(word)
+        weighted_confidence += confidence * len(word)
+        word_count += 1
+    confidence = weighted_confidence / total_weight if total_weight else None
+    return OcrResult("\n".join(lines).strip(), confidence, word_count)
+
+_PSM_PATTERN = re.compile(r"--psm\s+(\d+)")
+_VARIABLE_PATTERN = re.compile(r"-c\s+([A-Za-z0-9_]+)=(\S+)")
+
+class OcrEngine:
+    """OCRエンジンの共通インターフェース。recognize() は OcrEngineWorker のスレッドからのみ呼び出される。"""
+    name = "base"
+
+    def recognize(self, image):
+        """PIL画像からOCRを実行し、OcrResult を返す。"""
+        return _result_from_data(self.recognize_data(image))
+
+    def recognize_data(self, image):
+        """
+        PIL画像からOCRを実行し、pytesseract.image_to_data と同じ形式の辞書
+        (text, conf, block_num, par_num, line_num, top, height) を返す。
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class PytesseractEngine(OcrEngine):
+    """
+    pytesseract で tesseract コマンドを実行するエンジン。
+    呼び出しごとにプロセスを起動して言語データを読み込み直すため、TesserocrEngine より遅い。
+    """
+    name = "pytesseract"
+
+    def __init__(self, tesseract_path, lang, config):
+        try:
+            import pytesseract
+        except ImportError:
+            raise OcrError("OCR機能は有効ですが、pytesseractライブラリが見つかりません。\n"
+                           "'pip install pytesseract' を実行してください。")
+        pytesseract.pytesseract.tesseract_cmd = tesseract_path
+        self._pytesseract = pytesseract
+        self.lang = lang
+        self.config = config
+
+    def recognize_data(self, image):
+        pytesseract = self._pytesseract
+        try:
+            # image_to_data は単語ごとの信頼度も返すため、テキストの抽出と信頼度の算出を1回の実行で行う
+            return pytesseract.image_to_data(
+                image, lang=self.lang, config=self.config, output_type=pytesseract.Output.DICT
+            )
+        except pytesseract.TesseractNotFoundError:
+            raise OcrError("OCR機能が利用できません。\n"
+                           "Tesseract OCRエンジンが見つかりません。\n"
+                           "Tesseractがインストールされ、PATHに設定されているか、\n"
+                           "またはsetting.yamlのocr_settings.tesseract_pathに正しいパスが指定されているか確認してください。")
+
+class TesserocrEngine(OcrEngine):
+    """
+    tesserocr で Tesseract API をプロセス内に保持するエンジン。
+    言語データの読み込みは初期化時の1回だけで、以降のOCRではプロセスの起動も読み込みも行わない。
+    Tesseract API はスレッドセーフではないため、OcrEngineWorker の1つのスレッドからのみ使用する。
+    """
+    name = "tesserocr"
+
+    def __init__(self, tessdata_path, lang, config):
+        import tesserocr # ImportError は呼び出し元で pytesseract へのフォールバックに使う
+        self._tesserocr = tesserocr
+        kwargs = {"lang": lang}
+        if tessdata_path:
+            kwargs["path"] = tessdata_path
+        psm = _PSM_PATTERN.search(config or "")
+        if psm is not None:
+            kwargs["psm"] = int(psm.group(1))
+        self._api = tesserocr.PyTessBaseAPI(**kwargs)
+        for name, value in _VARIABLE_PATTERN.findall(config or ""):
+            self._api.SetVariable(name, value)
+
+    def recognize_data(self, image):
+        tesserocr = self._tesserocr
+        RIL = tesserocr.RIL
+        self._api.SetImage(image)
+        self._api.Recognize()
+        # pytesseract.image_to_data と同じ形式に変換し、行・段落の復元と信頼度の算出を共通化する
+        data = {"text": [], "conf": [], "block_num": [], "par_num": [], "line_num": [], "top": [], "height": []}
+        block_num = par_num = line_num = 0
+        iterator = self._api.GetIterator()
+        if iterator is not None:
+            for word in tesserocr.iterate_level(iterator, RIL.WORD):
+                if word.IsAtBeginningOf(RIL.BLOCK):
+                    block_num += 1
+                    par_num = line_num = 0
+                if word.IsAtBeginningOf(RIL.PARA):
+                    par_num += 1
+                    line_num = 0
+                if word.IsAtBeginningOf(RIL.TEXTLINE):
+                    line_num += 1
+                data["text"].append(word.GetUTF8Text(RIL.WORD) or "")
+                data["conf"].append(word.Confidence(RIL.WORD))
+                data["block_num"].append(block_num)
+                data["par_num"].append(par_num)
+                data["line_num"].append(line_num)
+                _, top, _, bottom = word.BoundingBox(RIL.WORD) or (0, 0, 0, 0)
+                data["top"].append(top)
+                data["height"].append(bottom - top)
+        self._api.Clear()
+        return data
+
+    def close(self):
+        self._api.End()
+
+def create_ocr_engine(engine_name, tesseract_path, tessdata_path, lang, config):
+    """
+    engine_name ("auto", "tesserocr" または "pytesseract") に対応する OcrEngine を生成する。
+    "auto" の場合は tesserocr を優先し、使用できなければ pytesseract を使う。
+    """
+    start = time.perf_counter()
+    engine = None
+    if engine_name in ("auto", "tesserocr"):
+        try:
+            engine = TesserocrEngine(tessdata_path, lang, config)
+        except Exception as e:
+            if engine_name == "tesserocr":
+                logger.exception("OCRエンジン tesserocr の初期化中にエラーが発生しました。")
+                raise OcrError(f"OCRエンジン tesserocr を初期化できませんでした: {e}\n"
+                               "'pip install tesserocr' を実行するか、ocr_settings.engine を \"pytesseract\" にしてください。")
+            logger.info(f"tesserocr を使用できないため、pytesseract でOCRを実行します ({e})。")
+    if engine is None:
+        engine = PytesseractEngine(tesseract_path, lang, config)
+    logger.info(f"OCRエンジン {engine.name} を初期化しました (lang={lang}, {(time.perf_counter() - start) * 1000:.0f} ms)。")
+    return engine
+
+class OcrTileSettings:
+    """大きな画像を帯に分割して並列にOCRするための設定。"""
+    def __init__(self, min_pixels, workers, overlap, min_height):
+        self.min_pixels = min_pixels # この画素数以上の画像を分割する
+        self.workers = workers # 同時にOCRする帯の数
+        self.overlap = overlap # 空白行で区切れない場合に帯を重ねる幅 (px)
+        self.min_height = min_height # 帯の最小の高さ (px)
+
+    def key(self):
+        return (self.min_pixels, self.workers, self.overlap, self.min_height)
+
+class OcrEngineWorker:
+    """
+    OCRエンジンを1つの専用スレッドで保持し、OCRの要求を1件ずつ順番に処理する。
+    エンジンは初回の要求時に専用スレッドで生成し、以降は同じエンジンを使い回す。
+    tile_settings が指定されている場合、大きな画像は横長の帯に分割し、帯ごとのエンジンを持つスレッドプールで並列にOCRする。
+    tesserocr も pytesseract (tesseract プロセスの待機) もOCR中はGILを解放するため、スレッドでも複数のコアを使える。
+    """
+    def __init__(self, engine_name, tesseract_path, tessdata_path, lang, config, tile_settings=None):
+        self.engine_name = engine_name # "auto", "tesserocr" または "pytesseract"
+        self.tesseract_path = tesseract_path
+        self.tessdata_path = tessdata_path
+        self.lang = lang
+        self.config = config
+        self.tile_settings = tile_settings # OcrTileSettings (分割しない場合は None)
+        self._engine = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="OcrEngine")
+        self._tile_executor = None # 初めて分割したときに生成する
+        self._tile_local = threading.local() # 帯を処理するスレッドごとのエンジン
+        self._tile_engines = []
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._tiled_calls = 0
+        self._total_seconds = 0.0
+
+    def recognize(self, image, parallel=False):
+        """
+        OCRを実行し、OcrResult を返す。他のOCRが実行中の場合は、その完了を待ってから実行する。
+        parallel が True で分割の対象にならない大きさの画像は、帯用のスレッドプールで他のOCRと並行して実行する
+        (複数の範囲を同時にOCRするため)。
+        """
+        settings = self.tile_settings
+        if parallel and settings is not None and settings.workers > 1 and image.width * image.height < settings.min_pixels:
+            return self._recognize_parallel(image)
+        return self._executor.submit(self._recognize, image).result()
+
+    def _recognize(self, image):
+        if self._engine is None:
+            self._engine = self._create_engine()
+        start = time.perf_counter()
+        tiles = self._plan_tiles(image)
+        if len(tiles) > 1:
+            result = _result_from_data(self._recognize_tiles(image, tiles))
+        else:
+            result = self._engine.recognize(image)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._calls += 1
+            if len(tiles) > 1:
+                self._tiled_calls += 1
+            self._total_seconds += elapsed
+        logger.debug(
+            f"OCR ({self._engine.name}, {image.width}x{image.height}, 分割 {len(tiles)}): "
+            f"{result.word_count} 単語, 平均信頼度 {result.confidence}, {elapsed * 1000:.0f} ms"
+        )
+        return result
+
+    def _recognize_parallel(self, image):
+        start = time.perf_counter()
+        data, _ = self._tile_pool().submit(self._recognize_tile, image).result()
+        result = _result_from_data(data)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._calls += 1
+            self._total_seconds += elapsed
+        logger.debug(
+            f"OCR (並行, {image.width}x{image.height}): "
+            f"{result.word_count} 単語, 平均信頼度 {result.confidence}, {elapsed * 1000:.0f} ms"
+        )
+        return result
+
+    def _create_engine(self):
+        return create_ocr_engine(self.engine_name, self.tesseract_path, self.tessdata_path, self.lang, self.config)
+
+    def _plan_tiles(self, image):
+        settings = self.tile_settings
+        if settings is None or settings.workers <= 1 or image.width * image.height < settings.min_pixels:
+            return [None]
+        return plan_tiles(image, settings.workers, settings.overlap, settings.min_height)
+
+    def _recognize_tiles(self, image, tiles):
+        """帯ごとのOCRをスレッドプールで並列に実行し、結果を読み順に結合した辞書を返す。"""
+        tile_pool = self._tile_pool()
+        start = time.perf_counter()
+        futures = [
+            tile_pool.submit(self._recognize_tile, image.crop((0, tile.top, image.width, tile.bottom)))
+            for tile in tiles
+        ]
+        tile_results = [future.result() for future in futures]
+        wall = time.perf_counter() - start
+        busy = sum(elapsed for _, elapsed in tile_results)
+        # 帯ごとの処理時間の合計と経過時間の比は、並列化による高速化の目安になる
+        logger.debug(
+            f"OCR: {len(tiles)} 帯 / ワーカー {self.tile_settings.workers}: 経過 {wall * 1000:.0f} ms, "
+            f"帯ごとの合計 {busy * 1000:.0f} ms (並列度 {busy / wall if wall else 0:.1f})"
+        )
+        return merge_tile_data(tiles, [data for data, _ in tile_results])
+
+    def _tile_pool(self):
+        with self._lock:
+            if self._tile_executor is None:
+                self._tile_executor = ThreadPoolExecutor(max_workers=self.tile_settings.workers, thread_name_prefix="OcrTile")
+            return self._tile_executor
+
+    def _recognize_tile(self, image):
+        engine = getattr(self._tile_local, "engine", None)
+        if engine is None:
+            engine = self._tile_local.engine = self._create_engine()
+            with self._lock:
+                self._tile_engines.append(engine)
+        start = time.perf_counter()
+        data = engine.recognize_data(image)
+        return data, time.perf_counter() - start
+
+    def stats(self):
+        """エンジン名・OCRの実行回数・分割した回数・平均処理時間を返す。"""
+        with self._lock:
+            return {
+                "engine": self._engine.name if self._engine is not None else None,
+                "calls": self._calls,
+                "tiled_calls": self._tiled_calls,
+                "average_ms": round(self._total_seconds / self._calls * 1000, 1) if self._calls else 0.0,
+            }
+
+    def close(self):
+        """エンジンを解放し、専用スレッドを終了する。"""
+        def close_engine():
+            if self._tile_executor is not None:
+                self._tile_executor.shutdown(wait=True)
+                for engine in self._tile_engines:
+                    engine.close()
+                self._tile_engines = []
+            if self._engine is not None:
+                self._engine.close()
+                self._engine = None
+        self._executor.submit(close_engine)
+        self._executor.shutdown(wait=True)
+
+# tiling_workers が 0 の場合の帯の数の上限。帯ごとのスレッドが言語データを読み込んだエンジンを1つずつ持つため、
+# コア数の多いPCでもメモリの使用量が増えすぎないようにする
+DEFAULT_TILING_WORKERS = 4
+
+_engine_worker = None
+_engine_worker_key = None
+_engine_worker_lock = threading.Lock()
+
+def _tessdata_path(config_manager, tesseract_path):
+    tessdata_path = config_manager.get("ocr_settings.tessdata_path")
+    if tessdata_path:
+        return tessdata_path
+    # Windows のインストーラーは tesseract.exe と同じフォルダに tessdata を置く
+    candidate = os.path.join(os.path.dirname(tesseract_path), "tessdata")
+    return candidate if os.path.isdir(candidate) else None
+
+def get_ocr_engine_worker(config_manager):
+    """
+    現在の ocr_settings に対応する OcrEngineWorker を返す。
+    設定が変更された場合は、古いエンジンを解放して新しい設定のエンジンに切り替える。
+    """
+    global _engine_worker, _engine_worker_key
+    tesseract_path = config_manager.get("ocr_settings.tesseract_path")
+    engine_args = (
+        config_manager.get("ocr_settings.engine", "auto"),
+        tesseract_path,
+        _tessdata_path(config_manager, tesseract_path),
+        config_manager.get("ocr_settings.lang", "eng+jpn"),
+        config_manager.get("ocr_settings.config", "--psm 3"),
+    )
+    tile_settings = None
+    if config_manager.get("ocr_settings.tiling_enabled", True):
+        tile_settings = OcrTileSettings(
+            config_manager.get("ocr_settings.tiling_min_pixels", 2000000),
+            config_manager.get("ocr_settings.tiling_workers", 0) or min(DEFAULT_TILING_WORKERS, os.cpu_count() or 1),
+            config_manager.get("ocr_settings.tiling_overlap", 48),
+            config_manager.get("ocr_settings.tiling_min_height", 200),
+        )
+    key = engine_args + (tile_settings.key() if tile_settings is not None else None,)
+    with _engine_worker_lock:
+        if _engine_worker is not None and _engine_worker_key == key:
+            return _engine_worker
+        previous = _engine_worker
+        _engine_worker = OcrEngineWorker(*engine_args, tile_settings=tile_settings)
+        _engine_worker_key = key
+    if previous is not None:
+        logger.debug("OCRの設定が変更されたため、OCRエンジンを初期化し直します。")
+        previous.close()
+    return _engine_worker
+
+def shutdown_ocr_engine():
+    """OCRエンジンを解放する。アプリケーションの終了時に呼び出す。"""
+    global _engine_worker, _engine_worker_key
+    with _engine_worker_lock:
+        worker = _engine_worker
+        _engine_worker = None
+        _engine_worker_key = None
+    if worker is not None:
+        logger.info(f"OCR統計: {worker.stats()}")
+        worker.close()
+
+def perform_ocr(image, config_manager):
+    """
+    PIL画像からOCRを実行し、抽出されたテキストを返す。
+    信頼度も必要な場合は perform_ocr_with_confidence を使用する。
+    """
+    return perform_ocr_with_confidence(image, config_manager).text
+
+def perform_ocr_with_confidence(image, config_manager, parallel=False):
+    """
+    PIL画像からOCRを実行し、抽出されたテキストと信頼度を OcrResult で返す。
+    Tesseract OCRエンジンと、tesserocr または pytesseract が必要。
+    ocr_settings.engine が "auto" の場合は、Tesseract API をプロセス内に保持できる tesserocr を優先する。
+    tesseract_path が設定されていない場合は空のテキストを返す。
+    OCRが利用できない、または失敗した場合は OcrError を送出する。
+    GUIを操作しないため、ワーカースレッドから呼び出してよい (OCRは専用スレッドで1件ずつ実行される)。
+    parallel が True の場合は、複数の範囲のOCRを並行して実行できる (OcrEngineWorker.recognize を参照)。
+    """
+    tesseract_path = config_manager.get("ocr_settings.tesseract_path")
+    if not tesseract_path:
+        logger.debug("OCRスキップ: setting.yamlでtesseract_pathが指定されていません。")
+        return OcrResult("")
+
+    try:
+        return get_ocr_engine_worker(config_manager).recognize(image, parallel=parallel)
+    except OcrError as e:
+        logger.error(f"OCR処理中にエラーが発生しました: {e}")
+        raise
+    except Exception as e:
+        logger.exception(f"OCR処理中に予期せぬエラーが発生しました。")
+        raise OcrError(f"OCR処理中に予期せぬエラーが発生しました: {e}")
@@ -0,0 +1,55 @@
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# リクエストの送り方
+ROUTE_TEXT_ONLY = "text_only" # OCRテキストのみを送信する (画像は送らない)
+ROUTE_IMAGE_AND_TEXT = "image_and_text" # 画像とOCRテキストを送信する
+ROUTE_IMAGE_ONLY = "image_only" # 画像のみを送信する (OCRテキストは信頼できないため送らない)
+
+def choose_route(ocr_text, ocr_confidence, mode, config_manager):
+    """
+    OCRテキストとその信頼度 (0-100) から、リクエストの送り方を決める。
+    routing_settings.enabled が無効な場合は、OCRテキストがあれば画像とテキスト、なければ画像のみを送る。
+    """
+    has_text = bool(ocr_text and ocr_text.strip() and not ocr_text.startswith("OCRエラー:"))
+    if not has_text:
+        return ROUTE_IMAGE_ONLY
+    if not config_manager.get("routing_settings.enabled", True) or ocr_confidence is None:
+        return ROUTE_IMAGE_AND_TEXT
+
+    text_only_modes = config_manager.get("routing_settings.text_only_modes", ["translation"])
+    if mode in text_only_modes and \
+       ocr_confidence >= config_manager.get("routing_settings.text_only_min_confidence", 90) and \
+       len(ocr_text.strip()) >= config_manager.get("routing_settings.text_only_min_length", 4):
+        return ROUTE_TEXT_ONLY
+    if ocr_confidence < config_manager.get("routing_settings.image_and_text_min_confidence", 50):
+        return ROUTE_IMAGE_ONLY
+    return ROUTE_IMAGE_AND_TEXT
+
+class RouteStatistics:
+    """リクエストの送り方ごとの件数・レイテンシ・入力トークン数を集計する。複数のスレッドから呼び出してよい。"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {} # route -> [件数, 合計レイテンシ(秒), 合計トークン数]
+
+    def record(self, route, latency, prompt_tokens):
+        with self._lock:
+            entry = self._stats.setdefault(route, [0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += latency
+            entry[2] += prompt_tokens or 0
+        logger.debug(f"RouteStatistics: {route}: {latency * 1000:.0f} ms, 入力 {prompt_tokens} トークン")
+
+    def summary(self):
+        """route -> {"count", "average_latency_ms", "average_prompt_tokens"} を返す。"""
+        with self._lock:
+            return {
+                route: {
+                    "count": count,
+                    "average_latency_ms": round(total_latency / count * 1000, 1),
+                    "average_prompt_tokens": round(total_tokens / count),
+                }
+                for route, (count, total_latency, total_tokens) in self._stats.items()
+            }
@@ -0,0 +1,139 @@
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+TRANSLATION_MARKER = "翻訳結果:"
+EXPLANATION_MARKER = "解説:"
+NO_EXPLANATION_TEXT = "解説が見つかりませんでした。"
+# バッチリクエストで各画像の回答の前に付ける見出し
+BATCH_SECTION_HEADER = "=== 画像 {index} ==="
+BATCH_SECTION_PATTERN = re.compile(r"===\s*画像\s*(\d+)\s*===")
+
+class StreamingResponseParser:
+    """
+    Gemini APIの応答テキストを「翻訳結果:」「解説:」の見出しで翻訳と解説に分割するパーサー。
+    ストリーミングで届くチャンクを feed() で追加するたびに、新しく届いた部分だけを走査して見出しを探す。
+    """
+    _MAX_MARKER_LENGTH = max(len(TRANSLATION_MARKER), len(EXPLANATION_MARKER))
+
+    def __init__(self, mode="translation"):
+        self.mode = mode
+        self.text = ""
+        self._scanned = 0
+        self._translation_index = None # 最初の「翻訳結果:」の位置
+        self._explanation_index = None # 最初の「解説:」の位置
+        self._explanation_after_translation_index = None # 「翻訳結果:」より後にある最初の「解説:」の位置
+
+    def feed(self, chunk):
+        """チャンクを追加し、現時点の (translation, explanation) を返す。"""
+        if not chunk:
+            return self.sections()
+        self.text += chunk
+        # 見出しがチャンクの境界をまたぐ場合に備え、直前の数文字も含めて走査する
+        start = max(0, self._scanned - self._MAX_MARKER_LENGTH + 1)
+
+        if self._translation_index is None:
+            index = self.text.find(TRANSLATION_MARKER, start)
+            if index >= 0:
+                self._translation_index = index
+        if self._explanation_index is None:
+            index = self.text.find(EXPLANATION_MARKER, start)
+            if index >= 0:
+                self._explanation_index = index
+        if self._translation_index is not None and self._explanation_after_translation_index is None:
+            search_from = max(start, self._translation_index + len(TRANSLATION_MARKER))
+            index = self.text.find(EXPLANATION_MARKER, search_from)
+            if index >= 0:
+                self._explanation_after_translation_index = index
+
+        self._scanned = len(self.text)
+        return self.sections()
+
+    def sections(self, final=False):
+        """
+        現時点までのテキストから (translation, explanation) を返す。
+        final=True の場合、解説の見出しが見つからなければ既定のメッセージを解説とする。
+        """
+        translation = ""
+        explanation = None
+
+        if self.mode == "translation":
+            if self._translation_index is not None:
+                body_start = self._translation_index + len(TRANSLATION_MARKER)
+                if self._explanation_after_translation_index is not None:
+                    translation = self.text[body_start:self._explanation_after_translation_index]
+                    explanation = self.text[self._explanation_after_translation_index + len(EXPLANATION_MARKER):]
+                else:
+                    translation = self.text[body_start:]
+            elif self._explanation_index is not None:
+                explanation = self.text[self._explanation_index + len(EXPLANATION_MARKER):]
+            else:
+                translation = self.text
+        elif self.mode == "explanation":
+            if self._explanation_index is not None:
+                # 解説より前の部分を要約として表示
+                translation = self.text[:self._explanation_index]
+                explanation = self.text[self._explanation_index + len(EXPLANATION_MARKER):]
+            else:
+                explanation = self.text
+
+        if explanation is None:
+            explanation = NO_EXPLANATION_TEXT if final else ""
+        return translation.strip(), explanation.strip()
+
+def parse_gemini_response(text, mode="translation"):
+    """応答テキスト全体を (translation, explanation) に分割する。"""
+    parser = StreamingResponseParser(mode)
+    parser.feed(text)
+    return parser.sections(final=True)
+
+class BatchResponseDemuxer:
+    """
+    複数画像をまとめたバッチリクエストの応答を、「=== 画像 N ===」の見出しで画像ごとの回答に振り分けるパーサー。
+    画像ごとの回答は StreamingResponseParser で翻訳と解説に分割する。
+    """
+    # 見出しがチャンクの境界をまたぐ場合に備え、末尾のこの文字数は次のチャンクが届くまで振り分けを保留する
+    _HOLD_BACK = len(BATCH_SECTION_HEADER.format(index=1000))
+
+    def __init__(self, count, mode="translation"):
+        self.count = count
+        self.mode = mode
+        self.parsers = {} # 画像番号 (1始まり) -> StreamingResponseParser
+        self._current = None # 現在回答を受信中の画像番号
+        self._buffer = "" # まだ振り分けていないテキスト
+
+    def feed(self, chunk, final=False):
+        """チャンクを追加し、回答が更新された画像番号の集合を返す。final=True で保留中のテキストもすべて振り分ける。"""
+        self._buffer += chunk
+        updated = set()
+        while True:
+            match = BATCH_SECTION_PATTERN.search(self._buffer)
+            if match is None:
+                break
+            self._append(self._buffer[:match.start()], updated)
+            index = int(match.group(1))
+            if 1 <= index <= self.count:
+                self._current = index
+                self.parsers.setdefault(index, StreamingResponseParser(self.mode))
+            else:
+                logger.warning(f"BatchResponseDemuxer: 範囲外の画像番号 {index} の見出しを無視します。")
+                self._current = None
+            self._buffer = self._buffer[match.end():]
+
+        keep = 0 if final else min(len(self._buffer), self._HOLD_BACK)
+        self._append(self._buffer[:len(self._buffer) - keep], updated)
+        self._buffer = self._buffer[len(self._buffer) - keep:]
+        return updated
+
+    def _append(self, text, updated):
+        if text and self._current is not None:
+            self.parsers[self._current].feed(text)
+            updated.add(self._current)
+
+    def sections(self, index, final=False):
+        """画像番号 index の (translation, explanation) を返す。回答が見つからない場合は None を返す。"""
+        parser = self.parsers.get(index)
+        if parser is None:
+            return None
+        return parser.sections(final=final)
@@ -0,0 +1,268 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+import logging
+
+from src.utils.image_hash import PerceptualHashIndex
+
+logger = logging.getLogger(__name__)
+
+class TranslationCache:
+    """
+    Gemini APIの応答をディスクに永続化するコンテンツアドレス型キャッシュ。
+    キーは (画像バイト列 または 正規化したOCRテキスト, モデル名, モード, プロンプト) のハッシュ。
+    エントリ数・合計サイズの上限を超えた場合は、最後に参照された時刻が古いものから削除する (LRU)。
+    参照時刻の更新は検索のたびに書き込まず、メモリ上にためて put() と close() でまとめて書き込む。
+    near_duplicate_threshold を指定すると、画像の知覚ハッシュによる近似一致検索も行う。
+    """
+    def __init__(self, cache_file_path, max_entries=5000, max_bytes=50 * 1024 * 1024, near_duplicate_threshold=None):
+        self.cache_file_path = cache_file_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._pending_access = {} # key -> 最後に参照された時刻 (まだデータベースに書き込んでいないもの)
+
+        cache_dir = os.path.dirname(cache_file_path)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+        # GeminiWorker (別スレッド) からも参照されるため check_same_thread=False とし、ロックで保護する
+        self._conn = sqlite3.connect(cache_file_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                original_text TEXT,
+                translation TEXT,
+                explanation TEXT,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                phash INTEGER,
+                context TEXT
+            )"""
+        )
+        # 知覚ハッシュ列がない古いキャッシュファイルには列を追加する
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(cache)")]
+        if "phash" not in columns:
+            self._conn.execute("ALTER TABLE cache ADD COLUMN phash INTEGER")
+        if "context" not in columns:
+            self._conn.execute("ALTER TABLE cache ADD COLUMN context TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache(last_access)")
+        self._conn.commit()
+
+        # 知覚ハッシュのインデックスはコンテキスト (モデル名・モード・プロンプト) ごとにメモリ上に構築する
+        self._phash_indexes = {}
+        if self.near_duplicate_threshold is not None:
+            start = time.perf_counter()
+            rows = self._conn.execute("SELECT key, phash, context FROM cache WHERE phash IS NOT NULL").fetchall()
+            for key, phash, context in rows:
+                self._index_phash(key, self._from_sqlite_int(phash), context)
+            logger.debug(f"TranslationCache: 知覚ハッシュインデックスを構築しました。{len(rows)} 件, {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        self._entry_count, self._total_bytes = row
+        logger.debug(f"TranslationCache: '{cache_file_path}' を開きました。エントリ数: {self._entry_count}, サイズ: {self._total_bytes} bytes")
+
+    @staticmethod
+    def normalize_text(text):
+        """キャッシュキー用にOCRテキストを正規化する (NFKC + 空白の畳み込み)。"""
+        text = unicodedata.normalize("NFKC", text or "")
+        return re.sub(r"\s+", " ", text).strip()
+
+    @classmethod
+    def make_key(cls, image_data, original_text, model_name, mode, prompt):
+        """
+        キャッシュキーを生成する。
+        OCRテキストが得られている場合はそれを、そうでなければ画像バイト列を内容として用いる。
+        """
+        hasher = hashlib.sha256()
+        normalized_text = cls.normalize_text(original_text)
+        if normalized_text and not normalized_text.startswith("OCRエラー:"):
+            hasher.update(b"text\0")
+            hasher.update(normalized_text.encode("utf-8"))
+        else:
+            hasher.update(b"image\0")
+            hasher.update(image_data or b"")
+        for part in (model_name, mode, prompt):
+            hasher.update(b"\0")
+            hasher.update(str(part or "").encode("utf-8"))
+        return hasher.hexdigest()
+
+    @staticmethod
+    def make_context(model_name, mode, prompt):
+        """近似一致検索で結果を共有してよい範囲 (モデル名・モード・プロンプト) を表す文字列を生成する。"""
+        hasher = hashlib.sha256()
+        for part in (model_name, mode, prompt):
+            hasher.update(str(part or "").encode("utf-8"))
+            hasher.update(b"\0")
+        return hasher.hexdigest()
+
+    @staticmethod
+    def _to_sqlite_int(value):
+        # SQLiteのINTEGERは符号付き64ビットのため、符号なしハッシュを変換して保存する
+        return value - (1 << 64) if value >= (1 << 63) else value
+
+    @staticmethod
+    def _from_sqlite_int(value):
+        return value + (1 << 64) if value < 0 else value
+
+    def _index_phash(self, key, phash, context):
+        index = self._phash_indexes.get(context)
+        if index is None:
+            index = PerceptualHashIndex(max_distance=self.near_duplicate_threshold)
+            self._phash_indexes[context] = index
+        index.add(phash, key)
+
+    def get(self, key, count_miss=True):
+        """
+        キャッシュを検索する。ヒットした場合は (translation, explanation) を、なければ None を返す。
+        続けて近似一致検索を行う場合は count_miss=False とし、その結果に応じて record_miss() を呼ぶ。
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT translation, explanation FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                if count_miss:
+                    self.misses += 1
+                    logger.debug(f"TranslationCache: ミス ({self._format_counters()})")
+                return None
+            self._pending_access[key] = time.time()
+            self.hits += 1
+            logger.debug(f"TranslationCache: ヒット ({self._format_counters()})")
+            return row[0], row[1]
+
+    def record_miss(self):
+        """完全一致・近似一致のどちらでも見つからなかった検索をミスとして数える。"""
+        with self._lock:
+            self.misses += 1
+            logger.debug(f"TranslationCache: ミス ({self._format_counters()})")
+
+    def find_similar(self, phash, context, original_text=""):
+        """
+        知覚ハッシュが閾値以内の過去の結果を検索する。
+        見た目が同じでも文字だけが変わった画面 (会話ウィンドウなど) に古い訳文を返さないよう、
+        保存時のOCRテキストと original_text (OCRテキスト) が一致する結果のみを返す。
+        OCRテキストがない場合は文字が同じかどうかを確かめられないため、検索しない。
+        見つかった場合は (translation, explanation, distance) を、なければ None を返す。
+        """
+        if self.near_duplicate_threshold is None or phash is None:
+            return None
+        normalized_text = self.normalize_text(original_text)
+        if not normalized_text or normalized_text.startswith("OCRエラー:"):
+            return None
+        with self._lock:
+            index = self._phash_indexes.get(context)
+            if index is None:
+                return None
+            start = time.perf_counter()
+            match = index.find_nearest(phash)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if match is None:
+                logger.debug(f"TranslationCache: 近似一致なし ({len(index)} 件を検索, {elapsed_ms:.3f} ms)")
+                return None
+            key, distance = match
+            row = self._conn.execute(
+                "SELECT original_text, translation, explanation FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                index.remove(key)
+                return None
+            if normalized_text != self.normalize_text(row[0]):
+                logger.debug(f"TranslationCache: 類似画像 (距離 {distance}) はOCRテキストが異なるため使用しません。")
+                return None
+            self._pending_access[key] = time.time()
+            self.near_hits += 1
+            logger.debug(f"TranslationCache: 近似ヒット (距離 {distance}, {elapsed_ms:.3f} ms, {self._format_counters()})")
+            return row[1], row[2], distance
+
+    def put(self, key, original_text, translation, explanation, phash=None, context=None):
+        """翻訳結果をキャッシュに保存し、必要に応じて古いエントリを削除する。"""
+        size = sum(len((value or "").encode("utf-8")) for value in (original_text, translation, explanation))
+        now = time.time()
+        try:
+            with self._lock:
+                # 削除の順序が正しくなるよう、ためておいた参照時刻を先に書き込む
+                self._flush_access_times()
+                old = self._conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, original_text, translation, explanation, size, created_at, last_access, phash, context) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, original_text, translation, explanation, size, now, now,
+                     self._to_sqlite_int(phash) if phash is not None else None, context)
+                )
+                if phash is not None and context is not None and self.near_duplicate_threshold is not None:
+                    self._index_phash(key, phash, context)
+                if old is None:
+                    self._entry_count += 1
+                    self._total_bytes += size
+                else:
+                    self._total_bytes += size - old[0]
+                self._evict_if_needed()
+                self._conn.commit()
+        except sqlite3.Error:
+            logger.exception("TranslationCache: キャッシュへの保存中にエラーが発生しました。")
+
+    def _flush_access_times(self):
+        """ためておいた参照時刻をデータベースに書き込む。呼び出し側でロックを保持し、コミットすること。"""
+        if not self._pending_access:
+            return
+        self._conn.executemany(
+            "UPDATE cache SET last_access = ? WHERE key = ?",
+            [(accessed_at, key) for key, accessed_at in self._pending_access.items()]
+        )
+        self._pending_access.clear()
+
+    def _evict_if_needed(self):
+        """上限を超えている間、LRU順にエントリを削除する。呼び出し側でロックを保持していること。"""
+        while self._entry_count > 0 and (self._entry_count > self.max_entries or self._total_bytes > self.max_bytes):
+            overflow = max(self._entry_count - self.max_entries, 1)
+            victims = self._conn.execute(
+                "SELECT key, size, context FROM cache ORDER BY last_access LIMIT ?", (overflow,)
+            ).fetchall()
+            if not victims:
+                break
+            self._conn.executemany("DELETE FROM cache WHERE key = ?", [(k,) for k, _, _ in victims])
+            for key, _, context in victims:
+                index = self._phash_indexes.get(context)
+                if index is not None:
+                    index.remove(key)
+            self._entry_count -= len(victims)
+            self._total_bytes -= sum(size for _, size, _ in victims)
+            logger.debug(f"TranslationCache: {len(victims)} 件のエントリを削除しました。")
+
+    def stats(self):
+        """ヒット/ミス数と現在のエントリ数・サイズを返す。"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "entries": self._entry_count,
+                "bytes": self._total_bytes,
+            }
+
+    def _format_counters(self):
+        total = self.hits + self.near_hits + self.misses
+        ratio = ((self.hits + self.near_hits) / total * 100) if total else 0.0
+        return f"hits={self.hits}, near_hits={self.near_hits}, misses={self.misses}, hit_rate={ratio:.1f}%"
+
+    def close(self):
+        with self._lock:
+            try:
+                self._flush_access_times()
+                self._conn.commit()
+            except sqlite3.Error:
+                logger.exception("TranslationCache: 参照時刻の書き込み中にエラーが発生しました。")
+            self._conn.close()
+        logger.debug(f"TranslationCache: '{self.cache_file_path}' を閉じました。")
@@ -0,0 +1,206 @@
+import re
+import time
+import threading
+import logging
+
+from src.utils.fuzzy_index import TrigramIndex
+
+logger = logging.getLogger(__name__)
+
+# 翻訳メモリの訳文だけで結果を作成した場合の解説
+MEMORY_ONLY_EXPLANATION = "翻訳メモリに登録済みの訳文から作成しました (API呼び出しなし)。"
+
+_NUMBERED_LINE_PATTERN = re.compile(r"^\s*(\d+)\s*[.．:：)）]\s*(.*)$")
+# 文字・数字を含まないセグメント (記号や罫線のみの行) は翻訳の対象にしない
+_WORD_PATTERN = re.compile(r"\w")
+# 近似一致の訳文をそのまま使う場合に、完全に一致している必要がある部分 (数字の並び)
+_NUMBER_PATTERN = re.compile(r"\d+")
+# 近似検索では記号の違いを無視する ("OK" と "OK!" は同じ行とみなす)
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s]+")
+
+class TranslationMemory:
+    """
+    OCRテキストを行単位のセグメントに分割し、セグメント -> 訳文 の対応を HistoryStore の translation_memory テーブルに蓄積する。
+    すべてのセグメントが登録済みのキャプチャはAPIを呼ばずに訳文を組み立て、一部のみ登録済みの場合は未登録のセグメントだけを翻訳させる。
+    OCRの誤認識に備えて、登録済みのセグメントの文字トライグラムのインデックスも持ち、
+    インデックスは記号を除いたキーで作るため、記号だけが異なるセグメントは類似度 1 になる。
+    類似度が fuzzy_direct_similarity 以上で数字が一致していればその訳文をそのまま使い、
+    fuzzy_hint_similarity 以上であればプロンプトに参考訳として含める。
+    """
+    def __init__(self, history_store, fuzzy_direct_similarity=0.9, fuzzy_hint_similarity=0.6, fuzzy_top_k=3):
+        self.history_store = history_store
+        self.fuzzy_direct_similarity = fuzzy_direct_similarity # None で近似一致の訳文を直接使わない
+        self.fuzzy_hint_similarity = fuzzy_hint_similarity # None で参考訳を使わない
+        self.fuzzy_top_k = fuzzy_top_k
+        self._fuzzy_index = TrigramIndex()
+        self._fuzzy_ready = threading.Event()
+        self._lock = threading.Lock()
+        self._captures = 0
+        self._full_coverage = 0
+        self._partial_coverage = 0
+        self._segments_total = 0
+        self._segments_hit = 0
+        self._fuzzy_hits = 0
+        if fuzzy_direct_similarity is not None or fuzzy_hint_similarity is not None:
+            # 登録済みのセグメントが多い場合に起動を遅らせないよう、インデックスはバックグラウンドで構築する
+            threading.Thread(target=self._build_fuzzy_index, name="TranslationMemoryIndex", daemon=True).start()
+
+    def _build_fuzzy_index(self):
+        start = time.perf_counter()
+        try:
+            for _, segment, translation in self.history_store.load_segments():
+                self._fuzzy_index.add(self.fuzzy_key(segment), (segment, translation))
+            self._fuzzy_ready.set()
+            logger.debug(f"TranslationMemory: {len(self._fuzzy_index)} セグメントの近似検索インデックスを構築しました ({(time.perf_counter() - start) * 1000:.0f} ms)。")
+        except Exception:
+            logger.exception("TranslationMemory: 近似検索インデックスの構築中にエラーが発生しました。近似一致は使用しません。")
+
+    @staticmethod
+    def split_segments(text):
+        """OCRテキストを、空白を正規化した行単位のセグメントのリストに分割する。"""
+        segments = []
+        for line in (text or "").splitlines():
+            segment = " ".join(line.split())
+            if segment and _WORD_PATTERN.search(segment):
+                segments.append(segment)
+        return segments
+
+    @staticmethod
+    def segment_key(segment):
+        # OCRは大文字・小文字の揺れが多いため、区別せずに照合する
+        return segment.casefold()
+
+    @staticmethod
+    def fuzzy_key(segment):
+        # 近似検索では大文字・小文字に加えて記号も区別しない (OCRは句読点の読み落としや誤認識が多い)
+        return " ".join(_PUNCTUATION_PATTERN.sub("", segment.casefold()).split())
+
+    @staticmethod
+    def numbers_match(segment, other):
+        """2つのセグメントの数字の並びが、順序も含めてすべて一致していれば True を返す。"""
+        return _NUMBER_PATTERN.findall(segment) == _NUMBER_PATTERN.findall(other)
+
+    def lookup(self, segments):
+        """セグメントごとの訳文のリスト (未登録のセグメントは None) を返し、カバー率を集計する。"""
+        found = self.history_store.lookup_segments([self.segment_key(segment) for segment in segments])
+        translations = [found.get(self.segment_key(segment)) for segment in segments]
+        fuzzy_hits = 0
+        if self.fuzzy_direct_similarity is not None and self._fuzzy_ready.is_set():
+            # 完全一致しないセグメントは、十分に似た登録済みセグメントの訳文を使う
+            for index, segment in enumerate(segments):
+                if translations[index] is not None:
+                    continue
+                matches = self._fuzzy_index.search(self.fuzzy_key(segment), self.fuzzy_top_k, self.fuzzy_direct_similarity)
+                for _, (matched_segment, translation), similarity in matches:
+                    # "120 gold" と "130 gold" のように数字だけが異なる行は類似度が高くなるため、
+                    # 数字が異なる場合は訳文を使わず、参考訳としてのみプロンプトに含める
+                    if not self.numbers_match(segment, matched_segment):
+                        logger.debug(f"TranslationMemory: '{segment}' と '{matched_segment}' は数字が異なるため訳文を使用しません。")
+                        continue
+                    logger.debug(f"TranslationMemory: '{segment}' を '{matched_segment}' (類似度 {similarity:.2f}) の訳文で翻訳します。")
+                    translations[index] = translation
+                    fuzzy_hits += 1
+                    break
+        hits = sum(1 for translation in translations if translation is not None)
+        with self._lock:
+            self._fuzzy_hits += fuzzy_hits
+            self._captures += 1
+            self._segments_total += len(segments)
+            self._segments_hit += hits
+            if segments and hits == len(segments):
+                self._full_coverage += 1
+            elif hits:
+                self._partial_coverage += 1
+        if segments:
+            logger.debug(f"TranslationMemory: {hits}/{len(segments)} セグメントが登録済みです (カバー率 {hits / len(segments):.0%})。")
+        return translations
+
+    def learn(self, segments, translations):
+        """セグメントと訳文の対応を登録する。"""
+        rows = [
+            (self.segment_key(segment), segment, translation.strip())
+            for segment, translation in zip(segments, translations)
+            if translation and translation.strip()
+        ]
+        self.history_store.store_segments(rows)
+        for _, segment, translation in rows:
+            self._fuzzy_index.add(self.fuzzy_key(segment), (segment, translation))
+        if rows:
+            logger.debug(f"TranslationMemory: {len(rows)} セグメントを登録しました。")
+
+    def learn_from_translation(self, segments, translation):
+        """
+        キャプチャ全体の訳文の行数がセグメント数と一致する場合のみ、行ごとに対応付けて登録する。
+        行数が異なる場合は対応が不確かなため登録しない。
+        """
+        lines = [line.strip() for line in translation.splitlines() if line.strip()]
+        if segments and len(lines) == len(segments):
+            self.learn(segments, lines)
+
+    def find_hints(self, segments, max_hints=10):
+        """
+        segments に類似した登録済みセグメントと訳文を、(segment, translation, similarity) のリストで返す。
+        プロンプトに参考訳として含め、用語の訳を統一させるために使う。
+        """
+        if self.fuzzy_hint_similarity is None or not self._fuzzy_ready.is_set():
+            return []
+        start = time.perf_counter()
+        hints = {}
+        for segment in segments:
+            for _, (matched_segment, translation), similarity in self._fuzzy_index.search(
+                self.fuzzy_key(segment), self.fuzzy_top_k, self.fuzzy_hint_similarity
+            ):
+                if matched_segment not in hints or hints[matched_segment][1] < similarity:
+                    hints[matched_segment] = (translation, similarity)
+        result = sorted(
+            ((segment, translation, similarity) for segment, (translation, similarity) in hints.items()),
+            key=lambda hint: hint[2], reverse=True
+        )[:max_hints]
+        logger.debug(f"TranslationMemory: 参考訳 {len(result)} 件 ({(time.perf_counter() - start) * 1000:.1f} ms)")
+        return result
+
+    @staticmethod
+    def format_hints(hints):
+        """参考訳をプロンプトに追加する文字列にする。"""
+        if not hints:
+            return ""
+        lines = "\n".join(f"- {segment} → {translation} (類似度 {similarity:.2f})" for segment, translation, similarity in hints)
+        return (
+            "\n\n--- 参考: 過去に翻訳した類似の文字列 ---\n"
+            f"{lines}\n"
+            "同じ用語が含まれている場合は、上記の訳語に合わせて訳を統一してください。"
+        )
+
+    @staticmethod
+    def build_segment_request(segments):
+        """未登録のセグメントに番号を付け、「番号. 訳文」の形式で回答させるための指示文を返す。"""
+        numbered = "\n".join(f"{index}. {segment}" for index, segment in enumerate(segments, start=1))
+        return (
+            "\n\nこの依頼では画像の代わりに、画像からOCRで抽出したテキストの一部を行ごとに番号を付けて示します。"
+            "上記の回答形式ではなく、各行を翻訳して「番号. 訳文」の形式で1行に1つずつ回答してください。解説は不要です。\n"
+            f"{numbered}"
+        )
+
+    @staticmethod
+    def parse_numbered_translations(text, count):
+        """「番号. 訳文」の形式の応答から訳文のリストを返す。番号が欠けている場合は None を返す。"""
+        translations = {}
+        for line in text.splitlines():
+            match = _NUMBERED_LINE_PATTERN.match(line)
+            if match is not None:
+                translations.setdefault(int(match.group(1)), match.group(2).strip())
+        if any(index not in translations for index in range(1, count + 1)):
+            return None
+        return [translations[index] for index in range(1, count + 1)]
+
+    def stats(self):
+        """キャプチャ単位・セグメント単位のカバー率を返す。"""
+        with self._lock:
+            return {
+                "captures": self._captures,
+                "full_coverage": self._full_coverage,
+                "partial_coverage": self._partial_coverage,
+                "segment_coverage": round(self._segments_hit / self._segments_total, 3) if self._segments_total else 0.0,
+                "fuzzy_hits": self._fuzzy_hits,
+                "stored_segments": self.history_store.count_segments(),
+            }
@@ -0,0 +1,87 @@
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class HistoryListModel(QAbstractListModel):
+    """
+    翻訳履歴の一覧を提供するリストモデル。
+    canFetchMore/fetchMore によりビューがスクロールした分だけ HistoryStore から読み込む。
+    各行は (ID, 表示用文字列) のみを保持し、翻訳結果や解説などの詳細は選択時に取得する。
+    """
+    EntryIdRole = Qt.UserRole + 1
+
+    def __init__(self, history_store, page_size=100, parent=None):
+        super().__init__(parent)
+        self.history_store = history_store
+        self.page_size = page_size
+        self._rows = [] # (entry_id, display_text) のリスト
+        self._query = ""
+        self._has_more = True
+
+    def set_query(self, query):
+        """検索クエリを設定し、一覧を先頭から読み込み直す。空文字列の場合は全件を新しい順に表示する。"""
+        self.beginResetModel()
+        self._query = query.strip()
+        self._rows = []
+        self._has_more = True
+        self.endResetModel()
+
+    def query(self):
+        return self._query
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not (0 <= index.row() < len(self._rows)):
+            return None
+        entry_id, display_text = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return display_text
+        if role == self.EntryIdRole:
+            return entry_id
+        return None
+
+    def entry_id(self, index):
+        """インデックスに対応する履歴エントリのIDを返す。"""
+        return self.data(index, self.EntryIdRole)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._has_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self._has_more:
+            return
+
+        start = time.perf_counter()
+        try:
+            if self._query:
+                page = self.history_store.search(self._query, self.page_size, len(self._rows))
+            else:
+                before_id = self._rows[-1][0] if self._rows else None
+                page = self.history_store.fetch_page(self.page_size, before_id=before_id)
+        except Exception as e:
+            logger.exception("HistoryListModel: 履歴の読み込み中にエラーが発生しました。")
+            page = []
+        self._has_more = len(page) == self.page_size
+        logger.debug(f"HistoryListModel: {len(page)} 件の履歴を取得しました (query='{self._query}', offset={len(self._rows)}, {(time.perf_counter() - start) * 1000:.1f} ms)")
+
+        if not page:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self._rows.extend((summary["id"], self._format_summary(summary)) for summary in page)
+        self.endInsertRows()
+
+    @staticmethod
+    def _format_summary(summary):
+        original_text_display = (summary.get("original_text") or "N/A").replace('\n', ' ')
+        if len(original_text_display) > 50:
+            original_text_display = original_text_display[:47] + "..."
+        return f"[{summary.get('timestamp', '')}] {original_text_display}"
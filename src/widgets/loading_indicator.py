@@ -1,5 +1,5 @@
 from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout, QApplication
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSignal
 import os
 import sys
 import logging
@@ -9,7 +9,10 @@ logger = logging.getLogger(__name__)
 class LoadingIndicator(QWidget):
     """
     API処理中に表示されるシンプルなローディングインジケーター。
+    Escキーが押されると cancel_requested シグナルを発行する。
     """
+    cancel_requested = pyqtSignal()
+
     def __init__(self, parent=None):
         super().__init__(parent)
         logger.debug("LoadingIndicator: __init__ が呼び出されました。")
@@ -21,7 +24,7 @@ class LoadingIndicator(QWidget):
         main_layout.setAlignment(Qt.AlignCenter)
 
         # Loading message
-        self.message_label = QLabel("翻訳中...", self)
+        self.message_label = QLabel("翻訳中...\n(Escでキャンセル)", self)
         self.message_label.setAlignment(Qt.AlignCenter)
         main_layout.addWidget(self.message_label)
         
@@ -64,6 +67,13 @@ class LoadingIndicator(QWidget):
         y = (screen.height() - self.height()) // 2
         self.move(x, y)
 
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Escape:
+            logger.debug("Escキーが押されました。翻訳のキャンセルを要求します。")
+            self.cancel_requested.emit()
+        else:
+            super().keyPressEvent(event)
+
     def show(self):
         super().show()
         self.raise_()
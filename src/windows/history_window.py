@@ -1,21 +1,26 @@
 from PyQt5.QtWidgets import (
-    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QListWidget, QListWidgetItem, QApplication, QAbstractItemView, QStyle
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit,
+    QListView, QApplication, QAbstractItemView, QStyle
 )
-from PyQt5.QtCore import Qt, QPoint, QRect, QEvent
+from PyQt5.QtCore import Qt, QPoint, QRect, QEvent, QTimer
 from PyQt5.QtGui import QPainter, QColor, QPen
 import os
 import sys
 import logging
-from src.utils.helper_functions import load_translation_history
+from src.utils.history_store import get_history_store
+from src.widgets.history_list_model import HistoryListModel
 
 logger = logging.getLogger(__name__)
 
 class HistoryWindow(QDialog):
     """
     翻訳履歴を表示するウィンドウ。
+    一覧は HistoryListModel によりスクロールに応じてページ単位で読み込み、詳細は選択時に取得する。
     """
-    def __init__(self, parent=None, history_file_path: str = "translation_history.json"):
+    PAGE_SIZE = 100
+    SEARCH_DELAY_MS = 250 # 入力が止まってから検索を実行するまでの待ち時間
+
+    def __init__(self, parent=None, history_file_path: str = "translation_history.db"):
         super().__init__(parent)
         logger.debug("HistoryWindow: __init__ が呼び出されました。")
         self.setWindowTitle("翻訳履歴")
@@ -23,6 +28,7 @@ class HistoryWindow(QDialog):
         self.setModal(False)
 
         self.history_file_path = history_file_path
+        self.history_store = get_history_store(history_file_path)
 
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(10, 10, 10, 10)
@@ -39,10 +45,25 @@ class HistoryWindow(QDialog):
         header_layout.addWidget(close_button)
         main_layout.addLayout(header_layout)
 
-        self.history_list_widget = QListWidget(self)
-        self.history_list_widget.setEditTriggers(QAbstractItemView.NoEditTriggers)
-        self.history_list_widget.itemClicked.connect(self.display_history_item_details)
-        main_layout.addWidget(self.history_list_widget)
+        self.search_box = QLineEdit(self)
+        self.search_box.setPlaceholderText("履歴を検索 (原文・翻訳・解説)")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.textChanged.connect(self._on_search_text_changed)
+        main_layout.addWidget(self.search_box)
+
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(self.SEARCH_DELAY_MS)
+        self._search_timer.timeout.connect(self.load_and_display_history)
+
+        self.history_model = HistoryListModel(self.history_store, page_size=self.PAGE_SIZE, parent=self)
+        self.history_list_view = QListView(self)
+        self.history_list_view.setModel(self.history_model)
+        self.history_list_view.setUniformItemSizes(True)
+        self.history_list_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.history_list_view.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.history_list_view.selectionModel().currentChanged.connect(self.display_history_item_details)
+        main_layout.addWidget(self.history_list_view)
 
         self.detail_label = QLabel("詳細: ", self)
         self.detail_label.setWordWrap(True)
@@ -99,27 +120,28 @@ class HistoryWindow(QDialog):
         self.move(x, y)
 
     def load_and_display_history(self):
-        self.history_list_widget.clear()
-        current_history = load_translation_history(self.history_file_path) 
-        
-        for i, item_data in enumerate(reversed(current_history)):
-            original_text_display = item_data.get("original_text", "N/A").replace('\n', ' ')
-            if len(original_text_display) > 50:
-                original_text_display = original_text_display[:47] + "..."
-            
-            timestamp = item_data.get("timestamp", "")
-            display_text = f"[{timestamp}] {original_text_display}"
-            
-            list_item = QListWidgetItem(display_text)
-            list_item.setData(Qt.UserRole, item_data)
-            self.history_list_widget.addItem(list_item)
-        
-        if current_history:
-            self.history_list_widget.setCurrentRow(0)
-            self.display_history_item_details(self.history_list_widget.item(0))
+        """検索ボックスの内容で履歴一覧を先頭から読み込み直す。"""
+        self.history_model.set_query(self.search_box.text())
+        if self.history_model.canFetchMore():
+            self.history_model.fetchMore()
 
-    def display_history_item_details(self, item):
-        item_data = item.data(Qt.UserRole)
+        if self.history_model.rowCount() > 0:
+            self.history_list_view.setCurrentIndex(self.history_model.index(0))
+        else:
+            self.detail_label.setText("詳細: ")
+
+    def _on_search_text_changed(self, text):
+        self._search_timer.start()
+
+    def display_history_item_details(self, current, previous=None):
+        """選択された履歴エントリの詳細をデータベースから取得して表示する。"""
+        entry_id = self.history_model.entry_id(current)
+        if entry_id is None:
+            return
+        item_data = self.history_store.get_entry(entry_id)
+        if item_data is None:
+            logger.warning(f"HistoryWindow: 履歴エントリ (id={entry_id}) が見つかりませんでした。")
+            return
         original = item_data.get("original_text", "N/A")
         translated = item_data.get("translation", "N/A")
         explanation = item_data.get("explanation", "N/A")
@@ -135,6 +157,8 @@ class HistoryWindow(QDialog):
 
     def show(self):
         logger.debug("HistoryWindow: show() が呼び出されました。")
+        # 前回表示以降に追加された履歴を反映する
+        self.load_and_display_history()
         super().show()
 
     def hide(self):
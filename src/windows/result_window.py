@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout, QHBoxLayout, QPushButton, QApplication, QTextBrowser
 from PyQt5.QtCore import Qt, pyqtSignal, QPoint, QRect, QEvent, QTimer
-from PyQt5.QtGui import QPainter, QColor, QPen
+from PyQt5.QtGui import QPainter, QColor, QPen, QTextCursor
 import os
 import sys
 import logging
@@ -14,6 +14,7 @@ class ResultWindow(QWidget):
     """
     show_history_signal = pyqtSignal()
     show_settings_signal = pyqtSignal()
+    closed_signal = pyqtSignal() # ウィンドウが閉じられたとき (ストリーミング中の翻訳のキャンセルに使う)
 
     def __init__(self, parent=None, config_manager=None):
         super().__init__(parent)
@@ -156,6 +157,63 @@ class ResultWindow(QWidget):
         self.show()
         self.activateWindow()
 
+    def update_group_content(self, sections):
+        """
+        複数の範囲の翻訳結果を、範囲ごとの見出しを付けてまとめて表示する。
+        sections は範囲の順の (翻訳, 解説) のリストで、翻訳が終わっていない範囲は None。
+        """
+        translations = []
+        explanations = []
+        for index, section in enumerate(sections, 1):
+            translation, explanation = section if section is not None else ("(翻訳中...)", "")
+            translations.append(f"[範囲 {index}]\n{translation}")
+            explanations.append(f"[範囲 {index}]\n{explanation}")
+        self.update_content("\n\n".join(translations), "\n\n".join(explanations))
+
+    def begin_streaming(self):
+        """ストリーミング表示を開始する。表示内容を見出しだけにしてウィンドウを表示する。"""
+        self.translation_label.setPlainText("翻訳結果: \n")
+        self.explanation_label.setPlainText("解説: \n")
+        self.show()
+        self.raise_()
+
+    def append_content(self, translation, explanation):
+        """
+        監視モードの新しい翻訳結果を、表示中の翻訳結果の末尾に追記する。解説は最新のものに置き換える。
+        ゲームの操作を妨げないよう、ウィンドウを表示するだけでフォーカスは移さない。
+        """
+        has_content = self.translation_label.toPlainText().strip() not in ("", "翻訳結果:")
+        if self.isVisible() and has_content:
+            cursor = self.translation_label.textCursor()
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertText(f"\n{translation}")
+            self.translation_label.setTextCursor(cursor)
+            self.translation_label.ensureCursorVisible()
+        else:
+            self.translation_label.setPlainText(f"翻訳結果: \n{translation}")
+        self.explanation_label.setPlainText(f"解説: \n{explanation}")
+        if not self.isVisible():
+            self.show()
+
+    def update_partial_content(self, translation, explanation):
+        """
+        ストリーミング中の途中経過を表示する。
+        前回の表示内容の続きであれば差分だけを末尾に追記し、そうでなければ全体を置き換える。
+        """
+        self._append_or_replace(self.translation_label, f"翻訳結果: \n{translation}")
+        self._append_or_replace(self.explanation_label, f"解説: \n{explanation}")
+
+    def _append_or_replace(self, text_browser, new_text):
+        current_text = text_browser.toPlainText()
+        if new_text == current_text:
+            return
+        if new_text.startswith(current_text):
+            cursor = text_browser.textCursor()
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertText(new_text[len(current_text):])
+        else:
+            text_browser.setPlainText(new_text)
+
     def _copy_to_clipboard(self):
         """翻訳結果と解説をクリップボードにコピーする。"""
         translation_text = self.translation_label.toPlainText().replace("翻訳結果: \n", "")
@@ -201,6 +259,7 @@ class ResultWindow(QWidget):
     def closeEvent(self, event):
         logger.debug("ResultWindow: closeEvent() が呼び出されました。")
         self.hide()
+        self.closed_signal.emit()
         event.ignore()
         logger.info("ResultWindowをシステムトレイに隠しました。")
     
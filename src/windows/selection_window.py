@@ -1,35 +1,47 @@
-import mss
-import mss.tools
 import time
 import os
-from PIL import Image
-from io import BytesIO
 import logging
 
 from PyQt5.QtWidgets import QApplication, QWidget, QMessageBox
-from PyQt5.QtCore import Qt, QRect, QBuffer, QIODevice, QTimer
-from PyQt5.QtGui import QPainter, QColor, QPen
+from PyQt5.QtCore import Qt, QRect, QTimer, QThread, QThreadPool
+from PyQt5.QtGui import QPainter, QColor, QPen, QImage, QPixmap
 import sys
 
 # 外部モジュールからのインポート
-from src.threads.gemini_worker import GeminiWorker
+from src.threads.capture_worker import CaptureWorker
+from src.threads.region_watcher import RegionWatcher
+from src.threads.request_scheduler import PRIORITY_BACKGROUND
+from src.utils.capture_backends import get_capture_backend, logical_to_physical, virtual_desktop_geometry
 from src.widgets.custom_message_box import CustomMessageBox
 from src.widgets.loading_indicator import LoadingIndicator
 from src.config.config_manager import ConfigManager
-from src.utils.helper_functions import add_translation_entry, save_translation_history, load_translation_history
+from src.utils.helper_functions import append_translation_entry
 
 logger = logging.getLogger(__name__)
 
 class SelectionWindow(QWidget):
     """
     スクリーンショット範囲を選択するための半透明オーバーレイウィンドウ。
+    behavior.freeze_screen が有効な場合は、表示時に画面全体を1回だけ取得して背景に固定表示し、
+    選択範囲はその画像から切り出す (選択中に画面が変わっても、選択した時点の内容を翻訳する)。
+    Ctrlキーを押しながら範囲を選択する (または start_watch_selection() の後に選択する) と、
+    その範囲を監視し、内容が変わるたびに自動で翻訳して結果ウィンドウに追記する。
+    Shiftキーを押しながら範囲を選択すると範囲を追加でき、最後の範囲の選択 (またはEnterキー) で、
+    すべての範囲を同じ時点の画面から切り出して並行に翻訳し、結果を範囲ごとにまとめて表示する。
     """
-    def __init__(self, parent=None, config_manager=None, history_file_path=None, result_window=None):
+    def __init__(self, parent=None, config_manager=None, history_file_path=None, result_window=None, gemini_service=None):
         super().__init__(parent)
         logger.debug("SelectionWindow: __init__ が呼び出されました。")
         self.config_manager = config_manager
         self.history_file_path = history_file_path
         self.result_window = result_window
+        self.gemini_service = gemini_service
+        self.gemini_service.finished.connect(self._on_job_finished)
+        self.gemini_service.partial.connect(self._on_job_partial)
+        self.gemini_service.error.connect(self._on_job_error)
+        self.gemini_service.cancelled.connect(self._on_job_cancelled)
+        if self.result_window:
+            self.result_window.closed_signal.connect(self.on_result_window_closed)
 
         self.setWindowFlags(
             Qt.WindowStaysOnTopHint |
@@ -47,176 +59,606 @@ class SelectionWindow(QWidget):
         self.start_point = None
         self.end_point = None
         self.selecting = False
-        self.worker_thread = None
+        self._jobs = {} # job_id -> {"captured_at", "streaming"}: このウィンドウが投入した未完了のジョブ
+        self._displayed_job_id = 0 # 結果ウィンドウに表示中のジョブID (これより古いジョブの結果は表示しない)
+        # エンコード・保存・OCRを行うキャプチャパイプライン用のスレッドプール
+        self.capture_pool = QThreadPool(self)
+        self.capture_pool_threads = 2 # 通常時のスレッド数 (複数の範囲を選択した場合は一時的に増やす)
+        self.capture_pool.setMaxThreadCount(self.capture_pool_threads)
+        self._capture_counter = 0
+        self._pending_capture = None # {"id", "result", "mode"}: APIへの送信待ちのキャプチャ
         self.loading_indicator = LoadingIndicator(self)
         self.loading_indicator.hide()
+        self.loading_indicator.cancel_requested.connect(self.cancel_active_jobs)
+        self.watcher = None # RegionWatcher (監視中のみ)
+        self._watch_requested = False # 次の範囲選択を監視範囲として扱う
+        self._watch_jobs = set() # 監視モードで投入した未完了のジョブ
+        self._watch_capture_busy = False # 監視モードのキャプチャをパイプラインで処理中
+        self._watch_next_frame = None # 処理中に届いた最新のフレーム (処理が終わってから処理する)
+        self._watch_last_text = None # 最後に翻訳したOCRテキスト
+        self._frozen_frame = None # 表示時に取得した画面全体の CaptureFrame (固定表示中のみ)
+        self._frozen_pixmap = None
+        self._frozen_dimmed_pixmap = None # 固定表示用の画面を暗くした画像 (描画のたびに半透明の塗りつぶしをしないため)
+        self._shown_at = None # 表示を開始した時刻 (最初の描画までの時間の計測用)
+        self._paint_count = 0 # 範囲選択中の描画回数と合計時間 (マウスリリース時にログに記録する)
+        self._paint_seconds = 0.0
+        self._regions = [] # Shiftキーを押しながら選択した、追加の範囲 (ウィンドウ上の QRect)
         logger.debug("SelectionWindow: 初期化完了。")
 
+    def begin_selection(self, started_at=None):
+        """
+        範囲選択を開始する。behavior.freeze_screen が有効な場合は、オーバーレイを表示する前に画面を取得して固定表示する。
+        started_at にはホットキーを検出した時刻 (time.perf_counter()) を渡すと、最初の描画までの時間を記録する。
+        """
+        self._shown_at = started_at if started_at is not None else time.perf_counter()
+        desktop = QApplication.instance().desktop()
+        multi_screen = len(QApplication.screens()) > 1
+        # 複数のモニターがある場合は、仮想デスクトップ全体を覆う (showFullScreen は1つのモニターにしか広がらない)
+        self.setGeometry(desktop.geometry() if multi_screen else desktop.screenGeometry())
+        frozen = self.config_manager.get("behavior.freeze_screen", True) and self._freeze_screen(multi_screen)
+        self.setWindowOpacity(1.0 if frozen else 0.2)
+        # 固定表示では paintEvent がすべての画素を描画するため、Qt による背景の塗りつぶしを省く
+        self.setAttribute(Qt.WA_OpaquePaintEvent, frozen)
+        if multi_screen:
+            self.show()
+        else:
+            self.showFullScreen()
+        self.raise_()
+        self.activateWindow()
+
+    def _freeze_screen(self, multi_screen):
+        """オーバーレイが覆う範囲の画面を取得し、背景として表示する画像を用意する。取得に失敗した場合は False を返す。"""
+        geometry = self.geometry()
+        started = time.perf_counter()
+        try:
+            if multi_screen:
+                region = virtual_desktop_geometry()
+            else:
+                region = logical_to_physical(geometry.x(), geometry.y(), geometry.width(), geometry.height())
+            frame = get_capture_backend(self.config_manager).grab(*region)
+        except Exception:
+            logger.exception("画面の固定表示用の取得中にエラーが発生しました。")
+            frame = None
+        if frame is None:
+            logger.warning("画面の固定表示用の取得に失敗したため、通常の半透明表示で範囲を選択します。")
+            return False
+        grabbed = time.perf_counter()
+        # BGRAのバッファはリトルエンディアンの Format_RGB32 と同じ並びのため、変換せずに QImage として参照する
+        image = QImage(frame.buffer, frame.width, frame.height, frame.width * 4, QImage.Format_RGB32)
+        pixmap = QPixmap.fromImage(image)
+        dimmed = QPixmap(pixmap)
+        painter = QPainter(dimmed)
+        painter.fillRect(dimmed.rect(), QColor(0, 0, 0, 51))
+        painter.end()
+        # 高DPIの画面では取得した画像が論理座標より大きいため、ウィンドウの大きさに合わせて描画させる
+        ratio = frame.width / max(1, geometry.width())
+        pixmap.setDevicePixelRatio(ratio)
+        dimmed.setDevicePixelRatio(ratio)
+        self._frozen_frame = frame
+        self._frozen_pixmap = pixmap
+        self._frozen_dimmed_pixmap = dimmed
+        logger.debug(
+            f"画面を固定表示します ({frame.width}x{frame.height}): 取得 {(grabbed - started) * 1000:.1f} ms, "
+            f"QPixmapへの変換 {(time.perf_counter() - grabbed) * 1000:.1f} ms"
+        )
+        return True
+
+    def _release_frozen_screen(self):
+        self._frozen_frame = None
+        self._frozen_pixmap = None
+        self._frozen_dimmed_pixmap = None
+
+    def hideEvent(self, event):
+        # 固定表示用の画面全体の画像は大きいため、非表示になった時点で解放する
+        self._release_frozen_screen()
+        self._regions = []
+        super().hideEvent(event)
+
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
+            previous = self._selection_rect()
             self.start_point = event.pos()
+            self.end_point = None
             self.selecting = True
-            self.repaint()
+            self._paint_count = 0
+            self._paint_seconds = 0.0
+            if previous is not None:
+                self.update(self._dirty_rect(previous))
 
     def mouseMoveEvent(self, event):
         if self.selecting:
+            previous = self._selection_rect()
             self.end_point = event.pos()
-            self.repaint()
+            # 画面全体ではなく、前回と今回の選択範囲を合わせた範囲だけを再描画する。
+            # update() は次のイベントループでまとめて描画されるため、マウス移動が続いても描画は詰まらない
+            self.update(self._dirty_rect(self._selection_rect(), previous))
+
+    def _selection_rect(self):
+        if self.selecting and self.start_point and self.end_point:
+            return QRect(self.start_point, self.end_point).normalized()
+        return None
+
+    def _dirty_rect(self, rect, previous=None):
+        """選択範囲の枠線 (幅2px) を含めて再描画が必要な範囲を返す。"""
+        if previous is not None:
+            rect = rect.united(previous)
+        return rect.adjusted(-2, -2, 2, 2)
 
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.LeftButton and self.selecting:
             self.end_point = event.pos()
             self.selecting = False
+            released_at = time.perf_counter()
+            if self._paint_count:
+                logger.debug(
+                    f"範囲選択中の描画: {self._paint_count} 回, 平均 {self._paint_seconds / self._paint_count * 1000:.2f} ms"
+                )
+            if not (self.start_point and self.end_point):
+                return
+
+            x1 = min(self.start_point.x(), self.end_point.x())
+            y1 = min(self.start_point.y(), self.end_point.y())
+            x2 = max(self.start_point.x(), self.end_point.x())
+            y2 = max(self.start_point.y(), self.end_point.y())
+            rect = QRect(x1, y1, x2 - x1, y2 - y1)
+            too_small = abs(x2 - x1) < 10 or abs(y2 - y1) < 10
+
+            if event.modifiers() & Qt.ShiftModifier and not self._watch_requested:
+                # Shiftキーを押しながら選択した範囲は追加の範囲として保持し、同じ画面で選択を続ける
+                if too_small:
+                    logger.debug("選択範囲が小さすぎるため、追加しません。")
+                else:
+                    self._regions.append(rect)
+                    logger.debug(f"範囲 {len(self._regions)} を追加しました: ({x1},{y1},{x2 - x1},{y2 - y1})")
+                # 範囲が2つ以上になると番号を表示するため、追加済みの範囲も再描画する
+                for region in self._regions + [rect]:
+                    self.update(self._dirty_rect(region))
+                return
+
+            frozen_frame = self._frozen_frame
+            regions = list(self._regions)
             self.hide()
             logger.debug("mouseReleaseEvent: ウィンドウを非表示にしました。")
 
-            if self.start_point and self.end_point:
-                x1 = min(self.start_point.x(), self.end_point.x())
-                y1 = min(self.start_point.y(), self.end_point.y())
-                x2 = max(self.start_point.x(), self.end_point.x())
-                y2 = max(self.start_point.y(), self.end_point.y())
-
-                if abs(x2 - x1) < 10 or abs(y2 - y1) < 10:
-                    logger.debug("選択範囲が小さすぎます。処理を中断します。")
-                    self.show_custom_messagebox("エラー", "選択範囲が小さすぎます。", QMessageBox.Warning)
+            if too_small:
+                if regions:
+                    # 追加済みの範囲がある場合は、クリックで選択を終えて追加済みの範囲だけを翻訳する
+                    self._capture_regions(regions, frozen_frame, released_at)
                     return
+                logger.debug("選択範囲が小さすぎます。処理を中断します。")
+                self._watch_requested = False
+                self.show_custom_messagebox("エラー", "選択範囲が小さすぎます。", QMessageBox.Warning)
+                return
+
+            if self._watch_requested or event.modifiers() & Qt.ControlModifier:
+                self._watch_requested = False
+                self.start_watch(self.x() + x1, self.y() + y1, x2 - x1, y2 - y1)
+                return
+
+            self._capture_regions(regions + [rect], frozen_frame, released_at)
+
+    def _capture_regions(self, rects, frozen_frame, released_at):
+        """
+        選択した範囲 (ウィンドウ上の QRect のリスト) を同じ時点の画面から切り出してキャプチャパイプラインに渡し、
+        その間にAPIへの送信を確認する。複数の範囲はOCRを並行して行い、承認後にまとめて翻訳を依頼する。
+        """
+        frames = self._grab_regions(rects, frozen_frame)
+        if frames is None:
+            self.show_custom_messagebox("エラー", "スクリーンショットの取得に失敗しました。", QMessageBox.Critical)
+            return
+        logger.info(
+            f"選択範囲の画像を取得しました ({', '.join(f'{frame.width}x{frame.height}' for frame in frames)}, "
+            f"{'固定表示から切り出し' if frozen_frame is not None else '画面から取得'}): "
+            f"マウスリリースから {(time.perf_counter() - released_at) * 1000:.1f} ms"
+        )
+
+        # エンコード・保存・OCRはスレッドプールで実行し、その間に確認ダイアログを表示する
+        parallel_ocr = len(frames) > 1
+        # スレッド数は範囲の数から毎回求め直し、複数範囲のキャプチャの後も通常時の数に戻す
+        self.capture_pool.setMaxThreadCount(
+            max(self.capture_pool_threads, min(len(frames), QThread.idealThreadCount()))
+        )
+        capture_ids = []
+        for frame in frames:
+            self._capture_counter += 1
+            capture_ids.append(self._capture_counter)
+        self._pending_capture = {"ids": capture_ids, "results": {}, "mode": None}
+        for capture_id, frame in zip(capture_ids, frames):
+            worker = CaptureWorker(capture_id, frame, self.config_manager, captured_at=released_at, parallel_ocr=parallel_ocr)
+            worker.signals.finished.connect(self.on_capture_finished)
+            worker.signals.error.connect(self.on_capture_error)
+            worker.signals.ocr_error.connect(self.on_capture_ocr_error)
+            self.capture_pool.start(worker)
+        logger.debug(f"キャプチャ {capture_ids} をキャプチャパイプラインに渡しました ({(time.perf_counter() - released_at) * 1000:.1f} ms)。")
+
+        current_gemini_mode = self.config_manager.get("gemini_settings.mode", "translation")
+
+        if self.config_manager.get("behavior.show_api_confirmation"):
+            message = "スクリーンショットをGemini APIに送信して翻訳しますか？"
+            if len(frames) > 1:
+                message = f"{len(frames)} 個の範囲のスクリーンショットをGemini APIに送信して翻訳しますか？"
+            dialog = CustomMessageBox(
+                self,
+                "API送信確認",
+                message,
+                QMessageBox.Question,
+                QMessageBox.Yes | QMessageBox.No,
+                current_mode=current_gemini_mode
+            )
+            # 修正: CustomMessageBoxの_load_stylesheetを呼び出す
+            dialog._load_stylesheet(os.path.join('styles', 'custom_message_box.qss'))
+
+            reply = dialog.exec_()
+            selected_mode = dialog.selected_mode
+        else:
+            reply = QMessageBox.Yes
+            selected_mode = current_gemini_mode
+
+        if self._pending_capture is None or self._pending_capture["ids"] != capture_ids:
+            # ダイアログ表示中にキャプチャ処理が失敗した場合など
+            return
+
+        if reply == QMessageBox.Yes:
+            logger.debug(f"API送信が承認されました。選択されたモード: {selected_mode}")
+            self.loading_indicator.show()
+            self._pending_capture["mode"] = selected_mode
+            if len(self._pending_capture["results"]) == len(capture_ids):
+                self._dispatch_pending_capture()
+            else:
+                logger.debug(f"キャプチャ {capture_ids} の処理完了を待ってからAPIに送信します。")
+        else:
+            logger.debug("API送信がキャンセルされました。")
+            self._pending_capture = None
+
+    def _grab_regions(self, rects, frozen_frame):
+        """
+        各範囲の CaptureFrame のリストを返す。固定表示中はその画像から、そうでなければ全範囲を含む矩形を
+        1回だけ取得して切り出す (すべての範囲が同じ時点の画面になる)。取得に失敗した場合は None を返す。
+        """
+        if frozen_frame is not None:
+            source, origin_x, origin_y = frozen_frame, 0, 0
+            scale = frozen_frame.width / max(1, self.width())
+        else:
+            bounds = rects[0]
+            for rect in rects[1:]:
+                bounds = bounds.united(rect)
+            source = self.grab_selected_region(self.x() + bounds.x(), self.y() + bounds.y(), bounds.width(), bounds.height())
+            if source is None:
+                return None
+            if len(rects) == 1:
+                return [source]
+            origin_x, origin_y = bounds.x(), bounds.y()
+            scale = source.width / max(1, bounds.width())
+        return [
+            source.crop(
+                round((rect.x() - origin_x) * scale), round((rect.y() - origin_y) * scale),
+                round(rect.width() * scale), round(rect.height() * scale)
+            )
+            for rect in rects
+        ]
 
-                screenshot_data = self.take_selected_screenshot_in_memory(x1, y1, x2 - x1, y2 - y1)
-                
-                original_text_from_ocr = self._perform_ocr(screenshot_data)
-                logger.debug(f"OCR抽出結果: {original_text_from_ocr[:100]}..." if original_text_from_ocr else "OCRでテキストが抽出できませんでした。")
-
-                if screenshot_data:
-                    current_gemini_mode = self.config_manager.get("gemini_settings.mode", "translation")
-                    
-                    if self.config_manager.get("behavior.show_api_confirmation"):
-                        dialog = CustomMessageBox(
-                            self,
-                            "API送信確認",
-                            "スクリーンショットをGemini APIに送信して翻訳しますか？",
-                            QMessageBox.Question,
-                            QMessageBox.Yes | QMessageBox.No,
-                            current_mode=current_gemini_mode
-                        )
-                        # 修正: CustomMessageBoxの_load_stylesheetを呼び出す
-                        dialog._load_stylesheet(os.path.join('styles', 'custom_message_box.qss'))
-
-                        reply = dialog.exec_()
-                        selected_mode = dialog.selected_mode
-                    else:
-                        reply = QMessageBox.Yes
-                        selected_mode = current_gemini_mode
-
-                    if reply == QMessageBox.Yes:
-                        logger.debug(f"API送信が承認されました。選択されたモード: {selected_mode}")
-                        self.loading_indicator.show()
-                        
-                        self.config_manager.set("gemini_settings.mode", selected_mode)
-
-                        self.worker_thread = GeminiWorker(screenshot_data, original_text_from_ocr, self.config_manager, self.history_file_path)
-                        self.worker_thread.finished.connect(self.on_gemini_finished)
-                        self.worker_thread.error.connect(self.on_gemini_error)
-                        self.worker_thread.start()
-                    else:
-                        logger.debug("API送信がキャンセルされました。")
-                else:
-                    self.show_custom_messagebox("エラー", "スクリーンショットの取得に失敗しました。", QMessageBox.Critical)
-            
     def keyPressEvent(self, event):
         if event.key() == Qt.Key_Escape:
             logger.debug("Escキーが押されました。選択をキャンセルします。")
+            self._watch_requested = False
             self.hide()
+        elif event.key() in (Qt.Key_Return, Qt.Key_Enter) and self._regions and not self.selecting:
+            # Shiftキーで追加した範囲だけで選択を終える
+            released_at = time.perf_counter()
+            frozen_frame = self._frozen_frame
+            regions = list(self._regions)
+            self.hide()
+            self._capture_regions(regions, frozen_frame, released_at)
 
     def paintEvent(self, event):
+        started = time.perf_counter()
         painter = QPainter(self)
-        if self.selecting and self.start_point and self.end_point:
-            rect = QRect(self.start_point, self.end_point).normalized()
-            painter.setPen(QPen(QColor(255, 0, 0), 2))
+        dirty = event.rect()
+        selections = list(self._regions)
+        if self._selection_rect() is not None:
+            selections.append(self._selection_rect())
+        if self._frozen_pixmap is not None:
+            # 固定表示では半透明のウィンドウの代わりに、あらかじめ暗くした画面の画像を再描画が必要な範囲だけ描画し、
+            # 選択範囲は元の明るさの画像で描画する (アルファブレンドを伴う塗りつぶしは行わない)
+            painter.drawPixmap(dirty, self._frozen_dimmed_pixmap, self._pixmap_rect(dirty))
+            for selection in selections:
+                bright = selection.intersected(dirty)
+                if not bright.isEmpty():
+                    painter.drawPixmap(bright, self._frozen_pixmap, self._pixmap_rect(bright))
+        else:
             painter.setBrush(QColor(255, 255, 255, 50))
-            painter.drawRect(rect)
-
-    def take_selected_screenshot_in_memory(self, x, y, width, height):
-        logger.debug(f"take_selected_screenshot: スクリーンショット範囲 ({x},{y},{width},{height})")
-        
-        output_folder = self.config_manager.get("OUTPUT_FOLDER", "screenshots")
-        if not os.path.exists(output_folder):
-            os.makedirs(output_folder)
-            logger.debug(f"フォルダ '{output_folder}' を作成しました。")
-
-        with mss.mss() as sct:
-            monitor = {"top": y, "left": x, "width": width, "height": height}
-            sct_img = sct.grab(monitor)
-
-            img_pil = Image.frombytes("RGB", sct_img.size, sct_img.rgb)
-            
-            timestamp = time.strftime("%Y%m%d-%H%M%S")
-            filename = f"screenshot_{timestamp}.png"
-            filepath = os.path.join(output_folder, filename)
-
-            try:
-                img_pil.save(filepath, "PNG")
-                logger.debug(f"スクリーンショットをファイルに保存しました: {filepath}")
-            except Exception as e:
-                logger.exception(f"スクリーンショットのファイル保存中にエラーが発生しました。")
-                return None
-
-            byte_array = QBuffer()
-            byte_array.open(QIODevice.WriteOnly)
-            img_pil.save(byte_array, "PNG")
-            logger.debug("スクリーンショットをメモリに取得しました。")
-            return byte_array.buffer().data()
+        painter.setPen(QPen(QColor(255, 0, 0), 2))
+        for index, selection in enumerate(selections, 1):
+            if not selection.intersects(self._dirty_rect(dirty)):
+                continue
+            painter.drawRect(selection)
+            if len(selections) > 1:
+                # 複数の範囲を選択している場合は、結果ウィンドウの見出しと対応する番号を表示する
+                painter.drawText(selection.adjusted(4, 2, 0, 0), Qt.AlignLeft | Qt.AlignTop, str(index))
+        painter.end()
+        if self.selecting:
+            self._paint_count += 1
+            self._paint_seconds += time.perf_counter() - started
+        if self._shown_at is not None:
+            logger.info(f"範囲選択のオーバーレイを表示しました: ホットキーから {(time.perf_counter() - self._shown_at) * 1000:.1f} ms")
+            self._shown_at = None
+
+    def _pixmap_rect(self, rect):
+        """ウィンドウ上の矩形を、固定表示用の画像のピクセル座標に変換する。"""
+        scale = self._frozen_pixmap.devicePixelRatio()
+        return QRect(
+            round(rect.x() * scale), round(rect.y() * scale), round(rect.width() * scale), round(rect.height() * scale)
+        )
 
-    def _perform_ocr(self, image_data):
+    def grab_selected_region(self, x, y, width, height):
         """
-        バイトデータからOCRを実行し、抽出されたテキストを返す。
-        Tesseract OCRエンジンとpytesseractが必要。
-        OCRが利用できない場合は空の文字列を返す。
+        選択範囲 (Qtの論理座標) の画面をキャプチャバックエンドで取得し、CaptureFrame を返す。
+        GUIスレッドではピクセルの取得のみを行い、変換・エンコード等は CaptureWorker に任せる。
+        取得に失敗した場合は None を返す。
         """
-        tesseract_path = self.config_manager.get("ocr_settings.tesseract_path")
-        lang = self.config_manager.get("ocr_settings.lang", "eng+jpn")
-        ocr_config_str = self.config_manager.get("ocr_settings.config", "--psm 3")
-
-        if not tesseract_path:
-            logger.debug("OCRスキップ: setting.yamlでtesseract_pathが指定されていません。")
-            return ""
-        
+        logger.debug(f"grab_selected_region: スクリーンショット範囲 ({x},{y},{width},{height})")
         try:
-            import pytesseract
-        except ImportError:
-            error_msg = "OCR機能は有効ですが、pytesseractライブラリが見つかりません。\n" \
-                        "'pip install pytesseract' を実行してください。"
-            logger.error(f"OCR処理中にエラーが発生しました: {error_msg}")
-            self.show_custom_messagebox("OCRエラー", error_msg, QMessageBox.Critical)
-            return ""
+            return get_capture_backend(self.config_manager).grab(*logical_to_physical(x, y, width, height))
+        except Exception as e:
+            logger.exception("スクリーンショットの取得中にエラーが発生しました。")
+            return None
+
+    def on_capture_finished(self, result):
+        """CaptureWorker の処理が完了したときに呼び出されるスロット。"""
+        if self._pending_capture is None or result.capture_id not in self._pending_capture["ids"]:
+            logger.debug(f"キャプチャ {result.capture_id} は既に破棄されているため、結果を無視します。")
+            return
+        self._pending_capture["results"][result.capture_id] = result
+        if len(self._pending_capture["results"]) == len(self._pending_capture["ids"]):
+            # 複数の範囲のために増やしたスレッド数を、監視モードなど以降のキャプチャのために戻す
+            self.capture_pool.setMaxThreadCount(self.capture_pool_threads)
+            if self._pending_capture["mode"] is not None:
+                self._dispatch_pending_capture()
+
+    def on_capture_error(self, capture_id, error_message):
+        """CaptureWorker でエラーが発生したときに呼び出されるスロット。"""
+        if self._pending_capture is None or capture_id not in self._pending_capture["ids"]:
+            return
+        # 複数の範囲のうち1つでも失敗した場合は、同時に選択した範囲をまとめて中止する
+        self._pending_capture = None
+        self.capture_pool.setMaxThreadCount(self.capture_pool_threads)
+        self.loading_indicator.hide()
+        self.show_custom_messagebox("エラー", error_message, QMessageBox.Critical)
 
-        pytesseract.pytesseract.tesseract_cmd = tesseract_path
+    def on_capture_ocr_error(self, capture_id, error_message):
+        """OCRに失敗したときに呼び出されるスロット。OCRテキストなしで処理は続行される。"""
+        self.show_custom_messagebox("OCRエラー", error_message, QMessageBox.Critical)
 
-        try:
-            img_pil = Image.open(BytesIO(image_data))
-            extracted_text = pytesseract.image_to_string(img_pil, lang=lang, config=ocr_config_str)
-            return extracted_text.strip()
-        except pytesseract.TesseractNotFoundError:
-            error_msg = "OCR機能が利用できません。\n" \
-                        "Tesseract OCRエンジンが見つかりません。\n" \
-                        "Tesseractがインストールされ、PATHに設定されているか、\n" \
-                        "またはsetting.yamlのocr_settings.tesseract_pathに正しいパスが指定されているか確認してください。"
-            logger.error(f"OCR処理中にエラーが発生しました: {error_msg}")
-            self.show_custom_messagebox("OCRエラー", error_msg, QMessageBox.Critical)
-            return ""
-        except Exception as e:
-            error_msg = f"OCR処理中に予期せぬエラーが発生しました: {e}"
-            logger.exception(f"OCR処理中に予期せぬエラーが発生しました。")
-            self.show_custom_messagebox("OCRエラー", error_msg, QMessageBox.Critical)
-            return ""
+    def _dispatch_pending_capture(self):
+        """
+        キャプチャ処理とユーザーの承認がそろったキャプチャをGemini APIに送信する。
+        複数の範囲のキャプチャは同時に投入し、GeminiService の同時実行数の範囲で並行に翻訳させる。
+        """
+        pending = self._pending_capture
+        self._pending_capture = None
+        results = [pending["results"][capture_id] for capture_id in pending["ids"]]
+        logger.debug(f"キャプチャ {pending['ids']} をAPIに送信します (マウスリリースから {(time.perf_counter() - results[0].captured_at) * 1000:.1f} ms)。")
+
+        self.config_manager.set("gemini_settings.mode", pending["mode"])
+
+        # バッチモードでは続けて送信したキャプチャをまとめて処理するため、古いリクエストは打ち切らない
+        if self.config_manager.get("gemini_settings.cancel_superseded", True) and \
+           not self.config_manager.get("batch_settings.enabled", False):
+            # 新しいキャプチャが古いキャプチャを置き換えるため、処理中の古いリクエストは打ち切る
+            for old_job_id in list(self._jobs):
+                self._jobs.pop(old_job_id)
+                self.gemini_service.cancel(old_job_id)
+
+        group = None
+        if len(results) > 1:
+            # 範囲ごとの結果をまとめて表示するためのグループ。sections は範囲の順の (翻訳, 解説) で、未完了の範囲は None
+            group = {"job_ids": [], "sections": [None] * len(results), "remaining": len(results), "busy_seconds": 0.0,
+                     "submitted_at": time.perf_counter()}
+        for index, result in enumerate(results):
+            job_id = self.gemini_service.submit(
+                result.image_data, result.ocr_text, pending["mode"],
+                image_hash=result.image_hash, mime_type=result.mime_type, ocr_confidence=result.ocr_confidence
+            )
+            self._jobs[job_id] = {"captured_at": result.captured_at, "streaming": False, "group": group, "index": index,
+                                  "submitted_at": time.perf_counter()}
+            if group is not None:
+                group["job_ids"].append(job_id)
+
+    def start_watch_selection(self):
+        """次に選択した範囲を監視範囲とするため、範囲選択を開始する。"""
+        self._watch_requested = True
+        self.begin_selection()
+
+    def start_watch(self, x, y, width, height):
+        """指定した範囲 (Qtの論理座標) の監視を開始する。既に監視中の場合は範囲を置き換える。"""
+        self.stop_watch()
+        self._watch_last_text = None
+        backend = get_capture_backend(self.config_manager)
+        # 監視スレッドからはGUIスレッド専用のバックエンド (Qt) を使えないため、その場合は mss を使う
+        backend_name = "mss" if backend.gui_thread_only else backend.name
+        self.watcher = RegionWatcher(
+            *logical_to_physical(x, y, width, height), self.config_manager, backend_name=backend_name
+        )
+        self.watcher.signals.frame_changed.connect(self._on_watch_frame)
+        self.watcher.signals.error.connect(self._on_watch_error)
+        self.watcher.start()
+
+    def stop_watch(self):
+        """範囲の監視を終了し、監視モードで処理中のジョブをキャンセルする。"""
+        if self.watcher is None:
+            return
+        self.watcher.stop()
+        self.watcher = None
+        self._watch_next_frame = None
+        for job_id in list(self._watch_jobs):
+            self._watch_jobs.discard(job_id)
+            self.gemini_service.cancel(job_id)
+
+    def is_watching(self):
+        return self.watcher is not None
+
+    def _on_watch_frame(self, frame):
+        """監視範囲の内容が変わったときに呼び出されるスロット。キャプチャパイプラインは1件ずつ使う。"""
+        if self.watcher is None:
+            return
+        if self._watch_capture_busy:
+            # 処理中に届いたフレームは最新のものだけを残し、処理が終わってから処理する
+            self._watch_next_frame = frame
+            return
+        self._watch_capture_busy = True
+        self._capture_counter += 1
+        worker = CaptureWorker(
+            self._capture_counter, frame, self.config_manager,
+            save_to_disk=self.config_manager.get("watch_settings.save_screenshots", False)
+        )
+        worker.signals.finished.connect(self._on_watch_capture_finished)
+        worker.signals.error.connect(self._on_watch_capture_error)
+        self.capture_pool.start(worker)
+
+    def _on_watch_capture_finished(self, result):
+        self._watch_capture_busy = False
+        if self.watcher is not None:
+            ocr_text = result.ocr_text.strip()
+            if ocr_text and ocr_text == self._watch_last_text:
+                # 画面の変化が文字以外 (背景のアニメーションなど) のみの場合はAPIに送信しない
+                logger.debug(f"監視モード: キャプチャ {result.capture_id} のOCRテキストが前回と同じため、送信しません。")
+            elif not ocr_text and self.config_manager.get("ocr_settings.tesseract_path"):
+                logger.debug(f"監視モード: キャプチャ {result.capture_id} から文字が検出されなかったため、送信しません。")
+            else:
+                self._watch_last_text = ocr_text
+                job_id = self.gemini_service.submit(
+                    result.image_data, result.ocr_text, self.config_manager.get("gemini_settings.mode", "translation"),
+                    image_hash=result.image_hash, mime_type=result.mime_type, ocr_confidence=result.ocr_confidence,
+                    priority=PRIORITY_BACKGROUND
+                )
+                self._watch_jobs.add(job_id)
+        self._process_next_watch_frame()
+
+    def _on_watch_capture_error(self, capture_id, error_message):
+        self._watch_capture_busy = False
+        logger.warning(f"監視モード: キャプチャ {capture_id} の処理に失敗しました: {error_message}")
+        self._process_next_watch_frame()
+
+    def _process_next_watch_frame(self):
+        frame = self._watch_next_frame
+        self._watch_next_frame = None
+        if frame is not None:
+            self._on_watch_frame(frame)
+
+    def _on_watch_error(self, error_message):
+        self.stop_watch()
+        self.show_custom_messagebox("エラー", error_message, QMessageBox.Critical)
+
+    def _on_job_finished(self, job_id, original_text, translation, explanation):
+        """GeminiService のジョブ完了通知を、このウィンドウが投入したジョブについてのみ処理する。"""
+        if job_id in self._watch_jobs:
+            self._watch_jobs.discard(job_id)
+            append_translation_entry(self.history_file_path, original_text, translation, explanation)
+            if self.result_window:
+                self.result_window.append_content(translation, explanation)
+            return
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return
+        logger.info(f"翻訳完了 (ジョブ {job_id}): マウスリリースから {(time.perf_counter() - job['captured_at']) * 1000:.0f} ms")
+        if job["group"] is not None:
+            append_translation_entry(self.history_file_path, original_text, translation, explanation)
+            self._finish_group_job(job, (translation, explanation))
+            return
+        if job_id < self._displayed_job_id:
+            # より新しいキャプチャの結果が既に表示されているため、履歴にのみ保存する
+            logger.debug(f"ジョブ {job_id} の結果は新しいキャプチャに置き換えられたため、履歴にのみ保存します。")
+            append_translation_entry(self.history_file_path, original_text, translation, explanation)
+            return
+        self._displayed_job_id = job_id
+        self.on_gemini_finished(original_text, translation, explanation)
+
+    def _finish_group_job(self, job, section):
+        """
+        複数の範囲のジョブの結果 section (翻訳, 解説) を記録し、範囲ごとにまとめて結果ウィンドウに表示する。
+        より新しいキャプチャの結果が表示されている場合は表示を更新しない。
+        """
+        group = job["group"]
+        group["sections"][job["index"]] = section
+        group["remaining"] -= 1
+        group["busy_seconds"] += time.perf_counter() - job["submitted_at"]
+        if group["remaining"] == 0:
+            wall = time.perf_counter() - group["submitted_at"]
+            # 範囲ごとの処理時間の合計と経過時間の比は、範囲を並行に翻訳したことによる短縮の目安になる
+            logger.info(
+                f"複数範囲の翻訳完了 ({len(group['sections'])} 範囲): マウスリリースから "
+                f"{(time.perf_counter() - job['captured_at']) * 1000:.0f} ms, 送信から {wall * 1000:.0f} ms, "
+                f"範囲ごとの合計 {group['busy_seconds'] * 1000:.0f} ms (並列度 {group['busy_seconds'] / wall if wall else 0:.1f})"
+            )
+        first_job_id = group["job_ids"][0]
+        if first_job_id < self._displayed_job_id:
+            return
+        self._displayed_job_id = first_job_id
+        self.loading_indicator.hide()
+        if self.result_window:
+            self.result_window.update_group_content(group["sections"])
+
+    def _on_job_partial(self, job_id, translation, explanation):
+        job = self._jobs.get(job_id)
+        # 複数の範囲のジョブは、途中経過を表示せずに範囲ごとの結果がそろった順に表示する
+        if job is None or job["group"] is not None or job_id < self._displayed_job_id:
+            return
+        self._displayed_job_id = job_id
+        if not job["streaming"]:
+            # 最初のチャンクが届いた時点でローディング表示を結果ウィンドウに切り替える
+            job["streaming"] = True
+            logger.info(f"最初の翻訳テキストを表示 (ジョブ {job_id}): マウスリリースから {(time.perf_counter() - job['captured_at']) * 1000:.0f} ms")
+            self.loading_indicator.hide()
+            if self.result_window:
+                self.result_window.begin_streaming()
+        self.on_gemini_partial(translation, explanation)
+
+    def _on_job_error(self, job_id, error_message):
+        if job_id in self._watch_jobs:
+            # 監視モードでは次の変化で再度翻訳されるため、ダイアログは表示しない
+            self._watch_jobs.discard(job_id)
+            logger.warning(f"監視モード: ジョブ {job_id} の翻訳に失敗しました: {error_message}")
+            return
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return
+        if job["group"] is not None:
+            # 他の範囲の結果は表示を続けるため、失敗した範囲はダイアログではなく結果ウィンドウに表示する
+            logger.warning(f"ジョブ {job_id} の翻訳に失敗しました: {error_message}")
+            self._finish_group_job(job, (f"(翻訳に失敗しました: {error_message})", ""))
+            return
+        self.on_gemini_error(error_message)
+
+    def _on_job_cancelled(self, job_id):
+        self._watch_jobs.discard(job_id)
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return
+        logger.info(f"ジョブ {job_id} はキャンセルされました。")
+        if job["group"] is not None:
+            self._finish_group_job(job, ("(キャンセルされました)", ""))
+        if not self._jobs:
+            self.loading_indicator.hide()
+
+    def cancel_active_jobs(self):
+        """このウィンドウが投入した未完了のジョブをすべてキャンセルする。"""
+        self._pending_capture = None
+        for job_id in list(self._jobs):
+            self.gemini_service.cancel(job_id)
+        self.loading_indicator.hide()
 
+    def on_result_window_closed(self):
+        """結果ウィンドウが閉じられたとき、表示中のストリーミングを打ち切る。"""
+        job = self._jobs.get(self._displayed_job_id)
+        if job is not None and job["streaming"]:
+            logger.debug(f"結果ウィンドウが閉じられたため、ジョブ {self._displayed_job_id} をキャンセルします。")
+            self.gemini_service.cancel(self._displayed_job_id)
 
     def on_gemini_finished(self, original_text, translation, explanation):
         """Slot called when Gemini API processing is complete"""
         self.loading_indicator.hide()
 
-        history_data = load_translation_history(self.history_file_path)
-        add_translation_entry(history_data, original_text, translation, explanation)
-        save_translation_history(self.history_file_path, history_data)
+        append_translation_entry(self.history_file_path, original_text, translation, explanation)
 
         if self.result_window:
             self.result_window.update_content(translation, explanation)
@@ -226,9 +668,15 @@ class SelectionWindow(QWidget):
         else:
             self.show_custom_messagebox("翻訳結果", f"翻訳結果:\n{translation}\n\n解説:\n{explanation}", QMessageBox.Information)
 
+    def on_gemini_partial(self, translation, explanation):
+        """Slot called with the partial result while a streaming response is arriving"""
+        if self.result_window:
+            self.result_window.update_partial_content(translation, explanation)
+
     def on_gemini_error(self, error_message):
         """Slot called when an error occurs during Gemini API processing"""
-        self.loading_indicator.hide()
+        if not self._jobs:
+            self.loading_indicator.hide()
         self.show_custom_messagebox("エラー", error_message, QMessageBox.Critical)
 
     def show_custom_messagebox(self, title, message, icon_type, buttons=QMessageBox.Ok):
@@ -0,0 +1,107 @@
+"""
+キャプチャバックエンドのテスト。
+画面を取得するテストは X サーバー (Xvfb など) が必要なため、DISPLAY が設定されていない場合はスキップする。
+
+    xvfb-run -s "-screen 0 1280x720x24" python -m pytest tests/test_capture_backends.py
+"""
+import os
+import sys
+import time
+
+import pytest
+
+pytest.importorskip("PyQt5.QtCore")
+
+from PyQt5.QtCore import QRect
+
+from src.utils import capture_backends
+from src.utils.capture_backends import physical_to_screen_offset
+
+class _FakeScreen:
+    def __init__(self, geometry, ratio):
+        self._geometry = geometry
+        self._ratio = ratio
+
+    def geometry(self):
+        return self._geometry
+
+    def devicePixelRatio(self):
+        return self._ratio
+
+def test_physical_to_screen_offset_on_scaled_secondary_monitor():
+    # 物理座標 x=1920 から始まる 150% のモニター (論理サイズ 1280x720, 物理サイズ 1920x1080)
+    screen = _FakeScreen(QRect(1920, 0, 1280, 720), 1.5)
+    assert physical_to_screen_offset(screen, 1920, 0, 300, 150) == (0, 0, 200, 100)
+    assert physical_to_screen_offset(screen, 2220, 150, 300, 150) == (200, 100, 200, 100)
+
+def test_physical_to_screen_offset_on_primary_monitor_without_scaling():
+    screen = _FakeScreen(QRect(0, 0, 1920, 1080), 1.0)
+    assert physical_to_screen_offset(screen, 37, 23, 200, 120) == (37, 23, 200, 120)
+
+def test_qt_backend_passes_screen_relative_offset(monkeypatch):
+    screen = _FakeScreen(QRect(1920, 0, 1280, 720), 1.5)
+    calls = []
+
+    class _NullPixmap:
+        def isNull(self):
+            return True
+
+    def grab_window(window, x, y, width, height):
+        calls.append((window, x, y, width, height))
+        return _NullPixmap()
+
+    screen.grabWindow = grab_window
+    monkeypatch.setattr(capture_backends, "screen_at_physical", lambda x, y: screen)
+    backend = object.__new__(capture_backends.QtScreenBackend)
+    with pytest.raises(capture_backends.CaptureError):
+        backend.grab(2220, 150, 300, 150)
+    assert calls == [(0, 200, 100, 200, 100)]
+
+@pytest.fixture(scope="module")
+def application():
+    if not sys.platform.startswith("win") and not os.environ.get("DISPLAY"):
+        pytest.skip("X サーバーがないため、画面の取得はテストできません (xvfb-run で実行してください)。")
+    pytest.importorskip("mss")
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+def _show_pattern(application):
+    """画面の左上に、位置によって色が変わる模様のウィンドウを表示する。"""
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtGui import QColor, QPainter, QPixmap
+    from PyQt5.QtWidgets import QLabel
+    pixmap = QPixmap(400, 300)
+    painter = QPainter(pixmap)
+    for y in range(0, 300, 10):
+        for x in range(0, 400, 10):
+            painter.fillRect(x, y, 10, 10, QColor((x * 7) % 256, (y * 11) % 256, ((x + y) * 5) % 256))
+    painter.end()
+    label = QLabel()
+    label.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
+    label.setPixmap(pixmap)
+    label.setGeometry(0, 0, 400, 300)
+    label.show()
+    deadline = time.monotonic() + 2.0
+    while time.monotonic() < deadline:
+        application.processEvents()
+        time.sleep(0.02)
+    return label
+
+def test_qt_and_mss_capture_the_same_pixels(application):
+    label = _show_pattern(application)
+    try:
+        mss_backend = capture_backends.create_capture_backend("mss")
+        qt_backend = capture_backends.create_capture_backend("qt")
+        try:
+            region = (37, 23, 200, 120)
+            mss_frame = mss_backend.grab(*region)
+            qt_frame = qt_backend.grab(*region)
+        finally:
+            mss_backend.close()
+            qt_backend.close()
+    finally:
+        label.close()
+
+    assert qt_frame.size == mss_frame.size == (200, 120)
+    assert (qt_frame.left, qt_frame.top) == (mss_frame.left, mss_frame.top) == (37, 23)
+    assert qt_frame.to_image().tobytes() == mss_frame.to_image().tobytes()
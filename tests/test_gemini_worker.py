@@ -0,0 +1,113 @@
+"""
+GeminiWorker のストリーミング受信のテスト。
+チャンクを1つずつ返すスタブのモデルを使い、途中経過の通知と、受信中のキャンセルを確認する。
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("PyQt5.QtCore")
+
+from src.config.config_manager import ConfigManager
+from src.threads.gemini_worker import GeminiWorker, GeminiBatchWorker
+from src.threads.request_scheduler import RequestScheduler
+from src.utils.response_parser import StreamingResponseParser, parse_gemini_response
+from src.utils.translation_cache import TranslationCache
+
+CHUNKS = ["翻訳結果: こんにちは", "、冒険者よ。\n解", "説:\n- adventurer", ": 冒険者"]
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+class _StubModel:
+    """
+    generate_content_async でチャンクを1つずつ返すスタブ。stall_after 個のチャンクを返した後は、
+    release が設定されるまで次のチャンクを返さない (通信が途中で止まった状態)。
+    """
+    def __init__(self, chunks, stall_after=None):
+        self.chunks = chunks
+        self.stall_after = stall_after
+        self.release = asyncio.Event()
+        self.stalled = asyncio.Event()
+        self.closed = False
+
+    async def generate_content_async(self, prompt_parts, stream=False):
+        async def iterate():
+            try:
+                for index, text in enumerate(self.chunks):
+                    if index == self.stall_after:
+                        self.stalled.set()
+                        await self.release.wait()
+                    await asyncio.sleep(0)
+                    yield _Chunk(text)
+            finally:
+                self.closed = True
+        return iterate()
+
+class _FailingModel:
+    async def generate_content_async(self, prompt_parts, stream=False):
+        raise ValueError("bad request")
+
+def _make_worker(tmp_path, model, scheduler=None, job_id=1, translation_cache=None):
+    config_manager = ConfigManager(str(tmp_path / "setting.yaml"))
+    worker = GeminiWorker(job_id, f"image-{job_id}".encode(), "", "translation", config_manager, lambda model_name: model,
+                          scheduler=scheduler, translation_cache=translation_cache)
+    events = []
+    worker.signals.partial.connect(lambda job_id, translation, explanation: events.append(("partial", translation, explanation)))
+    worker.signals.finished.connect(lambda job_id, original, translation, explanation: events.append(("finished", translation, explanation)))
+    worker.signals.error.connect(lambda job_id, message: events.append(("error", message)))
+    return worker, events
+
+def _expected_partials(chunks):
+    parser = StreamingResponseParser("translation")
+    return [("partial",) + parser.feed(chunk) for chunk in chunks]
+
+def test_stream_emits_partials_then_finished(tmp_path):
+    model = _StubModel(CHUNKS)
+    worker, events = _make_worker(tmp_path, model)
+    asyncio.run(worker.run())
+    assert events[:-1] == _expected_partials(CHUNKS)
+    assert events[-1] == ("finished",) + parse_gemini_response("".join(CHUNKS))
+
+def test_cancel_midway_stops_stream_without_result(tmp_path):
+    model = _StubModel(CHUNKS, stall_after=2)
+
+    async def run_and_cancel():
+        scheduler = RequestScheduler(ConfigManager(str(tmp_path / "setting.yaml")), max_concurrent=1)
+        worker, events = _make_worker(tmp_path, model, scheduler)
+        task = asyncio.ensure_future(worker.run())
+        await asyncio.wait_for(model.stalled.wait(), 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # キャンセル後に通信が再開しても、結果は通知されない
+        model.release.set()
+        await asyncio.sleep(0.01)
+        return worker, events, scheduler
+
+    worker, events, scheduler = asyncio.run(run_and_cancel())
+    assert events == _expected_partials(CHUNKS[:2])
+    assert worker._cancelled.is_set()
+    assert model.closed
+    # キャンセルしたリクエストの同時実行数の枠は解放される
+    assert scheduler.stats()["running"] == 0
+
+def test_batch_error_is_sent_only_to_pending_jobs(tmp_path):
+    cache = TranslationCache(str(tmp_path / "cache.db"))
+    # ジョブ 1 の結果はキャッシュ済み
+    cached_worker, _ = _make_worker(tmp_path, _StubModel(CHUNKS), job_id=1, translation_cache=cache)
+    asyncio.run(cached_worker.run())
+
+    model = _FailingModel()
+    workers = []
+    events = {}
+    for job_id in (1, 2, 3):
+        worker, events[job_id] = _make_worker(tmp_path, model, job_id=job_id, translation_cache=cache)
+        workers.append(worker)
+    asyncio.run(GeminiBatchWorker(workers, workers[0].config_manager, lambda model_name: model).run())
+    cache.close()
+
+    assert [event[0] for event in events[1]] == ["finished"]
+    assert [event[0] for event in events[2]] == ["error"]
+    assert [event[0] for event in events[3]] == ["error"]
@@ -0,0 +1,84 @@
+"""
+OCRの前処理のテスト。
+OCRの一致率を比べるテストは Tesseract が必要なため、見つからない場合はスキップする。
+
+    python -m pytest tests/test_ocr_preprocessing.py
+"""
+import shutil
+import difflib
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from PIL import Image, ImageDraw, ImageFont
+
+from src.utils.ocr_preprocessing import prepare_ocr_image
+from src.utils.ocr_utils import create_ocr_engine
+
+class _Config:
+    """ocr_settings.preprocessing だけを持つ ConfigManager の代わり。"""
+    def __init__(self, **settings):
+        self.settings = {"enabled": True}
+        self.settings.update(settings)
+
+    def get(self, key_path, default=None):
+        return self.settings if key_path == "ocr_settings.preprocessing" else default
+
+def _text_image(size, background, color, lines, font_size):
+    image = Image.new("RGB", size, background)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=font_size)
+    for index, line in enumerate(lines):
+        draw.text((20, 16 + index * font_size * 3 // 2), line, font=font, fill=color)
+    return image
+
+def test_dark_panel_becomes_dark_text_on_white():
+    image = _text_image((600, 80), (20, 24, 32), (230, 230, 230), ["The imperial courier"], 32)
+    result = np.asarray(prepare_ocr_image(image, _Config()))
+    # 高さ 400 未満の画像は 2 倍に拡大され、文字が黒 (0)、背景が白 (255) に二値化される
+    assert result.shape == (160, 1200)
+    assert set(np.unique(result)) <= {0, 255}
+    assert result[:10].min() == 255 and result[-10:].min() == 255
+    assert 0.01 < (result == 0).mean() < 0.3
+
+def test_color_key_keeps_only_hud_color():
+    rng = random.Random(0)
+    image = Image.new("RGB", (400, 120))
+    draw = ImageDraw.Draw(image)
+    for _ in range(100):
+        left, top = rng.randrange(400), rng.randrange(120)
+        draw.rectangle((left, top, left + 30, top + 30), fill=tuple(rng.randrange(0, 150) for _ in range(3)))
+    draw.text((20, 30), "Shield 75%", font=ImageFont.load_default(size=48), fill=(255, 215, 0))
+    settings = _Config(upscale_below_height=0, color_keys=[{"color": "#FFD700", "tolerance": 60}])
+    result = np.asarray(prepare_ocr_image(image, settings))
+    distance = ((np.asarray(image).astype(np.int32) - (255, 215, 0)) ** 2).sum(axis=2)
+    np.testing.assert_array_equal(result == 0, distance <= 60 * 60)
+    assert (result == 0).any()
+
+def _similarity(expected, actual):
+    return difflib.SequenceMatcher(None, " ".join(expected.split()), " ".join(actual.split())).ratio()
+
+@pytest.mark.skipif(not shutil.which("tesseract"), reason="Tesseract が必要")
+def test_preprocessing_does_not_lower_ocr_accuracy():
+    pytest.importorskip("pytesseract")
+    fixtures = [
+        (_text_image((1200, 160), (20, 24, 32), (230, 230, 230),
+                     ["The imperial courier has arrived.", "Deliver the sealed letter."], 32),
+         "The imperial courier has arrived.\nDeliver the sealed letter."),
+        (_text_image((1000, 160), (236, 226, 198), (40, 30, 20),
+                     ["Quest updated: Find the lost shield", "Reward: 250 Gold"], 30),
+         "Quest updated: Find the lost shield\nReward: 250 Gold"),
+        (_text_image((420, 40), (30, 60, 40), (250, 250, 250), ["Press E to open the gate"], 14),
+         "Press E to open the gate"),
+    ]
+    engine = create_ocr_engine("auto", shutil.which("tesseract"), None, "eng", "--psm 6")
+    try:
+        without = sum(_similarity(text, engine.recognize(image).text) for image, text in fixtures)
+        with_preprocessing = sum(
+            _similarity(text, engine.recognize(prepare_ocr_image(image, _Config())).text) for image, text in fixtures
+        )
+    finally:
+        engine.close()
+    assert with_preprocessing >= without
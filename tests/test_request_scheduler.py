@@ -0,0 +1,26 @@
+"""
+リクエストの再試行の判定のテスト。
+"""
+import socket
+
+import pytest
+
+from src.threads.request_scheduler import is_retryable_error
+
+class _ApiError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+@pytest.mark.parametrize("error", [
+    ConnectionResetError(), ConnectionRefusedError(), TimeoutError(), socket.timeout(), socket.gaierror(),
+    _ApiError(429), _ApiError(503),
+])
+def test_transient_errors_are_retried(error):
+    assert is_retryable_error(error)
+
+@pytest.mark.parametrize("error", [
+    FileNotFoundError(), PermissionError(), OSError(), ValueError(), _ApiError(400), _ApiError(403),
+])
+def test_permanent_errors_are_not_retried(error):
+    assert not is_retryable_error(error)
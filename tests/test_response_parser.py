@@ -0,0 +1,77 @@
+"""
+応答のパーサーのテスト。
+ストリーミングで届くチャンクの区切り位置によらず、応答全体を一度に解析した場合と同じ結果になることを確認する。
+"""
+import random
+
+import pytest
+
+from src.utils.response_parser import (
+    BATCH_SECTION_HEADER, BatchResponseDemuxer, StreamingResponseParser, parse_gemini_response
+)
+
+RESPONSES = [
+    ("translation", "翻訳結果: こんにちは、冒険者よ。\n解説:\n- adventurer: 冒険者"),
+    ("translation", "翻訳結果:\n帝国の伝令が到着した。\n封印された手紙を隊長に届けよ。\n\n解説:\n- Imperial: 帝国の\n- courier: 伝令"),
+    ("translation", "翻訳結果: 解説はありません"),
+    ("translation", "解説: 見出しの前に解説があります。\n翻訳結果: 訳文\n解説: 本当の解説"),
+    ("translation", "解説:だけの応答"),
+    ("translation", "見出しのない応答"),
+    ("translation", "翻訳結果:翻訳結果:解説:解説:"),
+    ("explanation", "この画面はクエストの一覧です。\n解説:\n- Quest: クエスト"),
+    ("explanation", "解説の見出しのない応答"),
+    ("translation", ""),
+]
+
+def random_chunks(text, rng):
+    """text を、空文字列や1文字のチャンクも含むランダムな位置で分割する。"""
+    cuts = sorted(rng.sample(range(len(text) + 1), rng.randint(0, min(len(text) + 1, 12))))
+    chunks = []
+    previous = 0
+    for cut in cuts + [len(text)]:
+        chunks.append(text[previous:cut])
+        previous = cut
+    return chunks
+
+def one_shot(text, mode):
+    parser = StreamingResponseParser(mode)
+    parser.feed(text)
+    return parser.sections()
+
+@pytest.mark.parametrize("mode, text", RESPONSES)
+def test_random_chunk_splits_match_one_shot_parse(mode, text):
+    rng = random.Random(text)
+    for _ in range(200):
+        chunks = random_chunks(text, rng)
+        parser = StreamingResponseParser(mode)
+        received = ""
+        for chunk in chunks:
+            received += chunk
+            # 途中経過も、そこまでに届いたテキストを一度に解析した結果と一致する
+            assert parser.feed(chunk) == one_shot(received, mode), chunks
+        assert parser.sections(final=True) == parse_gemini_response(text, mode), chunks
+
+def test_one_character_chunks_match_one_shot_parse():
+    for mode, text in RESPONSES:
+        parser = StreamingResponseParser(mode)
+        for char in text:
+            parser.feed(char)
+        assert parser.sections(final=True) == parse_gemini_response(text, mode)
+
+def test_batch_random_chunk_splits_match_one_shot_parse():
+    answers = [text for mode, text in RESPONSES if mode == "translation"]
+    text = "前置きのテキスト\n" + "\n".join(
+        f"{BATCH_SECTION_HEADER.format(index=index)}\n{answer}" for index, answer in enumerate(answers, 1)
+    )
+    expected = BatchResponseDemuxer(len(answers))
+    expected.feed(text, final=True)
+    rng = random.Random(0)
+    for _ in range(200):
+        chunks = random_chunks(text, rng)
+        demuxer = BatchResponseDemuxer(len(answers))
+        for chunk in chunks:
+            demuxer.feed(chunk)
+        demuxer.feed("", final=True)
+        for index in range(1, len(answers) + 1):
+            assert demuxer.sections(index, final=True) == expected.sections(index, final=True), chunks
+            assert expected.sections(index, final=True) == parse_gemini_response(answers[index - 1])
@@ -0,0 +1,25 @@
+"""
+翻訳メモリの近似一致のテスト。
+"""
+import pytest
+
+from src.utils.history_store import HistoryStore
+from src.utils.translation_memory import TranslationMemory
+
+@pytest.fixture
+def memory(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    memory = TranslationMemory(store)
+    memory.learn(["OK", "The door is locked.", "Received 120 gold coins"], ["了解", "扉には鍵がかかっている。", "120ゴールドを受け取った"])
+    assert memory._fuzzy_ready.wait(5)
+    yield memory
+    store.close()
+
+def test_punctuation_only_difference_reuses_translation(memory):
+    assert memory.lookup(["OK!", "the door is locked", "Received 120 gold coins!"]) == \
+        ["了解", "扉には鍵がかかっている。", "120ゴールドを受け取った"]
+
+def test_number_difference_does_not_reuse_translation(memory):
+    assert memory.lookup(["Received 130 gold coins"]) == [None]
+    # 数字が異なる行も参考訳にはなる
+    assert [hint[0] for hint in memory.find_hints(["Received 130 gold coins"])] == ["Received 120 gold coins"]